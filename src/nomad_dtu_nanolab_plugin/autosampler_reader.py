@@ -1,12 +1,14 @@
 # -------------Packages-------------------
 import csv
+import hashlib
+import io
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from scipy import signal
-from sklearn.linear_model import LinearRegression
 
 # -----------------Globals-------------------
 
@@ -58,13 +60,136 @@ MIN_R = 0.9
 # Number of parts expected in measurement label when split by "__"
 MEASUREMENT_LABEL_PARTS = 4
 
+# dtype of the intensity cube: the Cary exports %T/%R with ~7 significant
+# digits, float32 halves the memory of a full UMA map without losing any of them
+CUBE_INTENSITY_DTYPE = np.float32
+
+# one record per measurement of a spectral cube, filled after the metadata and
+# config blocks have been read (NaN/NaT/None where unknown)
+CUBE_METADATA_DTYPE = np.dtype(
+    [
+        ('sample_name', object),
+        ('measurement_type', object),
+        ('polarization', object),
+        ('polarization_angle', np.float64),
+        ('sample_angle', np.float64),
+        ('detector_angle', np.float64),
+        ('position_x', np.float64),
+        ('position_y', np.float64),
+        ('collection_time', 'datetime64[s]'),
+    ]
+)
+
+# maps with more positions than this are treated in chunks of MAP_CHUNK_SIZE
+# positions by standard_treatment_map, in parallel threads
+MAP_PARALLEL_MIN_POSITIONS = 256
+MAP_CHUNK_SIZE = 64
+
+# results of the map treatment that are common to all positions (the trimmed
+# wavelength axis and the flags of the inflection method)
+MAP_SHARED_RESULTS = {
+    'wavelength',
+    'n_points',
+    'evenly_spaced',
+    'trimmed',
+    'edge_points_removed',
+}
+
+# relative size below which the variance of a window is rounding noise of the
+# cumulative sums, the window fit is then undefined (constant data)
+WINDOW_FIT_RTOL = 1e-10
+
 # -----------------Classes------------------
 
 
+def _nanmean(values):
+    # float64 mean of a float32 cube slice, NaN if nothing is left
+    values = values[~np.isnan(values)]
+    return float(values.mean(dtype=np.float64)) if len(values) else np.nan
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+# class holding all the spectra of one data file: a shared wavelength axis
+# (one row per measurement if the axes differ) and an (n_measurements x
+# n_wavelengths) intensity array, plus one metadata record per measurement
+class SpectralCube:
+    def __init__(self, measurement_labels, wavelengths, intensities, column_names):
+        self.measurement_labels = list(measurement_labels)
+        self.column_names = list(column_names)
+        wavelengths = np.asarray(wavelengths, dtype=np.float64)
+        if all(
+            np.array_equal(wavelengths[0], row, equal_nan=True)
+            for row in wavelengths[1:]
+        ):
+            wavelengths = wavelengths[0].copy()
+        self.wavelength = wavelengths
+        self.energy = 1239.84 / wavelengths
+        self.intensity = np.asarray(intensities, dtype=CUBE_INTENSITY_DTYPE)
+        self.metadata = np.zeros(len(self.measurement_labels), CUBE_METADATA_DTYPE)
+        for name in ('polarization_angle', 'sample_angle', 'detector_angle'):
+            self.metadata[name] = np.nan
+        self.metadata['position_x'] = np.nan
+        self.metadata['position_y'] = np.nan
+        self.metadata['collection_time'] = np.datetime64('NaT')
+
+    def __len__(self):
+        return len(self.measurement_labels)
+
+    @property
+    def shared_axis(self):
+        return self.wavelength.ndim == 1
+
+    def wavelength_of(self, index):
+        return self.wavelength if self.shared_axis else self.wavelength[index]
+
+    def energy_of(self, index):
+        return self.energy if self.shared_axis else self.energy[index]
+
+    def measurements(self):
+        return [
+            SingleMeasurement(label, self, i)
+            for i, label in enumerate(self.measurement_labels)
+        ]
+
+    def collect_metadata(self, measurements):
+        """
+        Copy the metadata of the measurement views into the structured
+        metadata array, so it can be filtered and grouped without the views
+        """
+        for measurement in measurements:
+            if measurement.cube is not self:
+                continue
+            record = self.metadata[measurement.cube_index]
+            metadata = measurement.metadata
+            record['sample_name'] = measurement.sample_name
+            record['measurement_type'] = metadata.get('MeasurementType')
+            record['polarization'] = metadata.get('Polarization')
+            for name, key in (
+                ('polarization_angle', 'PolarizationAngle'),
+                ('sample_angle', 'SampleAngle'),
+                ('detector_angle', 'DetectorAngle'),
+            ):
+                record[name] = _as_float(metadata.get(key))
+            if 'Xsample' in measurement.config:
+                record['position_x'] = _as_float(measurement.config['Xsample'])
+                record['position_y'] = _as_float(measurement.config['Ysample'])
+            if metadata.get('Collection Time') is not None:
+                record['collection_time'] = pd.Timestamp(
+                    metadata['Collection Time']
+                ).to_datetime64()
+
+
 # class for single UV-vis-NIR measurement collected by
-# the Agilent Cary 7000 UMS
+# the Agilent Cary 7000 UMS. When read from a file it is a view on one row of
+# a SpectralCube, the arrays are not copied
 class SingleMeasurement:
-    def __init__(self, measurement_label):
+    def __init__(self, measurement_label, cube=None, cube_index=None):
         # Initialize the measurement with the label
         self.measurement_label = measurement_label
         self.sample_name = None
@@ -73,7 +198,12 @@ class SingleMeasurement:
         # (measurement conditions, uma sequence, etc.) and
         #  config (points where the measurement was taken)
 
-        self.data = pd.DataFrame()  # List of tuples (Wv, E, %T or %R)
+        self.cube = None
+        self.cube_index = None
+        self.column_name = None
+        self._wavelength = None  # Wv, shared with the cube when possible
+        self._energy = None  # E
+        self._intensity = None  # %T or %R
         self.raw_metadata = []  # Dictionary for metadata
         self.metadata = {}  # Dictionary for processes metadata
         self.config = {}  # Dictionary for config
@@ -89,15 +219,80 @@ class SingleMeasurement:
             self.metadata['SampleAngle'] = self.measurement_label.split('__')[2]
             self.metadata['DetectorAngle'] = self.measurement_label.split('__')[3]
 
-    def add_data(self, wavelength, value, column_name):
-        self.data['Wavelength'] = wavelength
-        self.data['Energy'] = 1239.84 / wavelength
-        self.data[column_name] = value
-        self.data['Intensity'] = value
+        if cube is not None:
+            self.cube = cube
+            self.cube_index = cube_index
+            self._set_arrays(
+                cube.wavelength_of(cube_index),
+                cube.intensity[cube_index],
+                energy=cube.energy_of(cube_index),
+            )
+            self._set_column_name(cube.column_names[cube_index])
+
+    def _set_arrays(self, wavelength, intensity, energy=None):
+        self._wavelength = wavelength
+        self._energy = 1239.84 / wavelength if energy is None else energy
+        self._intensity = intensity
+
+    def _set_column_name(self, column_name):
+        self.column_name = column_name
         # remove '%' from the column name
         meas_type = re.sub(r'[%]', '', column_name)
         self.metadata['MeasurementType'] = meas_type
 
+    @property
+    def wavelength(self):
+        return self._wavelength
+
+    @property
+    def energy(self):
+        return self._energy
+
+    @property
+    def intensity(self):
+        return self._intensity
+
+    @property
+    def data(self):
+        """
+        DataFrame with Wavelength, Energy, the raw column and Intensity, built
+        on demand from the arrays
+        """
+        if self._intensity is None:
+            return pd.DataFrame()
+        return pd.DataFrame(
+            {
+                'Wavelength': self._wavelength,
+                'Energy': self._energy,
+                self.column_name: self._intensity,
+                'Intensity': self._intensity,
+            }
+        )
+
+    @data.setter
+    def data(self, data):
+        # detach from the cube, the measurement now owns its arrays
+        self.cube = None
+        self.cube_index = None
+        self._set_arrays(
+            data['Wavelength'].to_numpy(dtype=np.float64),
+            data['Intensity'].to_numpy(dtype=CUBE_INTENSITY_DTYPE),
+            energy=data['Energy'].to_numpy(dtype=np.float64)
+            if 'Energy' in data
+            else None,
+        )
+        if self.column_name is None:
+            self.column_name = 'Intensity'
+
+    def add_data(self, wavelength, value, column_name):
+        self.cube = None
+        self.cube_index = None
+        self._set_arrays(
+            np.asarray(wavelength, dtype=np.float64),
+            np.asarray(value, dtype=CUBE_INTENSITY_DTYPE),
+        )
+        self._set_column_name(column_name)
+
     def add_raw_metadata(self, metadata):
         self.raw_metadata = metadata
         for row in metadata:
@@ -160,7 +355,8 @@ class SingleMeasurement:
         df_to_export.to_csv(f'{file_name}.csv', index=False)
 
 
-# class to store multiple measurements at the same sample position
+# class to store multiple measurements at the same sample position, the
+# measurements are views on the rows of the file's SpectralCube
 class MultiMeasurement:
     def __init__(self, sample_name, verbose=False):
         self.sample_name = sample_name
@@ -171,6 +367,20 @@ class MultiMeasurement:
         self.derived_data = {}
         self.verbose = verbose
 
+    @property
+    def cube(self):
+        return self.measurements[0].cube if self.measurements else None
+
+    @property
+    def cube_indices(self):
+        """
+        Rows of the SpectralCube holding the measurements of this position
+        """
+        return np.array(
+            [measurement.cube_index for measurement in self.measurements],
+            dtype=np.intp,
+        )
+
     def calc_avg_transmission_refl(self, wv_start=None, wv_end=None):
         if self.avg_sp_measurements is not None:
             measurements = self.avg_sp_measurements
@@ -178,13 +388,13 @@ class MultiMeasurement:
             measurements = self.measurements
 
         if wv_start is None and wv_end is None:
-            wv_start = measurements[0].data['Wavelength'].min()
-            wv_end = measurements[0].data['Wavelength'].max()
+            wv_start = np.nanmin(measurements[0].wavelength)
+            wv_end = np.nanmax(measurements[0].wavelength)
 
         for measurement in measurements:
-            data = measurement.data
-            mask = (data['Wavelength'] >= wv_start) & (data['Wavelength'] <= wv_end)
-            avg = data['Intensity'][mask].mean()
+            wavelength = measurement.wavelength
+            mask = (wavelength >= wv_start) & (wavelength <= wv_end)
+            avg = _nanmean(measurement.intensity[mask])
             self.derived_data[
                 f'avg_{measurement.metadata["MeasurementType"]}_{wv_start}_{wv_end}'
             ] = avg
@@ -199,15 +409,17 @@ class MultiMeasurement:
             measurements = self.measurements
 
         if wv_start is None:
-            wv_start = measurements[0].data['Wavelength'].min()
+            wv_start = np.nanmin(measurements[0].wavelength)
         if wv_end is None:
-            wv_end = measurements[0].data['Wavelength'].max()
+            wv_end = np.nanmax(measurements[0].wavelength)
 
         for measurement in measurements:
-            data = measurement.data
-            mask = (data['Wavelength'] >= wv_start) & (data['Wavelength'] <= wv_end)
-            max_val = data['Intensity'][mask].max()
-            max_wv = data['Wavelength'][data['Intensity'] == max_val].values[0]
+            wavelength = measurement.wavelength
+            intensity = measurement.intensity
+            mask = (wavelength >= wv_start) & (wavelength <= wv_end)
+            max_val = np.nanmax(intensity[mask])
+            max_wv = float(wavelength[intensity == max_val][0])
+            max_val = float(max_val)
 
             self.derived_data[
                 f'max_{measurement.metadata["MeasurementType"]}_{wv_start}_{wv_end}'
@@ -259,60 +471,28 @@ class MultiMeasurement:
 
     def _average_measurements(self, s_measurement, p_measurement):
         avg_measurement = SingleMeasurement(s_measurement.measurement_label)
-        avg_measurement.data = (s_measurement.data + p_measurement.data) / 2
+        # on a shared wavelength axis only the intensities need averaging
+        if s_measurement.wavelength is p_measurement.wavelength:
+            wavelength = s_measurement.wavelength
+            energy = s_measurement.energy
+        else:
+            wavelength = (s_measurement.wavelength + p_measurement.wavelength) / 2
+            energy = (s_measurement.energy + p_measurement.energy) / 2
+        avg_measurement._set_arrays(
+            wavelength,
+            (s_measurement.intensity + p_measurement.intensity) / 2,
+            energy=energy,
+        )
+        avg_measurement.column_name = s_measurement.column_name
         avg_measurement.metadata = s_measurement.metadata.copy()
         avg_measurement.metadata['Polarization'] = 'avg'
         return avg_measurement
 
-    def calc_alpha(self, method='1fr', wv_start=None, wv_end=None):
+    def _rt_pair(self):
         """
-        method to calculate the unitless absorption coefficient
-        alpha based on  R and T, and the following methods:
-
-        method "1fr" :
-            alpha = -ln(T/(1-R))
-            # only considers 1st front reflection
-        method "1fbr :
-            alpha = -ln(T/(1-R)^2)
-            #only considers 1st front reflection and 1st back reflection
-        method "infr" :
-            alpha = -ln(-(R^2+sqrt(R^4 + 4T^2R^2 - 4R^3 + 6R^2
-                          - 4R + 1) - 2R - 1)/(2R^2T))
-            # considers all reflections
+        Return the averaged T and R measurements, or None (with a warning) if
+        there is not exactly one of each
         """
-
-        def format_R_T(R, T):
-            R[R > 1] = 1
-            T[T < 0] = T_THRESHOLD
-            return R, T
-
-        # define the different methods to calculate the absorption coefficient
-        def method_1fr(T, R):
-            R, T = format_R_T(R, T)
-            return -np.log(T / (1 - R))
-
-        def method_1fbr(T, R):
-            R, T = format_R_T(R, T)
-            return -np.log(T / (1 - R) ** 2)
-
-        def method_infr(T, R):
-            R, T = format_R_T(R, T)
-            return -np.log(
-                -(
-                    R**2
-                    + np.sqrt(R**4 + 4 * T**2 * R**2 - 4 * R**3 + 6 * R**2 - 4 * R + 1)
-                    - 2 * R
-                    - 1
-                )
-                / (2 * R**2 * T)
-            )
-
-        # dictionary to store the methods
-        method_dict = {
-            '1fr': method_1fr,
-            '1fbr': method_1fbr,
-            'infr': method_infr,
-        }
         # first group the measurements by the measurement type
         rt_grouped_measurements = {}
         for measurement in self.avg_sp_measurements:
@@ -329,7 +509,7 @@ class MultiMeasurement:
                         f'Y={self.position_y}): {len(measurements)} {key} '
                         f'measurements found'
                     )
-                return
+                return None
         # check that both R and T measurements are present
         if 'T' not in rt_grouped_measurements or 'R' not in rt_grouped_measurements:
             if self.verbose:
@@ -337,53 +517,52 @@ class MultiMeasurement:
                     f'Warning (point X={self.position_x}, '
                     f'Y={self.position_y}): T or R measurement missing'
                 )
+            return None
+        return rt_grouped_measurements['T'][0], rt_grouped_measurements['R'][0]
+
+    def calc_alpha(self, method='1fr', wv_start=None, wv_end=None):
+        """
+        method to calculate the unitless absorption coefficient
+        alpha based on  R and T, and the following methods:
+
+        method "1fr" :
+            alpha = -ln(T/(1-R))
+            # only considers 1st front reflection
+        method "1fbr :
+            alpha = -ln(T/(1-R)^2)
+            #only considers 1st front reflection and 1st back reflection
+        method "infr" :
+            alpha = -ln(-(R^2+sqrt(R^4 + 4T^2R^2 - 4R^3 + 6R^2
+                          - 4R + 1) - 2R - 1)/(2R^2T))
+            # considers all reflections
+        """
+        rt_pair = self._rt_pair()
+        if rt_pair is None:
             return
-        # filter the measurements to the specified wavelength range if provided
-        if wv_start is not None and wv_end is not None:
-            for key, measurements in rt_grouped_measurements.items():
-                mask = (measurements[0].data['Wavelength'] >= wv_start) & (
-                    measurements[0].data['Wavelength'] <= wv_end
-                )
-                measurements[0].data = measurements[0].data[mask].reset_index(drop=True)
-        elif wv_start is not None:
-            for key, measurements in rt_grouped_measurements.items():
-                mask = measurements[0].data['Wavelength'] >= wv_start
-                measurements[0].data = measurements[0].data[mask].reset_index(drop=True)
-        elif wv_end is not None:
-            for key, measurements in rt_grouped_measurements.items():
-                mask = measurements[0].data['Wavelength'] <= wv_end
-                measurements[0].data = measurements[0].data[mask].reset_index(drop=True)
-
-        # calculate the absorption coefficient
-        for key, measurements in rt_grouped_measurements.items():
-            if key == 'T':
-                T = measurements[0].data['Intensity'] / 100
-                T_raw = measurements[0].data['Intensity']
-                T_wavelength = measurements[0].data['Wavelength']
-                T_energy = measurements[0].data['Energy']
-            if key == 'R':
-                R = measurements[0].data['Intensity'] / 100
-                R_raw = measurements[0].data['Intensity']
-                R_wavelength = measurements[0].data['Wavelength']
-                R_energy = measurements[0].data['Energy']
-
-        # Create R and T dataframes
-        T_df = pd.DataFrame()
-        T_df['Wavelength'] = T_wavelength
-        T_df['Energy'] = T_energy
-        T_df['T'] = T_raw
-
-        R_df = pd.DataFrame()
-        R_df['Wavelength'] = R_wavelength
-        R_df['Energy'] = R_energy
-        R_df['R'] = R_raw
+        # select the specified wavelength range if provided, the
+        # measurements themselves are views and are left untouched
+        spectra = {}
+        for key, measurement in zip(('T', 'R'), rt_pair):
+            mask = _wavelength_mask(measurement.wavelength, wv_start, wv_end)
+            # Create R and T dataframes
+            spectra[key] = pd.DataFrame(
+                {
+                    'Wavelength': measurement.wavelength[mask],
+                    'Energy': measurement.energy[mask],
+                    key: measurement.intensity[mask].astype(np.float64),
+                }
+            )
+        T_df = spectra['T']
+        R_df = spectra['R']
 
         # format the absorption coefficient into a dataframe
         alpha_df = pd.DataFrame()
-        alpha_df['Wavelength'] = measurements[0].data['Wavelength']
-        alpha_df['Energy'] = measurements[0].data['Energy']
-        alpha_df['alpha'] = method_dict[method](T, R)
-        alpha_df.loc[alpha_df['alpha'] > MAX_ALPHA, 'alpha'] = MAX_ALPHA
+        alpha_df['Wavelength'] = R_df['Wavelength']
+        alpha_df['Energy'] = R_df['Energy']
+        alpha_df['alpha'] = calc_alpha_rows(T_df['T'], R_df['R'], method)
+        self._store_alpha(T_df, R_df, alpha_df, method)
+
+    def _store_alpha(self, T_df, R_df, alpha_df, method):
         # normalize the absorption coefficient between 0 and 1
         normalized_alpha_df = alpha_df.copy()
         normalized_alpha_df['normalized_alpha'] = (
@@ -417,17 +596,10 @@ class MultiMeasurement:
                 )
 
         alpha_df = self.derived_data['alpha']
-        alpha = alpha_df['alpha']
-        energy = alpha_df['Energy']
-        if method == 'direct':
-            tauc = (alpha * energy) ** 2
-        elif method == 'indirect':
-            tauc = np.sqrt(alpha * energy)
-
         tauc_df = pd.DataFrame()
         tauc_df['Wavelength'] = alpha_df['Wavelength']
         tauc_df['Energy'] = alpha_df['Energy']
-        tauc_df['tauc'] = tauc
+        tauc_df['tauc'] = calc_tauc_rows(alpha_df['alpha'], alpha_df['Energy'], method)
 
         self.derived_data['tauc'] = tauc_df
         self.derived_data['tauc_method'] = method
@@ -453,7 +625,6 @@ class MultiMeasurement:
                     f'Y={self.position_y}): Alpha data missing'
                 )
             return
-            return
 
         alpha_df = self.derived_data['alpha']
 
@@ -464,98 +635,56 @@ class MultiMeasurement:
         else:
             filtered_data = alpha_df
 
-        # Extract relevant columns
-        wavelength = filtered_data['Wavelength'].values  # Use wavelength directly
-        alpha = filtered_data['alpha'].values
-
-        # Avoid log or derivative issues
-        alpha[alpha < T_THRESHOLD] = T_THRESHOLD
-
-        # Handle NaN values in alpha
-        alpha[np.isnan(alpha)] = 0
-
         # Set default edge removal based on window size if not specified
         if edge_points_to_remove is None:
             edge_points_to_remove = window_size // 2
 
-        # Calculate spacing between wavelength values
-        wavelength_diff = np.diff(wavelength)
-        evenly_spaced = np.allclose(wavelength_diff, wavelength_diff[0])
+        inflection = inflection_rows(
+            filtered_data['Wavelength'].to_numpy(dtype=np.float64),
+            filtered_data['alpha'].to_numpy(dtype=np.float64)[np.newaxis],
+            window_size,
+            edge_points_to_remove,
+        )
+        self._store_inflection(
+            inflection,
+            0,
+            max_energy=max_energy,
+            window_size=window_size,
+            min_alpha=min_alpha,
+        )
 
-        if evenly_spaced:
-            # Use Savitzky–Golay smoothing and derivatives
-            smooth_alpha = signal.savgol_filter(alpha, window_size, 2)
-            first_derivative = signal.savgol_filter(
-                smooth_alpha, window_size, 2, deriv=1, mode='mirror'
+    def _store_inflection(self, inflection, row, *, max_energy, window_size, min_alpha):
+        edge_points_to_remove = inflection['edge_points_removed']
+        wavelength_trimmed = inflection['wavelength']
+        smooth_alpha_trimmed = inflection['smoothed_alpha'][row]
+        if not inflection['evenly_spaced'] and self.verbose:
+            print(
+                f'Warning (point X={self.position_x},'
+                f' Y={self.position_y}): '
+                'Wavelength values are not evenly spaced. Using rolling'
+                ' average smoothing instead.'
             )
-            second_derivative = signal.savgol_filter(
-                smooth_alpha, window_size, 2, deriv=2, mode='mirror'
+        if inflection['trimmed'] and self.verbose:
+            print(
+                f'Info (point X={self.position_x}, Y={self.position_y}): '
+                f'Removed {edge_points_to_remove} points from each edge. '
+                f'Working with {len(wavelength_trimmed)} points instead '
+                f'of {inflection["n_points"]}.'
             )
-        else:
-            if self.verbose:
-                print(
-                    f'Warning (point X={self.position_x},'
-                    f' Y={self.position_y}): '
-                    'Wavelength values are not evenly spaced. Using rolling'
-                    ' average smoothing instead.'
-                )
-
-            # Rolling average smoothing
-            kernel = np.ones(window_size) / window_size
-            smooth_alpha = np.convolve(alpha, kernel, mode='same')
-
-            # Approximate derivatives with finite differences
-            first_derivative = np.gradient(smooth_alpha, wavelength)
-            second_derivative = np.gradient(first_derivative, wavelength)
-
-        # Remove edge points to avoid derivative artifacts
-        if len(wavelength) > 2 * edge_points_to_remove:
-            # Create slices excluding edge points
-            valid_slice = slice(edge_points_to_remove, -edge_points_to_remove)
-
-            wavelength_trimmed = wavelength[valid_slice]
-            smooth_alpha_trimmed = smooth_alpha[valid_slice]
-            first_derivative_trimmed = first_derivative[valid_slice]
-            second_derivative_trimmed = second_derivative[valid_slice]
-
-            if self.verbose:
-                print(
-                    f'Info (point X={self.position_x}, Y={self.position_y}): '
-                    f'Removed {edge_points_to_remove} points from each edge. '
-                    f'Working with {len(wavelength_trimmed)} points instead '
-                    f'of {len(wavelength)}.'
-                )
-        else:
-            if self.verbose:
-                print(
-                    f'Warning (point X={self.position_x}, Y={self.position_y}): '
-                    f'Not enough data points to remove edges safely. '
-                    f'Using all {len(wavelength)} points.'
-                )
-            wavelength_trimmed = wavelength
-            smooth_alpha_trimmed = smooth_alpha
-            first_derivative_trimmed = first_derivative
-            second_derivative_trimmed = second_derivative
-
-        # Inflection point: index of maximum |first derivative| (in trimmed data)
-        inflection_idx_trimmed = np.argmax(np.abs(first_derivative_trimmed))
-
-        # Find zero crossing of second derivative around inflection point
-        zero_crossings = np.where(np.diff(np.sign(second_derivative_trimmed)))[0]
-        if len(zero_crossings) > 0:
-            bandgap_idx_trimmed = min(
-                zero_crossings, key=lambda x: abs(x - inflection_idx_trimmed)
+        elif self.verbose:
+            print(
+                f'Warning (point X={self.position_x}, Y={self.position_y}): '
+                f'Not enough data points to remove edges safely. '
+                f'Using all {len(wavelength_trimmed)} points.'
+            )
+        if not inflection['zero_crossing'][row] and self.verbose:
+            print(
+                f'Warning (point X={self.position_x}, '
+                f'Y={self.position_y}): No zero crossing found. Using'
+                ' inflection point as bandgap.'
             )
-        else:
-            if self.verbose:
-                print(
-                    f'Warning (point X={self.position_x}, '
-                    f'Y={self.position_y}): No zero crossing found. Using'
-                    ' inflection point as bandgap.'
-                )
-            bandgap_idx_trimmed = inflection_idx_trimmed
 
-        bandgap_wavelength = wavelength_trimmed[bandgap_idx_trimmed]
+        bandgap_wavelength = wavelength_trimmed[inflection['bandgap_index'][row]]
         bandgap_energy = 1239.84 / bandgap_wavelength
 
         # Normalize the alpha values between 0 and 1 (using trimmed data)
@@ -564,37 +693,20 @@ class MultiMeasurement:
         ) / (np.max(smooth_alpha_trimmed) - np.min(smooth_alpha_trimmed))
 
         # Store results in derived_data (using trimmed arrays)
-        self.derived_data['normalized_smoothed_alpha'] = pd.DataFrame(
-            {
-                'Wavelength': wavelength_trimmed,
-                'Energy': 1239.84 / wavelength_trimmed,
-                'normalized_smoothed_alpha': normalized_smoothed_alpha_trimmed,
-            }
-        )
-
-        self.derived_data['smoothed_alpha'] = pd.DataFrame(
-            {
-                'Wavelength': wavelength_trimmed,
-                'Energy': 1239.84 / wavelength_trimmed,
-                'smoothed_alpha': smooth_alpha_trimmed,
-            }
-        )
-
-        self.derived_data['1st_deriv_alpha'] = pd.DataFrame(
-            {
-                'Wavelength': wavelength_trimmed,
-                'Energy': 1239.84 / wavelength_trimmed,
-                '1st_deriv_alpha': first_derivative_trimmed,
-            }
-        )
-
-        self.derived_data['2nd_deriv_alpha'] = pd.DataFrame(
-            {
-                'Wavelength': wavelength_trimmed,
-                'Energy': 1239.84 / wavelength_trimmed,
-                '2nd_deriv_alpha': second_derivative_trimmed,
-            }
-        )
+        energy_trimmed = 1239.84 / wavelength_trimmed
+        for key, values in (
+            ('normalized_smoothed_alpha', normalized_smoothed_alpha_trimmed),
+            ('smoothed_alpha', smooth_alpha_trimmed),
+            ('1st_deriv_alpha', inflection['first_derivative'][row]),
+            ('2nd_deriv_alpha', inflection['second_derivative'][row]),
+        ):
+            self.derived_data[key] = pd.DataFrame(
+                {
+                    'Wavelength': wavelength_trimmed,
+                    'Energy': energy_trimmed,
+                    key: values,
+                }
+            )
 
         # Before splitting the data, we check that not all smoothed alpha values
         # are above a certain threshold, if they are we return NaN
@@ -649,6 +761,27 @@ class MultiMeasurement:
                 )
             return
 
+        if method == 'normalized':
+            alpha_df = self.derived_data['normalized_alpha']
+            alpha = alpha_df['normalized_alpha'].values
+        elif method == 'default':
+            alpha_df = self.derived_data['alpha']
+            alpha = alpha_df['alpha'].values
+        else:
+            raise ValueError(
+                f"Unknown method: {method}. Use 'normalized' or 'default'."
+            )
+
+        energy = alpha_df['Energy'].to_numpy(dtype=np.float64)
+        self._store_threshold(
+            threshold_rows(energy, alpha[np.newaxis], threshold, window_size),
+            0,
+            threshold=threshold,
+            window_size=window_size,
+            min_alpha=min_alpha,
+        )
+
+    def _store_threshold(self, windows, row, *, threshold, window_size, min_alpha):
         # if all the alpha values are above the threshold, we return np.nan
         # and print a warning
         if all(self.derived_data['smoothed_alpha']['smoothed_alpha'] > min_alpha):
@@ -662,42 +795,7 @@ class MultiMeasurement:
             self.derived_data['bandgap_threshold_wavelength'] = np.nan
             return
 
-        if method == 'normalized':
-            alpha_df = self.derived_data['normalized_alpha']
-            alpha = alpha_df['normalized_alpha'].values
-        elif method == 'default':
-            alpha_df = self.derived_data['alpha']
-            alpha = alpha_df['alpha'].values
-        else:
-            raise ValueError(
-                f"Unknown method: {method}. Use 'normalized' or 'default'."
-            )
-
-        energy = alpha_df['Energy'].values
-
-        # Slide a window across the data
-        for i in range(len(energy) - window_size):
-            # Take a window of size 'window_size'
-            E_window = energy[i : i + window_size]
-            alpha_window = alpha[i : i + window_size]
-
-            # Check if all alpha values are above the threshold
-            if all(alpha_window > threshold):
-                # if the very first window has all values above the threshold
-                # we say that the bandgap is np.nan
-                if i == 0:
-                    if self.verbose:
-                        print(
-                            f'Warning (point X={self.position_x}, '
-                            f'Y={self.position_y}): All alpha values are above the '
-                            f'threshold. Bandgap estimation impossible.'
-                        )
-                    E_g = np.nan
-                else:
-                    # Calculate the average energy value of the window
-                    E_g = np.mean(E_window)
-                break
-        else:
+        if not windows['found'][row]:
             if self.verbose:
                 print(
                     f'Warning (point X={self.position_x}, '
@@ -705,6 +803,19 @@ class MultiMeasurement:
                     f'bandgap estimation.'
                 )
             E_g = np.nan
+        # if the very first window has all values above the threshold
+        # we say that the bandgap is np.nan
+        elif windows['start'][row] == 0:
+            if self.verbose:
+                print(
+                    f'Warning (point X={self.position_x}, '
+                    f'Y={self.position_y}): All alpha values are above the '
+                    f'threshold. Bandgap estimation impossible.'
+                )
+            E_g = np.nan
+        else:
+            # the average energy value of the window
+            E_g = windows['energy'][row]
 
         # Store results in derived_data
         self.derived_data['bandgap_threshold_energy'] = E_g
@@ -749,39 +860,31 @@ class MultiMeasurement:
             filtered_data = tauc_df
 
         # Extract relevant columns
-        energy = filtered_data['Energy'].values
-        tauc = filtered_data['tauc'].values
-
-        best_r = -1
-        best_region = None
-        best_region_center = None
-        best_fit = None
-
-        # Slide a window across the data
-        for i in range(len(energy) - window_size):
-            # Take a window of size 'window_size'
-            E_window = energy[i : i + window_size]
-            tauc_window = tauc[i : i + window_size]
-
-            # Perform linear regression on the window
-            model = LinearRegression()
-            model.fit(E_window.reshape(-1, 1), tauc_window)
-
-            # Calculate correlation coefficient (r)
-            r = np.corrcoef(E_window, tauc_window)[0, 1]
-
-            # Get the slope of the linear regression
-            slope = model.coef_[0]
-
-            # If the correlation coefficient is higher than previous best
-            # AND the slope is greater than 1, update best region
-            if r > best_r and slope > min_slope:
-                best_r = r
-                best_region = (i, i + window_size)
-                best_region_center = 0.5 * (best_region[0] + best_region[1])
-                best_fit = model
-
-        if best_fit is None:
+        energy = filtered_data['Energy'].to_numpy(dtype=np.float64)
+        tauc = filtered_data['tauc'].to_numpy(dtype=np.float64)
+
+        fits = tauc_window_fits(energy, tauc[np.newaxis], window_size, min_slope)
+        return self._store_tauc(
+            fits,
+            0,
+            alpha,
+            window_size=window_size,
+            max_energy=max_energy,
+            min_r=min_r,
+            min_slope=min_slope,
+        )
+
+    def _store_tauc(  # noqa: PLR0913
+        self, fits, row, alpha, *, window_size, max_energy, min_r, min_slope
+    ):
+        best_r = fits['r'][row]
+        best_region = (
+            int(fits['start'][row]),
+            int(fits['start'][row]) + window_size,
+        )
+        best_region_center = 0.5 * (best_region[0] + best_region[1])
+
+        if not fits['found'][row]:
             if self.verbose:
                 print(
                     f'Warning (point X={self.position_x}, '
@@ -814,9 +917,7 @@ class MultiMeasurement:
         else:
             # Extrapolate the best region to the x-axis
             # y = mx + b, solve for x when y=0
-            intercept = best_fit.intercept_
-            # Solve for E when y = 0 (intercept = 0)
-            E_g = -intercept / best_fit.coef_[0]
+            E_g = -fits['intercept'][row] / fits['slope'][row]
 
         # Store results in derived_data
         self.derived_data['intercept_best_r'] = best_r
@@ -831,8 +932,8 @@ class MultiMeasurement:
         }
 
         # Also store the slope of the best fit
-        if best_fit is not None:
-            self.derived_data['intercept_best_slope'] = best_fit.coef_[0]
+        if fits['found'][row]:
+            self.derived_data['intercept_best_slope'] = fits['slope'][row]
 
         return best_region, best_r
 
@@ -876,18 +977,479 @@ class MultiMeasurement:
         self.measurements.append(measurement)
 
 
-# -----------------Reading Data-------------------
+# -----------------Map treatment-------------------
 
 
-def group_samples(collects):
-    samples = {}
-    for collect in collects:
-        if collect.sample_name in samples:
-            samples[collect.sample_name].append(collect)
-        else:
-            samples[collect.sample_name] = [collect]
+def _wavelength_mask(wavelength, wv_start=None, wv_end=None):
+    mask = np.ones(len(wavelength), dtype=bool)
+    if wv_start is not None:
+        mask &= wavelength >= wv_start
+    if wv_end is not None:
+        mask &= wavelength <= wv_end
+    return mask
+
+
+def _format_R_T(R, T):
+    R[R > 1] = 1
+    T[T < 0] = T_THRESHOLD
+    return R, T
+
+
+# define the different methods to calculate the absorption coefficient
+def _alpha_1fr(T, R):
+    R, T = _format_R_T(R, T)
+    return -np.log(T / (1 - R))
+
+
+def _alpha_1fbr(T, R):
+    R, T = _format_R_T(R, T)
+    return -np.log(T / (1 - R) ** 2)
+
+
+def _alpha_infr(T, R):
+    R, T = _format_R_T(R, T)
+    return -np.log(
+        -(
+            R**2
+            + np.sqrt(R**4 + 4 * T**2 * R**2 - 4 * R**3 + 6 * R**2 - 4 * R + 1)
+            - 2 * R
+            - 1
+        )
+        / (2 * R**2 * T)
+    )
+
+
+# dictionary to store the methods
+ALPHA_METHODS = {
+    '1fr': _alpha_1fr,
+    '1fbr': _alpha_1fbr,
+    'infr': _alpha_infr,
+}
+
 
-    return samples
+def calc_alpha_rows(T, R, method=ALPHA_METHOD):
+    """
+    Absorption coefficient from T and R in %, elementwise on spectra of any
+    shape (a single spectrum or the stacked spectra of a whole map). See
+    MultiMeasurement.calc_alpha for the methods
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        alpha = ALPHA_METHODS[method](T / 100, R / 100)
+    alpha[alpha > MAX_ALPHA] = MAX_ALPHA
+    return alpha
+
+
+def calc_tauc_rows(alpha, energy, method=TAUC_METHOD):
+    if method == 'direct':
+        return (alpha * energy) ** 2
+    if method == 'indirect':
+        return np.sqrt(alpha * energy)
+    raise ValueError(f"Unknown method: {method}. Use 'direct' or 'indirect'.")
+
+
+def inflection_rows(wavelength, alpha, window_size, edge_points_to_remove):
+    """
+    Smoothed alpha, its first and second derivative and the inflection point
+    for every row of alpha (n_spectra x n_wavelengths) on a common wavelength
+    axis, see MultiMeasurement.estimate_bandgap_inflection
+    """
+    alpha = np.array(alpha, dtype=np.float64)
+    # Avoid log or derivative issues
+    alpha[alpha < T_THRESHOLD] = T_THRESHOLD
+    # Handle NaN values in alpha
+    alpha[np.isnan(alpha)] = 0
+
+    # Calculate spacing between wavelength values
+    wavelength_diff = np.diff(wavelength)
+    evenly_spaced = bool(np.allclose(wavelength_diff, wavelength_diff[0]))
+
+    if evenly_spaced:
+        # Use Savitzky–Golay smoothing and derivatives, on all rows at once
+        smooth_alpha = signal.savgol_filter(alpha, window_size, 2, axis=-1)
+        first_derivative = signal.savgol_filter(
+            smooth_alpha, window_size, 2, deriv=1, mode='mirror', axis=-1
+        )
+        second_derivative = signal.savgol_filter(
+            smooth_alpha, window_size, 2, deriv=2, mode='mirror', axis=-1
+        )
+    else:
+        # Rolling average smoothing
+        kernel = np.ones(window_size) / window_size
+        smooth_alpha = np.apply_along_axis(np.convolve, -1, alpha, kernel, mode='same')
+        # Approximate derivatives with finite differences
+        first_derivative = np.gradient(smooth_alpha, wavelength, axis=-1)
+        second_derivative = np.gradient(first_derivative, wavelength, axis=-1)
+
+    # Remove edge points to avoid derivative artifacts
+    trimmed = len(wavelength) > 2 * edge_points_to_remove
+    if trimmed:
+        valid_slice = slice(edge_points_to_remove, -edge_points_to_remove)
+    else:
+        valid_slice = slice(None)
+    wavelength_trimmed = wavelength[valid_slice]
+    smooth_alpha = smooth_alpha[:, valid_slice]
+    first_derivative = first_derivative[:, valid_slice]
+    second_derivative = second_derivative[:, valid_slice]
+
+    # Inflection point: index of maximum |first derivative| (in trimmed data)
+    inflection_index = np.argmax(np.abs(first_derivative), axis=-1)
+
+    # Zero crossing of the second derivative closest to the inflection point,
+    # the lower index wins a tie
+    crossing = np.diff(np.sign(second_derivative), axis=-1) != 0
+    zero_crossing = crossing.any(axis=-1)
+    distance = np.where(
+        crossing,
+        np.abs(np.arange(crossing.shape[-1]) - inflection_index[:, np.newaxis]),
+        np.iinfo(np.intp).max,
+    )
+    bandgap_index = np.where(
+        zero_crossing,
+        np.argmin(distance, axis=-1) if crossing.shape[-1] else 0,
+        inflection_index,
+    )
+
+    return {
+        'wavelength': wavelength_trimmed,
+        'n_points': len(wavelength),
+        'evenly_spaced': evenly_spaced,
+        'trimmed': trimmed,
+        'edge_points_removed': edge_points_to_remove,
+        'smoothed_alpha': smooth_alpha,
+        'first_derivative': first_derivative,
+        'second_derivative': second_derivative,
+        'zero_crossing': zero_crossing,
+        'bandgap_index': bandgap_index,
+    }
+
+
+def _window_sums(values, window_size, n_windows):
+    # sums over all windows [i, i + window_size) of every row from one cumsum
+    cumulative = np.zeros(values.shape[:-1] + (values.shape[-1] + 1,))
+    np.cumsum(values, axis=-1, out=cumulative[..., 1:])
+    return (
+        cumulative[..., window_size : window_size + n_windows]
+        - cumulative[..., :n_windows]
+    )
+
+
+def tauc_window_fits(energy, tauc, window_size, min_slope=1):
+    """
+    Linear fits of tauc vs energy in every window of window_size points, for
+    every row of tauc (n_spectra x n_energies) at once. The slope, intercept
+    and correlation coefficient of all windows come from cumulative sums of
+    the centered data. Per row the window with the highest r among those with
+    a slope above min_slope is returned, see
+    MultiMeasurement.estimate_bandgap_tauc
+    """
+    n_rows, n_points = tauc.shape
+    n_windows = n_points - window_size
+    if n_windows <= 0:
+        empty = np.full(n_rows, np.nan)
+        return {
+            'found': np.zeros(n_rows, dtype=bool),
+            'start': np.zeros(n_rows, dtype=np.intp),
+            'r': empty,
+            'slope': empty,
+            'intercept': empty,
+        }
+
+    finite = np.isfinite(tauc) & np.isfinite(energy)
+    # centering keeps the cumulative sums small and the differences exact
+    x_offset = np.nanmean(np.where(finite, energy, np.nan), axis=-1, keepdims=True)
+    y_offset = np.nanmean(np.where(finite, tauc, np.nan), axis=-1, keepdims=True)
+    x = np.where(finite, energy - x_offset, 0.0)
+    y = np.where(finite, tauc - y_offset, 0.0)
+
+    incomplete = _window_sums((~finite).astype(np.float64), window_size, n_windows)
+    sum_x = _window_sums(x, window_size, n_windows)
+    sum_y = _window_sums(y, window_size, n_windows)
+    sum_xx = _window_sums(x * x, window_size, n_windows)
+    sum_xy = _window_sums(x * y, window_size, n_windows)
+    sum_yy = _window_sums(y * y, window_size, n_windows)
+
+    covariance = window_size * sum_xy - sum_x * sum_y
+    variance_x = window_size * sum_xx - sum_x**2
+    variance_y = window_size * sum_yy - sum_y**2
+    # constant windows have no correlation coefficient
+    degenerate = (
+        (incomplete > 0)
+        | (variance_x <= WINDOW_FIT_RTOL * window_size * sum_xx)
+        | (variance_y <= WINDOW_FIT_RTOL * window_size * sum_yy)
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = covariance / variance_x
+        r = np.clip(covariance / np.sqrt(variance_x * variance_y), -1, 1)
+    r[degenerate] = np.nan
+    intercept = (sum_y - slope * sum_x) / window_size + y_offset - slope * x_offset
+
+    valid = (r > -1) & (slope > min_slope)
+    start = np.argmax(np.where(valid, r, -np.inf), axis=-1)
+    rows = np.arange(n_rows)
+    return {
+        'found': valid.any(axis=-1),
+        'start': start,
+        'r': r[rows, start],
+        'slope': slope[rows, start],
+        'intercept': intercept[rows, start],
+    }
+
+
+def threshold_rows(energy, alpha, threshold, window_size):
+    """
+    First window of window_size points where all alpha values of a row are
+    above the threshold, for every row of alpha at once, and the mean energy
+    of that window, see MultiMeasurement.estimate_bandgap_threshold
+    """
+    n_rows, n_points = alpha.shape
+    n_windows = n_points - window_size
+    if n_windows <= 0:
+        return {
+            'found': np.zeros(n_rows, dtype=bool),
+            'start': np.zeros(n_rows, dtype=np.intp),
+            'energy': np.full(n_rows, np.nan),
+        }
+    above = (alpha > threshold).astype(np.float64)
+    full = _window_sums(above, window_size, n_windows) == window_size
+    start = np.argmax(full, axis=-1)
+    window_energy = np.lib.stride_tricks.sliding_window_view(energy, window_size)
+    return {
+        'found': full.any(axis=-1),
+        'start': start,
+        'energy': window_energy[start].mean(axis=-1),
+    }
+
+
+def stack_map_spectra(map_meas, wv_start=None, wv_end=None):
+    """
+    Average the s/p pairs of every position of map_meas and stack the T and R
+    spectra of the positions on the common wavelength axis, cropped to
+    [wv_start, wv_end]. Returns the stacked position keys, the cropped
+    wavelength and energy axes, the (n_positions x n_wavelengths) T and R
+    arrays in % and the keys of the positions with a different axis.
+    Positions without exactly one T and R are left out of both
+    """
+    keys, others, T_rows, R_rows = [], [], [], []
+    wavelength = energy = mask = None
+    for position_key, multi_measurement in map_meas.items():
+        multi_measurement.avg_sp_pol()
+        rt_pair = multi_measurement._rt_pair()
+        if rt_pair is None:
+            continue
+        T_measurement, R_measurement = rt_pair
+        if wavelength is None:
+            wavelength = T_measurement.wavelength
+            energy = T_measurement.energy
+            mask = _wavelength_mask(wavelength, wv_start, wv_end)
+        if not all(
+            np.array_equal(measurement.wavelength, wavelength, equal_nan=True)
+            for measurement in rt_pair
+        ):
+            others.append(position_key)
+            continue
+        keys.append(position_key)
+        T_rows.append(T_measurement.intensity[mask])
+        R_rows.append(R_measurement.intensity[mask])
+
+    if not keys:
+        return keys, None, None, None, None, others
+    return (
+        keys,
+        wavelength[mask],
+        energy[mask],
+        np.array(T_rows, dtype=np.float64),
+        np.array(R_rows, dtype=np.float64),
+        others,
+    )
+
+
+def _treat_rows(T, R, wavelength, energy, options):
+    # the whole treatment of a block of stacked positions, arrays only
+    alpha = calc_alpha_rows(T, R, options['alpha_method'])
+    tauc = calc_tauc_rows(alpha, energy, options['tauc_method'])
+    max_energy = options['max_energy']
+    if max_energy is not None:
+        below = energy <= max_energy
+    else:
+        below = np.ones(len(energy), dtype=bool)
+    with np.errstate(invalid='ignore'):
+        normalized = (alpha - np.nanmin(alpha, axis=-1, keepdims=True)) / (
+            np.nanmax(alpha, axis=-1, keepdims=True)
+            - np.nanmin(alpha, axis=-1, keepdims=True)
+        )
+    threshold_alpha = normalized if options['method'] == 'normalized' else alpha
+    return {
+        'alpha': alpha,
+        'tauc': tauc,
+        'inflection': inflection_rows(
+            wavelength[below],
+            alpha[:, below],
+            options['window_size'],
+            options['window_size'] // 2,
+        ),
+        'fits': tauc_window_fits(
+            energy[below],
+            tauc[:, below],
+            options['window_size_intercept'],
+            options['min_slope'],
+        ),
+        'threshold': threshold_rows(
+            energy,
+            threshold_alpha,
+            options['alpha_threshold'],
+            options['window_size_threshold'],
+        ),
+    }
+
+
+def _concat_rows(chunks):
+    # join the per-chunk results along the position axis
+    first = chunks[0]
+    if isinstance(first, dict):
+        return {
+            key: first[key]
+            if key in MAP_SHARED_RESULTS
+            else _concat_rows([chunk[key] for chunk in chunks])
+            for key in first
+        }
+    if isinstance(first, np.ndarray) and first.ndim > 0:
+        return np.concatenate(chunks)
+    return first
+
+
+def standard_treatment_map(  # noqa: PLR0913
+    map_meas,
+    *,
+    wv_start=WV_START,
+    wv_end=WV_END,
+    alpha_method=ALPHA_METHOD,
+    tauc_method=TAUC_METHOD,
+    max_energy=MAX_ENERGY,
+    window_size=WINDOW_SIZE,
+    window_size_intercept=WINDOW_SIZE_INTERCEPT,
+    window_size_threshold=WINDOW_SIZE_THRESHOLD,
+    alpha_threshold=ALPHA_THRESHOLD,
+    method='normalized',
+    min_r=MIN_R,
+    min_slope=1,
+    workers=None,
+):
+    """
+    MultiMeasurement.standard_treatment for all the positions of map_meas at
+    once. The T and R spectra of the positions are stacked on their common
+    wavelength axis and alpha, Tauc, the smoothing/derivatives and all the
+    window fits are computed on the stacked arrays. Maps with more than
+    MAP_PARALLEL_MIN_POSITIONS positions are split in chunks of
+    MAP_CHUNK_SIZE positions treated in `workers` threads.
+
+    The results are written into the derived_data of every position, like the
+    per-position treatment. Positions with their own wavelength axis fall back
+    to the per-position treatment. Returns the bandgaps of the map as arrays
+    keyed by quantity, with the position keys under 'position'.
+    """
+    keys, wavelength, energy, T, R, others = stack_map_spectra(
+        map_meas, wv_start, wv_end
+    )
+    for multi_measurement in map_meas.values():
+        multi_measurement.calc_avg_transmission_refl(wv_start=wv_start, wv_end=wv_end)
+        multi_measurement.find_max_transmission_refl(wv_start=wv_start, wv_end=wv_end)
+    for position_key in others:
+        map_meas[position_key].standard_treatment(
+            wv_start=wv_start,
+            wv_end=wv_end,
+            alpha_method=alpha_method,
+            tauc_method=tauc_method,
+            max_energy=max_energy,
+            window_size=window_size,
+            window_size_intercept=window_size_intercept,
+            window_size_threshold=window_size_threshold,
+            alpha_threshold=alpha_threshold,
+            method=method,
+            min_r=min_r,
+            min_slope=min_slope,
+        )
+    if not keys:
+        return {'position': keys}
+
+    options = {
+        'alpha_method': alpha_method,
+        'tauc_method': tauc_method,
+        'max_energy': max_energy,
+        'window_size': window_size,
+        'window_size_intercept': window_size_intercept,
+        'window_size_threshold': window_size_threshold,
+        'alpha_threshold': alpha_threshold,
+        'method': method,
+        'min_slope': min_slope,
+    }
+    if len(keys) > MAP_PARALLEL_MIN_POSITIONS and workers != 1:
+        blocks = range(0, len(keys), MAP_CHUNK_SIZE)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            chunks = list(
+                executor.map(
+                    lambda i: _treat_rows(
+                        T[i : i + MAP_CHUNK_SIZE],
+                        R[i : i + MAP_CHUNK_SIZE],
+                        wavelength,
+                        energy,
+                        options,
+                    ),
+                    blocks,
+                )
+            )
+        treated = _concat_rows(chunks)
+    else:
+        treated = _treat_rows(T, R, wavelength, energy, options)
+
+    below = energy <= max_energy if max_energy is not None else slice(None)
+    bandgaps = {
+        'position': keys,
+        'bandgap_inflection_energy': np.full(len(keys), np.nan),
+        'bandgap_intercept_energy': np.full(len(keys), np.nan),
+        'bandgap_threshold_energy': np.full(len(keys), np.nan),
+    }
+    for row, position_key in enumerate(keys):
+        multi_measurement = map_meas[position_key]
+        T_df = pd.DataFrame({'Wavelength': wavelength, 'Energy': energy, 'T': T[row]})
+        R_df = pd.DataFrame({'Wavelength': wavelength, 'Energy': energy, 'R': R[row]})
+        alpha_df = pd.DataFrame(
+            {'Wavelength': wavelength, 'Energy': energy, 'alpha': treated['alpha'][row]}
+        )
+        multi_measurement._store_alpha(T_df, R_df, alpha_df, alpha_method)
+        multi_measurement.derived_data['tauc'] = pd.DataFrame(
+            {'Wavelength': wavelength, 'Energy': energy, 'tauc': treated['tauc'][row]}
+        )
+        multi_measurement.derived_data['tauc_method'] = tauc_method
+        multi_measurement._store_inflection(
+            treated['inflection'],
+            row,
+            max_energy=max_energy,
+            window_size=window_size,
+            min_alpha=MIN_ALPHA_BANDGAP,
+        )
+        multi_measurement._store_tauc(
+            treated['fits'],
+            row,
+            treated['alpha'][row][below],
+            window_size=window_size_intercept,
+            max_energy=max_energy,
+            min_r=min_r,
+            min_slope=min_slope,
+        )
+        multi_measurement._store_threshold(
+            treated['threshold'],
+            row,
+            threshold=alpha_threshold,
+            window_size=window_size_threshold,
+            min_alpha=MIN_ALPHA_BANDGAP,
+        )
+        for quantity in (
+            'bandgap_inflection_energy',
+            'bandgap_intercept_energy',
+            'bandgap_threshold_energy',
+        ):
+            bandgaps[quantity][row] = multi_measurement.derived_data[quantity]
+    return bandgaps
 
 
 def estimate_bandgap_tauc_map(
@@ -905,10 +1467,47 @@ def estimate_bandgap_tauc_map(
     max_region = None
     min_region = None
 
+    # the window scan runs once on the stacked tauc data of all the positions
+    # sharing the energy axis of the first one
+    stacked = {}
+    energy = None
     for position_key, multi_measurement in map_meas.items():
-        best_region, best_r = multi_measurement.estimate_bandgap_tauc(
-            window_size=window_size, max_energy=max_energy
-        )
+        if 'tauc' not in multi_measurement.derived_data:
+            continue
+        tauc_df = multi_measurement.derived_data['tauc']
+        if max_energy is not None:
+            tauc_df = tauc_df[tauc_df['Energy'] <= max_energy]
+        if energy is None:
+            energy = tauc_df['Energy'].to_numpy(dtype=np.float64)
+        if np.array_equal(tauc_df['Energy'].to_numpy(), energy, equal_nan=True):
+            stacked[position_key] = tauc_df['tauc'].to_numpy(dtype=np.float64)
+
+    fits = None
+    if stacked:
+        fits = tauc_window_fits(energy, np.array(list(stacked.values())), window_size)
+    rows = {position_key: row for row, position_key in enumerate(stacked)}
+
+    for position_key, multi_measurement in map_meas.items():
+        if position_key not in rows:
+            result = multi_measurement.estimate_bandgap_tauc(
+                window_size=window_size, max_energy=max_energy
+            )
+            if result is None:
+                continue
+            best_region, best_r = result
+        else:
+            alpha_df = multi_measurement.derived_data['alpha']
+            if max_energy is not None:
+                alpha_df = alpha_df[alpha_df['Energy'] <= max_energy]
+            best_region, best_r = multi_measurement._store_tauc(
+                fits,
+                rows[position_key],
+                alpha_df['alpha'].values,
+                window_size=window_size,
+                max_energy=max_energy,
+                min_r=MIN_R,
+                min_slope=1,
+            )
         if isinstance(best_region, tuple):
             best_r_dict[position_key] = best_r
             best_region_dict[position_key] = best_region
@@ -931,66 +1530,168 @@ def estimate_bandgap_tauc_map(
     # find the intersection with the x-axis
 
 
+# -----------------Reading Data-------------------
+
+
+def _group_rows(*columns):
+    """
+    Row indices of the groups of equal values in all columns, in the order of
+    the first row of each group. Each column is reduced to integer codes so
+    that the groups are found with one np.unique over the combined code.
+    """
+    codes = np.zeros(len(columns[0]), dtype=np.int64)
+    for column in columns:
+        column_codes, uniques = pd.factorize(
+            np.asarray(column, dtype=object), use_na_sentinel=False
+        )
+        codes = codes * len(uniques) + column_codes
+    _, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    groups = np.split(order, np.cumsum(np.bincount(inverse))[:-1])
+    return [groups[index] for index in np.argsort(first)]
+
+
+def group_samples(collects):
+    if not collects:
+        return {}
+    groups = _group_rows([collect.sample_name for collect in collects])
+    return {
+        collects[rows[0]].sample_name: [collects[row] for row in rows]
+        for rows in groups
+    }
+
+
 def group_measurements_position(samples, verbose=False):
-    multi_measurements = {}
-    for sample_name, collects in samples.items():
-        if sample_name not in multi_measurements:
-            multi_measurements[sample_name] = {}
-        for collect in collects:
-            position_x = collect.config['Xsample']
-            position_y = collect.config['Ysample']
-            position_key = f'{position_x}_{position_y}'
-            if position_key not in multi_measurements[sample_name]:
-                multi_measurement = MultiMeasurement(sample_name, verbose=verbose)
-                multi_measurement.position_x = collect.config['Xsample']
-                multi_measurement.position_y = collect.config['Ysample']
-                multi_measurements[sample_name][position_key] = multi_measurement
-            multi_measurements[sample_name][position_key].add_measurement(collect)
+    multi_measurements = {sample_name: {} for sample_name in samples}
+    sample_names = list(samples)
+    collects = [collect for sample in samples.values() for collect in sample]
+    if not collects:
+        return multi_measurements
+
+    # one group per (sample, Xsample, Ysample)
+    sample_index = np.repeat(
+        np.arange(len(sample_names)), [len(sample) for sample in samples.values()]
+    )
+    positions_x = [collect.config['Xsample'] for collect in collects]
+    positions_y = [collect.config['Ysample'] for collect in collects]
+    for rows in _group_rows(sample_index, positions_x, positions_y):
+        sample_name = sample_names[sample_index[rows[0]]]
+        multi_measurement = MultiMeasurement(sample_name, verbose=verbose)
+        multi_measurement.position_x = positions_x[rows[0]]
+        multi_measurement.position_y = positions_y[rows[0]]
+        multi_measurement.measurements = [collects[row] for row in rows]
+        position_key = f'{multi_measurement.position_x}_{multi_measurement.position_y}'
+        multi_measurements[sample_name][position_key] = multi_measurement
     return multi_measurements
 
 
+def library_fingerprint(position_data):
+    """
+    Fingerprint of the collects of one library (the positions returned by
+    group_measurements_position for it), from the position, label and
+    Collection Time of each collect. It changes when collects are added to or
+    removed from the library, e.g. by a sequence appended to the data file.
+    """
+    digest = hashlib.sha256()
+    for position_key, multi_measurement in position_data.items():
+        for collect in multi_measurement.measurements:
+            collection_time = collect.metadata.get('Collection Time')
+            digest.update(
+                f'{position_key}|{collect.measurement_label}|'
+                f'{collect.column_name}|{collection_time}\n'.encode()
+            )
+    return digest.hexdigest()
+
+
 def get_uma_sequence_length(sample_names):
-    sample_name_counts = {}
-    for i, name in enumerate(sample_names):
-        if name in sample_name_counts:
-            sample_name_counts[name].append(i)
-        else:
-            sample_name_counts[name] = [i]
+    names = np.asarray(sample_names, dtype=object)
+    codes, _ = pd.factorize(names, use_na_sentinel=False)
+    # first, second and last occurrence of each name, codes follow the order
+    # of first appearance
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes)
+    starts = np.cumsum(counts) - counts
+    repeated = counts > 1
     # Determine the interval between occurrences of the same sample name
-    intervals = []
-    for indices in sample_name_counts.values():
-        if len(indices) > 1:
-            intervals.append(indices[1] - indices[0])
+    intervals = order[starts[repeated] + 1] - order[starts[repeated]]
 
     # check the last interval (the reminder of the list)
     if len(intervals) > 1:
-        intervals.append(len(sample_names) - sample_name_counts[sample_names[0]][-1])
+        last = order[starts[codes[0]] + counts[codes[0]] - 1]
+        intervals = np.append(intervals, len(names) - last)
 
     # check that all intervals are the same
-    if not all(interval == intervals[0] for interval in intervals):
+    if not np.all(intervals == intervals[0]):
         raise ValueError('Intervals between collects are not consistent.')
 
-    return intervals[0]
+    return int(intervals[0])
 
 
-def read_data_block(data_path, measurement_labels, column_headers, parse_sequence=True):
+def split_data_file(text):
+    """
+    Split the text of an exported data file into the two header rows, the
+    numeric block and the metadata block. The numeric block ends at the first
+    row whose first cell is not a number (the empty row before the metadata)
+    """
+    lines = io.StringIO(text)
+    header_rows = list(csv.reader([lines.readline(), lines.readline()]))
+    data_start = block_end = lines.tell()
+    while True:
+        line = lines.readline()
+        if not line:
+            break
+        # decimal wavelengths are numbers too, hence float() and not isdigit()
+        try:
+            float(line.split(',', 1)[0])
+        except ValueError:
+            break
+        block_end = lines.tell()
+    return header_rows, text[data_start:block_end], text[block_end:]
+
 
-    df = pd.read_csv(data_path, skiprows=1)
-    # remove non float rows
-    df = df.apply(pd.to_numeric, errors='coerce')
+def read_numeric_block(numeric_text, n_columns):
+    """
+    Parse the numeric block in one pass of the C parser, straight to floats.
+    Columns without any value (the trailing comma) are dropped
+    """
+    if not numeric_text.strip():
+        return np.empty((0, 0))
+    df = pd.read_csv(
+        io.StringIO(numeric_text),
+        header=None,
+        names=range(n_columns),
+        engine='c',
+    )
+    # only columns with stray text need the slow conversion
+    if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in df.dtypes):
+        df = df.apply(pd.to_numeric, errors='coerce')
     # remove missing values
     df = df.dropna(axis=1, how='all')
-    # remove all rows after the first NaN
-    df = df.dropna(subset=[df.columns[0]])
-
-    collects = []
-    for i in range(len(measurement_labels)):
-        collect = SingleMeasurement(measurement_labels[i])
-        wavelength = df.iloc[:, 2 * i]
-        values = df.iloc[:, 2 * i + 1]
-        column_name = column_headers[2 * i + 1]
-        collect.add_data(wavelength, values, column_name)
-        collects.append(collect)
+    return df.to_numpy(dtype=np.float64)
+
+
+def read_data_block(
+    data_path,
+    measurement_labels,
+    column_headers,
+    parse_sequence=True,
+    numeric_text=None,
+):
+    # parse_file passes the numeric block it already read
+    if numeric_text is None:
+        with open(data_path, encoding='utf-8') as file:
+            _, numeric_text, _ = split_data_file(file.read())
+    values = read_numeric_block(numeric_text, len(column_headers))
+
+    # one (wavelength, value) column pair per measurement
+    n_measurements = len(measurement_labels)
+    cube = SpectralCube(
+        measurement_labels,
+        values[:, 0 : 2 * n_measurements : 2].T,
+        values[:, 1 : 2 * n_measurements : 2].T,
+        [column_headers[2 * i + 1] for i in range(n_measurements)],
+    )
+    collects = cube.measurements()
 
     if parse_sequence:
         uma_sequence_length = get_uma_sequence_length(measurement_labels)
@@ -1058,54 +1759,53 @@ def read_config_block(config_path, collects, uma_sequence_length):
             'Inconsistency in the number of uma measurements '
             'and the measurement mapping in the config file.'
         )
-    # counter to iterate through measurements in the config file
-    config_counter = 0
-    # counter to iterate through measurements in the uma sequence
-    uma_counter = 0
-
-    for collect in collects:
-        collect.add_config(config.iloc[config_counter])
-        uma_counter += 1
-        if uma_counter == uma_sequence_length:
-            config_counter += 1
-            uma_counter = 0
+    # one config row per uma sequence, converted to dicts in one go
+    rows = config.to_dict('records')
+    for index, collect in enumerate(collects):
+        collect.add_config(rows[index // uma_sequence_length])
 
 
 def parse_file(data_path, config_path=None, parse_sequence=True):
+    # the file is read once, the numeric and metadata blocks are parsed from
+    # the same buffer
     with open(data_path, encoding='utf-8') as file:
-        reader = csv.reader(file)
-
-        # Read header lines
-        measurement_labels = next(reader)  # First row
-        # empty strings are removed
-        measurement_labels = list(filter(None, measurement_labels))
-        column_headers = next(reader)  # Second row
-
-        # Read data block
-        collects, uma_sequence_length = read_data_block(
-            data_path,
-            measurement_labels,
-            column_headers,
-            parse_sequence=parse_sequence,
-        )
+        header_rows, numeric_text, metadata_text = split_data_file(file.read())
+
+    # Read header lines
+    measurement_labels = header_rows[0]  # First row
+    # empty strings are removed
+    measurement_labels = list(filter(None, measurement_labels))
+    column_headers = header_rows[1]  # Second row
+
+    # Read data block
+    collects, uma_sequence_length = read_data_block(
+        data_path,
+        measurement_labels,
+        column_headers,
+        parse_sequence=parse_sequence,
+        numeric_text=numeric_text,
+    )
 
-        # Read metadata block
-        metadata_dict = read_metadata_block(reader)
+    # Read metadata block
+    metadata_dict = read_metadata_block(csv.reader(io.StringIO(metadata_text)))
 
-        if len(collects) != len(metadata_dict):
-            raise ValueError(
-                f'Number of collects ({len(collects)})',
-                f'and metadata blocks ({len(metadata_dict)}) do not match.',
-                f'{metadata_dict.keys()}',
-            )
+    if len(collects) != len(metadata_dict):
+        raise ValueError(
+            f'Number of collects ({len(collects)})',
+            f'and metadata blocks ({len(metadata_dict)}) do not match.',
+            f'{metadata_dict.keys()}',
+        )
+
+    # Iterate through the metadata dictionary to write the metadata
+    for collect, metadata in zip(collects, metadata_dict.values()):
+        collect.add_raw_metadata(metadata)
 
-        # Iterate through the metadata dictionary to write the metadata
-        for collect, metadata in zip(collects, metadata_dict.values()):
-            collect.add_raw_metadata(metadata)
+    # Read config block
+    if config_path is not None:
+        read_config_block(config_path, collects, uma_sequence_length)
 
-        # Read config block
-        if config_path is not None:
-            read_config_block(config_path, collects, uma_sequence_length)
+    if collects:
+        collects[0].cube.collect_metadata(collects)
 
     return collects
 
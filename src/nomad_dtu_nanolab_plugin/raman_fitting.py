@@ -0,0 +1,196 @@
+"""Multi-peak fitting of Raman spectra across a map.
+
+Every spectrum is fitted with a sum of Lorentzian or pseudo-Voigt peaks on a
+linear background in a window around the requested peak positions. Along a
+map the fit of a point starts from the result of the point fitted before it,
+which is its neighbour when the points are visited in serpentine order (see
+MappingRamanMeas.fit_peaks). Fits that fail fall back to the initial guesses.
+
+Typical usage:
+    >>> fits = fit_spectra(wavenumber, spectra, centers=[380, 520])
+    >>> fits['center'].shape
+    (n_spectra, 2)
+"""
+
+import numpy as np
+from scipy.optimize import least_squares
+
+PEAK_SHAPES = ('lorentzian', 'voigt')
+FWHM_TO_SIGMA = 1 / (2 * np.sqrt(2 * np.log(2)))  # Gaussian FWHM to sigma
+
+
+def peak_profiles(x, center, fwhm, eta=None):
+    """Unit area peak profiles, one row per peak.
+
+    Args:
+        x (np.ndarray): Raman shift values.
+        center (np.ndarray): Peak positions, shape (n_peaks,).
+        fwhm (np.ndarray): Full widths at half maximum, shape (n_peaks,).
+        eta (np.ndarray, optional): Lorentzian fractions of pseudo-Voigt
+            peaks, shape (n_peaks,). Lorentzian peaks if None.
+
+    Returns:
+        np.ndarray: Profiles of shape (n_peaks, len(x)).
+    """
+    offset = x[None, :] - center[:, None]
+    gamma = fwhm[:, None] / 2
+    profiles = gamma / np.pi / (offset**2 + gamma**2)
+    if eta is not None:
+        sigma = fwhm[:, None] * FWHM_TO_SIGMA
+        gaussian = np.exp(-(offset**2) / (2 * sigma**2)) / (sigma * np.sqrt(2 * np.pi))
+        profiles = eta[:, None] * profiles + (1 - eta[:, None]) * gaussian
+    return profiles
+
+
+def _unpack(params, n_peaks, shape):
+    peaks = params[: 3 * n_peaks].reshape(n_peaks, 3)
+    eta = params[3 * n_peaks : 4 * n_peaks] if shape == 'voigt' else None
+    return peaks[:, 0], peaks[:, 1], peaks[:, 2], eta, params[-2:]
+
+
+def _model(params, x, x_mid, n_peaks, shape):
+    center, fwhm, area, eta, background = _unpack(params, n_peaks, shape)
+    peaks = area @ peak_profiles(x, center, fwhm, eta)
+    return peaks + background[0] + background[1] * (x - x_mid)
+
+
+def _initial_guess(x, y, centers, fwhm, shape):
+    """Peaks of the given width at the given positions on a flat background."""
+    background = np.median(np.concatenate([y[:5], y[-5:]]))
+    height = np.interp(centers, x, y) - background
+    area = np.maximum(height, 0) * np.pi * fwhm / 2 + 1e-6
+    peaks = np.column_stack([centers, np.full(len(centers), fwhm), area]).ravel()
+    eta = np.full(len(centers), 0.5) if shape == 'voigt' else []
+    return np.concatenate([peaks, eta, [background, 0.0]])
+
+
+def fit_spectra(  # noqa: PLR0913
+    wavenumber,
+    spectra,
+    centers,
+    *,
+    shape='lorentzian',
+    fwhm=10.0,
+    window=50.0,
+    max_shift=None,
+):
+    """Fit the same peaks to many spectra, warm-starting from the last fit.
+
+    The spectra are fitted in the given order. The fit of a spectrum starts
+    from the parameters of the previous successful fit, so neighbouring points
+    of a map should follow each other.
+
+    Args:
+        wavenumber (np.ndarray): Shared Raman shift axis in cm⁻¹.
+        spectra (np.ndarray): Spectra of shape (n_spectra, n_wavenumbers).
+        centers (list[float]): Initial peak positions in cm⁻¹.
+        shape (str, optional): 'lorentzian' or 'voigt' (pseudo-Voigt, a
+            mix of a Lorentzian and a Gaussian of the same FWHM).
+            Defaults to 'lorentzian'.
+        fwhm (float, optional): Initial FWHM of the peaks in cm⁻¹.
+            Defaults to 10.
+        window (float, optional): Fitted range in cm⁻¹ beyond the outermost
+            peaks, also the largest FWHM. Defaults to 50.
+        max_shift (float, optional): Largest distance of a fitted peak from
+            its initial position in cm⁻¹. Defaults to fwhm.
+
+    Returns:
+        dict[str, np.ndarray]: 'center', 'fwhm' and 'area' of shape
+            (n_spectra, n_peaks) and 'success' of shape (n_spectra,). Failed
+            fits and peaks outside the range of wavenumber, which are not
+            fitted, are NaN.
+    """
+    if shape not in PEAK_SHAPES:
+        raise ValueError(f'Unknown peak shape: {shape}')
+    centers = np.asarray(centers, dtype=np.float64)
+    n_peaks = len(centers)
+    max_shift = fwhm if max_shift is None else max_shift
+
+    n_spectra = len(spectra)
+    fits = {
+        name: np.full((n_spectra, n_peaks), np.nan)
+        for name in ('center', 'fwhm', 'area')
+    }
+    fits['success'] = np.zeros(n_spectra, dtype=bool)
+    measured = (centers >= np.min(wavenumber)) & (centers <= np.max(wavenumber))
+    if not measured.any():
+        return fits
+    if not measured.all():
+        measured_fits = fit_spectra(
+            wavenumber,
+            spectra,
+            centers[measured],
+            shape=shape,
+            fwhm=fwhm,
+            window=window,
+            max_shift=max_shift,
+        )
+        for name in ('center', 'fwhm', 'area'):
+            fits[name][:, measured] = measured_fits[name]
+        fits['success'] = measured_fits['success']
+        return fits
+
+    in_window = (wavenumber >= centers.min() - window) & (
+        wavenumber <= centers.max() + window
+    )
+    x = np.asarray(wavenumber[in_window], dtype=np.float64)
+    order = np.argsort(x)
+    x = x[order]
+    x_mid = x.mean()
+    step = np.abs(np.diff(x)).min() if len(x) > 1 else 1.0
+
+    # Bounds of center, fwhm, area per peak, eta per peak and the background
+    lower = np.column_stack(
+        [centers - max_shift, np.full(n_peaks, step / 2), np.zeros(n_peaks)]
+    ).ravel()
+    upper = np.column_stack(
+        [centers + max_shift, np.full(n_peaks, window), np.full(n_peaks, np.inf)]
+    ).ravel()
+    if shape == 'voigt':
+        lower = np.concatenate([lower, np.zeros(n_peaks)])
+        upper = np.concatenate([upper, np.ones(n_peaks)])
+    lower = np.concatenate([lower, [-np.inf, -np.inf]])
+    upper = np.concatenate([upper, [np.inf, np.inf]])
+
+    previous = None
+    for i, spectrum in enumerate(spectra):
+        y = np.asarray(spectrum, dtype=np.float64)[in_window][order]
+        initial = (
+            previous
+            if previous is not None
+            else _initial_guess(x, y, centers, fwhm, shape)
+        )
+        try:
+            result = least_squares(
+                lambda params, y=y: _model(params, x, x_mid, n_peaks, shape) - y,
+                np.clip(initial, lower, upper),
+                bounds=(lower, upper),
+                x_scale='jac',
+            )
+        except ValueError:
+            previous = None
+            continue
+        if not result.success or not np.isfinite(result.x).all():
+            previous = None
+            continue
+        previous = result.x
+        center, width, area, _, _ = _unpack(result.x, n_peaks, shape)
+        fits['center'][i] = center
+        fits['fwhm'][i] = width
+        fits['area'][i] = area
+        fits['success'][i] = True
+    return fits
+
+
+def fit_chunk(args):
+    """fit_spectra for one chunk of a map, called in worker processes.
+
+    Args:
+        args (tuple): wavenumber, spectra and the keyword arguments of
+            fit_spectra, including centers.
+
+    Returns:
+        dict[str, np.ndarray]: See fit_spectra.
+    """
+    wavenumber, spectra, kwargs = args
+    return fit_spectra(wavenumber, spectra, **kwargs)
@@ -21,15 +21,285 @@ Author: DTU Nanolab
 License: See LICENSE file
 """
 
+import io
+import mmap
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from renishawWiRE import WDFReader
+from renishawWiRE.types import Offsets
+
+from nomad_dtu_nanolab_plugin.raman_fitting import fit_chunk
 
 NBR_SPECTRA = 2  # Number of spectra to print detailed info for
+MAX_IMAGE_WORKERS = 8  # Threads used to write and downsample the optical images
+THUMBNAIL_SIZE = 256  # Longest side of the optical image tiles in pixels
+JPEG_START = b'\xff\xd8\xff'  # Start of image marker (and first byte of the next)
+JPEG_END = b'\xff\xd9'  # End of image marker
+SI_PEAK_RANGE = (510, 530)  # Si substrate peak in cm⁻¹, ignored when auto-detecting
+SI_PEAK = 520  # Fallback target wavenumber in cm⁻¹
+MAX_SPECTRA_TRACES = 50  # Spectra overlaid in one figure of a large map
+MAX_TRACE_POINTS = 500  # Points of one spectrum in a figure
+CLUSTER_FEATURES = 256  # Wavenumbers used to cluster the spectra
+SPECTRA_BATCH_SIZE = 1024  # Spectra read into memory at once by iter_batches
+CHUNKS_PER_WORKER = 2  # Chunks submitted to a worker process ahead of its results
+
+
+def band_intensities(wavenumber, spectra, target_wavenumbers, wavenumber_tolerance=5):
+    """Average intensity of many spectra in bands around many wavenumbers.
+
+    The spectra share one wavenumber axis. The band edges are looked up once
+    with searchsorted on the sorted axis, so every band is a contiguous slice
+    of the spectra and no masks over the full axis are built.
+
+    Args:
+        wavenumber (np.ndarray): Shared Raman shift axis in cm⁻¹, in any order.
+        spectra (np.ndarray): Intensities of shape (n_spectra, n_wavenumbers).
+        target_wavenumbers (array-like): Band centers in cm⁻¹.
+        wavenumber_tolerance (float or array-like, optional): Half width of the
+            bands in cm⁻¹, one for all or one per band. Defaults to 5 cm⁻¹.
+
+    Returns:
+        np.ndarray: Band averages of shape (n_spectra, n_bands). Bands without
+            any point of the axis are 0.
+
+    Example:
+        >>> band_intensities(mapping.wavenumber, mapping.spectra, [380, 420])
+    """
+    wavenumber = np.asarray(wavenumber)
+    spectra = np.atleast_2d(spectra)
+    targets = np.atleast_1d(np.asarray(target_wavenumbers, dtype=np.float64))
+    tolerance = np.asarray(wavenumber_tolerance, dtype=np.float64)
+    n_wavenumbers = len(wavenumber)
+
+    # WDF axes are descending, reverse them instead of sorting the spectra
+    descending = n_wavenumbers > 1 and wavenumber[0] > wavenumber[-1]
+    axis = wavenumber[::-1] if descending else wavenumber
+    if np.any(np.diff(axis) < 0):
+        order = np.argsort(wavenumber, kind='stable')
+        axis = wavenumber[order]
+        spectra = spectra[:, order]
+        descending = False
+    start = np.searchsorted(axis, targets - tolerance, side='left')
+    stop = np.searchsorted(axis, targets + tolerance, side='right')
+    if descending:
+        start, stop = n_wavenumbers - stop, n_wavenumbers - start
+
+    intensities = np.zeros((len(spectra), len(targets)))
+    for band, (first, last) in enumerate(zip(start, stop)):
+        if last > first:
+            intensities[:, band] = spectra[:, first:last].mean(axis=1, dtype=np.float64)
+    return intensities
+
+
+def representative_spectra(spectra, max_spectra=MAX_SPECTRA_TRACES):
+    """Indices of a subset of spectra that represents all of them.
+
+    The spectra are clustered with k-means into max_spectra clusters, and the
+    spectrum closest to the center of each cluster is taken. The clustering
+    uses at most CLUSTER_FEATURES evenly spaced wavenumbers.
+
+    Args:
+        spectra (np.ndarray): Spectra of shape (n_spectra, n_wavenumbers),
+            e.g. log intensities.
+        max_spectra (int, optional): Size of the subset.
+            Defaults to MAX_SPECTRA_TRACES.
+
+    Returns:
+        np.ndarray: Sorted indices of the selected spectra. All indices if there
+            are at most max_spectra spectra.
+    """
+    n_spectra = len(spectra)
+    if n_spectra <= max_spectra:
+        return np.arange(n_spectra)
+
+    from sklearn.cluster import KMeans
+
+    stride = max(1, spectra.shape[1] // CLUSTER_FEATURES)
+    features = np.asarray(spectra[:, ::stride], dtype=np.float64)
+    kmeans = KMeans(n_clusters=max_spectra, n_init=1, random_state=0)
+    distances = kmeans.fit_transform(features)
+    return np.unique(np.argmin(distances, axis=0))
+
+
+def decimate_spectra(wavenumber, spectra, max_points=MAX_TRACE_POINTS):
+    """Downsample spectra for display while keeping their peaks.
+
+    The axis is split into max_points / 2 buckets and the minimum and the
+    maximum of every spectrum in every bucket are kept, so peaks and dips
+    survive the downsampling.
+
+    Args:
+        wavenumber (np.ndarray): Shared Raman shift axis of the spectra.
+        spectra (np.ndarray): Spectra of shape (n_spectra, n_wavenumbers).
+        max_points (int, optional): Maximum number of points per spectrum.
+            Defaults to MAX_TRACE_POINTS.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Wavenumbers and intensities of shape
+            (n_spectra, n_points), in the order of the axis.
+    """
+    spectra = np.atleast_2d(spectra)
+    n_spectra, n_wavenumbers = spectra.shape
+    if n_wavenumbers <= max_points:
+        return np.broadcast_to(wavenumber, spectra.shape), spectra
+
+    bucket_size = -(-n_wavenumbers // (max_points // 2))
+    n_buckets = -(-n_wavenumbers // bucket_size)
+    padded = np.full((n_spectra, n_buckets * bucket_size), np.nan)
+    padded[:, :n_wavenumbers] = spectra
+    buckets = padded.reshape(n_spectra, n_buckets, bucket_size)
+    start = np.arange(n_buckets) * bucket_size
+    indices = np.sort(
+        np.concatenate(
+            [
+                start + np.nanargmin(buckets, axis=2),
+                start + np.nanargmax(buckets, axis=2),
+            ],
+            axis=1,
+        ),
+        axis=1,
+    )
+    return np.asarray(wavenumber)[indices], np.take_along_axis(spectra, indices, 1)
+
+
+def strongest_wavenumber(wavenumber, spectra, exclude=SI_PEAK_RANGE):
+    """Wavenumber of the highest intensity of all spectra outside a range.
+
+    Args:
+        wavenumber (np.ndarray): Shared Raman shift axis in cm⁻¹.
+        spectra (np.ndarray): Intensities of shape (n_spectra, n_wavenumbers).
+        exclude (tuple[float, float], optional): Range in cm⁻¹ to ignore.
+            Defaults to the Si substrate peak SI_PEAK_RANGE.
+
+    Returns:
+        tuple[float, float]: The wavenumber and its intensity. SI_PEAK and 0 if
+            no positive intensity is found outside the excluded range. The
+            first spectrum wins ties.
+    """
+    keep = (wavenumber < exclude[0]) | (wavenumber > exclude[1])
+    spectra = np.atleast_2d(spectra)
+    if not keep.any() or spectra.size == 0:
+        return SI_PEAK, 0
+    filtered = spectra[:, keep]
+    row, column = np.unravel_index(np.argmax(filtered), filtered.shape)
+    if filtered[row, column] <= 0:
+        return SI_PEAK, 0
+    return wavenumber[keep][column], filtered[row, column]
+
+
+def map_chunks(function, chunks, max_workers=1):
+    """Apply a function to chunks in order, in worker processes if requested.
+
+    Unlike Executor.map, which submits all chunks at once, at most
+    CHUNKS_PER_WORKER chunks per worker are submitted ahead of the results,
+    so chunks generated on demand, e.g. slices of a memory-mapped file, are
+    not all held in memory at the same time.
+
+    Args:
+        function (callable): Function of one chunk, picklable for workers.
+        chunks (iterable): Arguments of function, consumed as results are
+            taken.
+        max_workers (int, optional): Number of worker processes, None for
+            the number of CPUs. Defaults to 1, calling function in this
+            process.
+
+    Yields:
+        The results of function, in the order of chunks.
+    """
+    if max_workers == 1:
+        yield from map(function, chunks)
+        return
+    ahead = CHUNKS_PER_WORKER * (max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(function, chunk))
+            if len(pending) >= ahead:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class MemoryMappedWDFReader(WDFReader):
+    """WDFReader that memory-maps the spectra instead of reading them.
+
+    WDFReader reads the whole DATA block into memory when a file is opened.
+    This reader maps the block instead, so the spectra are read from disk when
+    they are used and large maps do not need to fit in memory. Everything
+    else is parsed by WDFReader. If the block cannot be mapped, the spectra
+    are read as by WDFReader.
+    """
+
+    def _parse_spectra(self, start=0, end=-1):
+        if end == -1:  # take all spectra
+            end = self.count - 1
+        _, pos, size = self.block_info['DATA']
+        pos_start = pos + Offsets.block_data + 4 * start * self.point_per_spectrum
+        # Incomplete measurements hold fewer spectra than count
+        n_values = min(
+            (end - start + 1) * self.point_per_spectrum,
+            (pos + size - pos_start) // 4,
+            (os.fstat(self.file_obj.fileno()).st_size - pos_start) // 4,
+        )
+        try:
+            self.spectra = np.memmap(
+                self.file_obj.name,
+                dtype='<f4',
+                mode='r',
+                offset=pos_start,
+                shape=(n_values,),
+            )
+        except (OSError, ValueError):
+            super()._parse_spectra(start, end)
+
+
+class OpticalImageRef:
+    """Location of one JPEG-encoded optical image in a WDF file.
+
+    Only the offset and the length of the image in the WXDB block are kept.
+    The bytes are read from the file when the image is used, and only decoded
+    when a PIL image is needed.
+
+    Attributes:
+        path (str): Absolute path of the WDF file.
+        offset (int): Position of the first byte of the JPEG in the file.
+        length (int): Number of bytes of the JPEG.
+    """
+
+    def __init__(self, path, offset, length):
+        self.path = path
+        self.offset = offset
+        self.length = length
+
+    def read_bytes(self):
+        """Return the original JPEG bytes of the image."""
+        with open(self.path, 'rb') as file:
+            file.seek(self.offset)
+            return file.read(self.length)
+
+    def open(self, size=None):
+        """Return the decoded PIL image, or None if it cannot be decoded.
+
+        If size is given, the JPEG is decoded at the smallest scale that is
+        still at least size x size pixels, which is much faster than decoding
+        the full image for a thumbnail.
+        """
+        from PIL import Image
+
+        try:
+            image = Image.open(io.BytesIO(self.read_bytes()))
+            if size is not None:
+                image.draft('RGB', (size, size))
+            image.load()
+        except Exception:
+            return None
+        return image
 
 
 class RamanMeas:
@@ -39,18 +309,31 @@ class RamanMeas:
     in a mapping measurement. It includes the spectral data (wavenumber vs intensity),
     the spatial position, and optionally an optical microscopy image of that location.
 
+    When created by MappingRamanMeas.read_wdf_mapping the measurement is a view
+    on one row of the spectra array of the mapping: the wavenumber axis, the
+    intensities and the position are read from the arrays of the mapping and
+    are not copied.
+
     Attributes:
         x_pos (float): X-coordinate of the measurement position in micrometers (μm).
             Note: For Renishaw data, x-coordinates are negated to match
             sample orientation.
         y_pos (float): Y-coordinate of the measurement position in micrometers (μm).
-        data (pd.DataFrame): Spectral data with columns:
+        wavenumber (np.ndarray): Raman shift values in cm⁻¹.
+        intensity (np.ndarray): Raman intensity (arbitrary units).
+        norm_intensity (np.ndarray or None): Normalized intensity (0-1), set by
+            MappingRamanMeas.normalize_intensity().
+        data (pd.DataFrame): Spectral data built on demand from the arrays, with
+            columns:
             - 'wavenumber': Raman shift values in cm⁻¹
             - 'intensity': Raman intensity (arbitrary units)
-            - 'norm_intensity': Normalized intensity (0-1), added by
-                normalize_intensity()
+            - 'norm_intensity': Normalized intensity (0-1), once normalized
         image (PIL.Image or None): Optical microscopy image at this
-            measurement position, extracted from the WDF file if available.
+            measurement position, decoded from the WDF file on first use if
+            available.
+        image_ref (OpticalImageRef or None): Location of the image in the WDF
+            file.
+        thumbnail(size): Downsampled optical image, cached per size.
         laser_wavelength (float or None): Wavelength of the laser used for excitation,
             in nanometers (nm).
 
@@ -63,13 +346,135 @@ class RamanMeas:
         ... )
     """
 
-    def __init__(self):
-        self.x_pos = 0
-        self.y_pos = 0
-        self.data = pd.DataFrame(columns=['wavenumber', 'intensity'])
-        self.image = None  # Store the optical image for this measurement point
+    def __init__(self, mapping=None, index=None):
+        self.mapping = mapping  # MappingRamanMeas holding the arrays
+        self.index = index  # row of this point in the arrays of the mapping
+        self._x_pos = 0
+        self._y_pos = 0
+        self._wavenumber = np.array([])
+        self._intensity = np.array([])
+        self._norm_intensity = None
+        self.image_ref = None  # Location of the optical image in the WDF file
+        self._image = None  # Decoded optical image for this measurement point
+        self._thumbnails = {}  # Downsampled optical images by size
         self.laser_wavelength = None
 
+    @property
+    def image(self):
+        if self._image is None and self.image_ref is not None:
+            self._image = self.image_ref.open()
+        return self._image
+
+    @image.setter
+    def image(self, image):
+        self._image = image
+        self.image_ref = None
+        self._thumbnails = {}
+
+    @property
+    def has_image(self):
+        """Whether an optical image is available, without decoding it."""
+        return self._image is not None or self.image_ref is not None
+
+    def thumbnail(self, size=THUMBNAIL_SIZE):
+        """Return the optical image downsampled to fit in a size x size box.
+
+        The thumbnail is computed once per size and cached. If the full image
+        has not been decoded yet, only a reduced scale of the JPEG is decoded.
+
+        Args:
+            size (int, optional): Longest side of the thumbnail in pixels.
+                Defaults to THUMBNAIL_SIZE.
+
+        Returns:
+            PIL.Image or None: RGB thumbnail, or None if no image is available.
+        """
+        if size not in self._thumbnails:
+            if self._image is not None:
+                image = self._image.copy()
+            elif self.image_ref is not None:
+                image = self.image_ref.open(size=size)
+            else:
+                image = None
+            if image is not None:
+                image.thumbnail((size, size))
+                image = image.convert('RGB')
+            self._thumbnails[size] = image
+        return self._thumbnails[size]
+
+    @property
+    def x_pos(self):
+        if self.mapping is None:
+            return self._x_pos
+        return self.mapping.x_pos[self.index]
+
+    @x_pos.setter
+    def x_pos(self, value):
+        if self.mapping is None:
+            self._x_pos = value
+        else:
+            self.mapping.x_pos[self.index] = value
+
+    @property
+    def y_pos(self):
+        if self.mapping is None:
+            return self._y_pos
+        return self.mapping.y_pos[self.index]
+
+    @y_pos.setter
+    def y_pos(self, value):
+        if self.mapping is None:
+            self._y_pos = value
+        else:
+            self.mapping.y_pos[self.index] = value
+
+    @property
+    def wavenumber(self):
+        if self.mapping is None:
+            return self._wavenumber
+        return self.mapping.wavenumber
+
+    @property
+    def intensity(self):
+        if self.mapping is None:
+            return self._intensity
+        return self.mapping.spectra[self.index]
+
+    @property
+    def norm_intensity(self):
+        if self.mapping is None:
+            return self._norm_intensity
+        if self.mapping.norm_spectra is None:
+            return None
+        return self.mapping.norm_spectra[self.index]
+
+    @property
+    def data(self):
+        """
+        DataFrame with the wavenumber, the intensity and, once normalized, the
+        normalized intensity, built on demand from the arrays
+        """
+        data = pd.DataFrame(
+            {'wavenumber': self.wavenumber, 'intensity': self.intensity}
+        )
+        if self.norm_intensity is not None:
+            data['norm_intensity'] = self.norm_intensity
+        return data
+
+    @data.setter
+    def data(self, data):
+        # detach from the mapping, the measurement now owns its arrays
+        if self.mapping is not None:
+            self._x_pos = self.x_pos
+            self._y_pos = self.y_pos
+            self.mapping = None
+            self.index = None
+        self._wavenumber = data['wavenumber'].to_numpy()
+        self._intensity = data['intensity'].to_numpy()
+        self._norm_intensity = (
+            data['norm_intensity'].to_numpy() if 'norm_intensity' in data else None
+        )
+
 
 class MappingRamanMeas:
     """Handler for Raman mapping measurements from WDF files.
@@ -87,8 +492,21 @@ class MappingRamanMeas:
         - Generating image grids showing optical views of all measurement points
 
     Attributes:
+        wavenumber (np.ndarray): Raman shift axis in cm⁻¹ shared by all spectra.
+        spectra (np.ndarray): Intensities of all spectra as an
+            (n_points x n_wavenumbers) float32 array. For WDF files this is a
+            read-only memory map of the DATA block of the file.
+        raw_spectra (np.ndarray or None): The spectra as read from the file,
+            kept when preprocess() replaces spectra with the processed ones.
+        norm_spectra (np.ndarray or None): Normalized intensities, set by
+            normalize_intensity().
+        peak_fits (dict[str, np.ndarray] or None): Fitted peak positions,
+            widths and areas of all points, set by fit_peaks().
+        x_pos (np.ndarray): X-coordinates of all points in μm.
+        y_pos (np.ndarray): Y-coordinates of all points in μm.
         raman_meas_list (list[RamanMeas]): List of individual Raman measurements,
-            one for each position in the mapping grid.
+            one for each position in the mapping grid. These are views on one
+            row of the arrays above.
 
     Example:
         >>> mapping = MappingRamanMeas()
@@ -105,6 +523,13 @@ class MappingRamanMeas:
     """
 
     def __init__(self):
+        self.wavenumber = None
+        self.spectra = None
+        self.raw_spectra = None
+        self.norm_spectra = None
+        self.peak_fits = None
+        self.x_pos = np.zeros(0)
+        self.y_pos = np.zeros(0)
         self.raman_meas_list = []
         self.wdf_reader = None  # Store WDFReader for metadata access
 
@@ -123,7 +548,8 @@ class MappingRamanMeas:
                 Defaults to False.
 
         Returns:
-            None. Populates self.raman_meas_list with RamanMeas objects.
+            None. Populates the spectra and position arrays and
+                self.raman_meas_list with RamanMeas views on them.
 
         Raises:
             FileNotFoundError: If WDF files cannot be found in the specified folder.
@@ -133,9 +559,13 @@ class MappingRamanMeas:
             - Handles 1D (single spectrum), 2D (line scan), and 3D (area map)
                 data arrays
             - X-coordinates are negated to match standard sample orientation
-            - Optical images are extracted from WXDB blocks when available
-            - Each measurement point gets a RamanMeas object with position,
+            - Optical images are indexed in WXDB blocks when available and
+                decoded on first use
+            - Each measurement point gets a RamanMeas view with position,
                 spectrum, and image
+            - The spectra are memory-mapped from the DATA block of the file
+                (see MemoryMappedWDFReader), use iter_batches to read them in
+                bounded batches
 
         Example:
             >>> mapping = MappingRamanMeas()
@@ -149,7 +579,7 @@ class MappingRamanMeas:
         """
         for filename in filename_list:
             file_path = os.path.join(folder, filename)
-            reader = WDFReader(file_path)
+            reader = MemoryMappedWDFReader(file_path)
 
             # Store the reader for metadata access
             self.wdf_reader = reader
@@ -165,14 +595,12 @@ class MappingRamanMeas:
                     print(f'Y positions: {reader.ypos[:5]}...')
 
             # Get wavenumber data (should be 1D)
-            wv_num = reader.xdata
+            wv_num = np.asarray(reader.xdata).ravel()
 
-            # Extract optical images first
-            optical_images = self._extract_optical_images_from_reader(
-                reader, verbose=verbose
-            )
+            # Index the optical images first, they are decoded on first use
+            optical_images = self._index_optical_images(reader, verbose=verbose)
             if verbose:
-                print(f'Extracted {len(optical_images)} optical images')
+                print(f'Found {len(optical_images)} optical images')
 
             # Check if we have position data
             if (
@@ -183,199 +611,227 @@ class MappingRamanMeas:
                 # We have mapping data with positions
                 if verbose:
                     print('Processing mapping data with positions...')
-
-                # Handle 3D spectra array (e.g., 5x5x1015 grid)
-                spectra_array = reader.spectra
-                if len(spectra_array.shape) == 3:  # noqa: PLR2004
-                    # 3D array: reshape to 2D [position, wavenumber]
+                n_points = len(reader.xpos)
+                spectra_array = self._spectra_block(reader, n_points)
+                if spectra_array.shape[0] != n_points:
                     if verbose:
                         print(
-                            f'Reshaping spectra from {spectra_array.shape} to 2D array'
+                            'Warning: Only single spectrum found,',
+                            'but multiple positions exist',
                         )
-                    # original_shape = spectra_array.shape
-                    spectra_array = spectra_array.reshape(-1, spectra_array.shape[-1])
-                    if verbose:
-                        print(f'Reshaped to: {spectra_array.shape}')
-
-                for i in range(len(reader.xpos)):
-                    raman_meas = RamanMeas()
-                    """
-                    here the X direction needs to be swapped to match
-                    the stage coordinates of the renishaw raman system
-                    """
-                    raman_meas.x_pos = -reader.xpos[i]  # swap x
-                    raman_meas.y_pos = reader.ypos[i]
-                    raman_meas.laser_wavelength = reader.laser_length
-
-                    # Assign optical image if available
-                    if i < len(optical_images):
-                        raman_meas.image = optical_images[i]
-
-                    # Get intensity data for this position
-                    if len(spectra_array.shape) == 2:  # noqa: PLR2004
-                        # 2D array: [position, wavenumber]
-                        intensity = spectra_array[i]
-                        if verbose and i < NBR_SPECTRA:  # Debug first few spectra
-                            print(
-                                f'Spectrum {i}: '
-                                f'pos=({raman_meas.x_pos:.2f}, '
-                                f'{raman_meas.y_pos:.2f}), '
-                                f'intensity range {intensity.min():.2f} - '
-                                f'{intensity.max():.2f}, '
-                                f'has_image={raman_meas.image is not None}'
-                            )
-                    else:
-                        # 1D array: single spectrum
-                        if verbose:
-                            print(
-                                'Warning: Only single spectrum found,',
-                                'but multiple positions exist',
-                            )
-                        intensity = spectra_array
-
-                    # Ensure both arrays are 1D
-                    wv_num_flat = np.array(wv_num).flatten()
-                    intensity_flat = np.array(intensity).flatten()
-
-                    # Make sure arrays have same length
-                    min_length = min(len(wv_num_flat), len(intensity_flat))
-                    wv_num_flat = wv_num_flat[:min_length]
-                    intensity_flat = intensity_flat[:min_length]
-
-                    raman_meas.data = pd.DataFrame(
-                        {'wavenumber': wv_num_flat, 'intensity': intensity_flat}
+                    spectra_array = np.broadcast_to(
+                        spectra_array, (n_points, spectra_array.shape[-1])
                     )
-                    self.raman_meas_list.append(raman_meas)
+                """
+                here the X direction needs to be swapped to match
+                the stage coordinates of the renishaw raman system
+                """
+                x_pos = -np.asarray(reader.xpos, dtype=np.float64)  # swap x
+                y_pos = np.asarray(reader.ypos, dtype=np.float64)
+                laser_wavelength = reader.laser_length
             else:
                 # Single spectrum without position data
                 if verbose:
                     print('Processing single spectrum...')
-                raman_meas = RamanMeas()
-                raman_meas.x_pos = 0
-                raman_meas.y_pos = 0
+                spectra_array = np.asarray(reader.spectra).reshape(1, -1)
+                x_pos = np.zeros(1)
+                y_pos = np.zeros(1)
+                laser_wavelength = None
+                optical_images = optical_images[:1]
+                if verbose and optical_images:
+                    print('Assigned optical image to single spectrum')
+
+            # Make sure the axis and the spectra have the same length
+            min_length = min(len(wv_num), spectra_array.shape[-1])
+            self._add_points(
+                wv_num[:min_length],
+                spectra_array[:, :min_length],
+                x_pos,
+                y_pos,
+                images=optical_images,
+                laser_wavelength=laser_wavelength,
+            )
 
-                # Assign optical image if available
-                if len(optical_images) > 0:
-                    raman_meas.image = optical_images[0]
-                    if verbose:
-                        print('Assigned optical image to single spectrum')
+            if verbose:
+                for raman_meas in self.raman_meas_list[:NBR_SPECTRA]:
+                    intensity = raman_meas.intensity
+                    print(
+                        f'Spectrum {raman_meas.index}: '
+                        f'pos=({raman_meas.x_pos:.2f}, '
+                        f'{raman_meas.y_pos:.2f}), '
+                        f'intensity range {intensity.min():.2f} - '
+                        f'{intensity.max():.2f}, '
+                        f'has_image={raman_meas.has_image}'
+                    )
+                print(f'Total spectra loaded: {len(self.raman_meas_list)}')
 
-                # Ensure both arrays are 1D
-                wv_num_flat = np.array(wv_num).flatten()
-                intensity_flat = np.array(reader.spectra).flatten()
+    @staticmethod
+    def _spectra_block(reader, n_points):
+        """Spectra of an open WDF file as an (n_points x n_wavenumbers) array.
 
-                # Make sure arrays have same length
-                min_length = min(len(wv_num_flat), len(intensity_flat))
-                wv_num_flat = wv_num_flat[:min_length]
-                intensity_flat = intensity_flat[:min_length]
+        With MemoryMappedWDFReader this is a view on the memory-mapped DATA
+        block of the file, so the spectra are read from disk when they are
+        used and never copied in memory.
 
-                raman_meas.data = pd.DataFrame(
-                    {'wavenumber': wv_num_flat, 'intensity': intensity_flat}
-                )
-                self.raman_meas_list.append(raman_meas)
+        Args:
+            reader (WDFReader): Initialized WDFReader object with an open WDF file.
+            n_points (int): Number of measurement points.
 
-            if verbose:
-                print(f'Total spectra loaded: {len(self.raman_meas_list)}')
+        Returns:
+            np.ndarray: float32 array with one row per point (a single row if
+                the file holds only one spectrum).
+        """
+        spectra = reader.spectra
+        n_wavenumbers = reader.point_per_spectrum
+        if spectra.size != n_points * n_wavenumbers:
+            return spectra.reshape(-1, spectra.shape[-1])
+        return spectra.reshape(n_points, n_wavenumbers)
+
+    def iter_batches(self, batch_size=SPECTRA_BATCH_SIZE):
+        """Iterate over the measurement points in batches.
+
+        Only the spectra of one batch are read into memory at a time, so the
+        memory used for the spectra stays bounded whatever the size of the
+        memory-mapped map.
+
+        Args:
+            batch_size (int, optional): Number of points per batch.
+                Defaults to SPECTRA_BATCH_SIZE.
 
-    def _extract_optical_images_from_reader(self, reader, verbose=False):
-        """Extract optical microscopy images from WDF file WXDB block.
+        Yields:
+            tuple[list[RamanMeas], np.ndarray]: The points of the batch and
+                their spectra as an in-memory (n_batch x n_wavenumbers) array.
 
-        Parses the WXDB (Renishaw extended data block) to extract JPEG-encoded
-        optical microscopy images that were captured during the Raman mapping.
+        Example:
+            >>> for points, spectra in mapping.iter_batches(256):
+            ...     print(len(points), spectra.shape)
+        """
+        for start in range(0, len(self.raman_meas_list), batch_size):
+            stop = start + batch_size
+            yield self.raman_meas_list[start:stop], np.array(self.spectra[start:stop])
+
+    def _add_points(  # noqa: PLR0913
+        self, wavenumber, spectra, x_pos, y_pos, *, images, laser_wavelength
+    ):
+        """Add the spectra of one file to the arrays and the views of the mapping.
+
+        The arrays of the first file are used as they are. The spectra of
+        further files are appended to them, which needs the same wavenumber
+        axis in all files.
+        """
+        if self.spectra is None:
+            self.wavenumber = wavenumber
+            self.spectra = spectra
+            self.x_pos = x_pos
+            self.y_pos = y_pos
+        else:
+            if not np.array_equal(self.wavenumber, wavenumber):
+                raise ValueError(
+                    'All WDF files of a mapping need the same wavenumber axis.'
+                )
+            self.spectra = np.concatenate([self.spectra, spectra])
+            self.x_pos = np.concatenate([self.x_pos, x_pos])
+            self.y_pos = np.concatenate([self.y_pos, y_pos])
+        self.norm_spectra = None
+
+        start = len(self.raman_meas_list)
+        for i in range(len(x_pos)):
+            raman_meas = RamanMeas(self, start + i)
+            raman_meas.laser_wavelength = laser_wavelength
+            # Assign optical image if available
+            if i < len(images):
+                raman_meas.image_ref = images[i]
+            self.raman_meas_list.append(raman_meas)
+
+    def _index_optical_images(self, reader, verbose=False):
+        """Index the optical microscopy images in the WDF file WXDB block.
+
+        Locates the JPEG-encoded optical microscopy images that were captured
+        during the Raman mapping in the WXDB (Renishaw extended data block).
         Each image corresponds to a specific measurement position.
 
         Args:
             reader (WDFReader): Initialized WDFReader object with an open WDF file.
-            verbose (bool, optional): If True, prints extraction progress and errors.
+            verbose (bool, optional): If True, prints the location of each image.
                 Defaults to False.
 
         Returns:
-            list[PIL.Image or None]: List of PIL Image objects, one per
-                measurement point. None entries indicate positions where image
-                extraction failed.
+            list[OpticalImageRef]: Offset and length of each image in the file,
+                one per measurement point.
 
         Notes:
             - Searches for JPEG markers (0xFFD8FF) in the WXDB binary data
             - Each JPEG is bounded by start (0xFFD8FF) and end (0xFFD9) markers
-            - Failed extractions are logged if verbose=True but don't raise exceptions
+            - Images are not decoded here; images that cannot be decoded are
+                None when used
             - Returns empty list if no WXDB block exists in the file
 
         Technical Details:
             The WXDB block stores optical images as JPEG data. This method:
             1. Locates the WXDB block using file offset information
-            2. Reads the entire block into memory
-            3. Searches for JPEG start/end markers
-            4. Extracts and decodes each JPEG image
-            5. Handles corrupted or incomplete image data gracefully
+            2. Memory-maps the file instead of reading the block into memory
+            3. Searches for JPEG start/end markers within the block
+            4. Records the offset and length of each JPEG
         """
-        import io
-
-        from PIL import Image
-
         images = []
 
-        # Try to extract from WXDB block
-        if hasattr(reader, 'file_obj') and hasattr(reader, 'block_info'):
-            if 'WXDB' in reader.block_info:
-                if verbose:
-                    print('Found WXDB block, extracting optical images...')
-                block_type, offset, size = reader.block_info['WXDB']
-                reader.file_obj.seek(offset)
-                wxdb_data = reader.file_obj.read(size)
-
-                # Find all JPEG start positions
-                jpeg_start = b'\xff\xd8\xff'
-                jpeg_end = b'\xff\xd9'
-
-                start_positions = []
-                pos = 0
-                while True:
-                    pos = wxdb_data.find(jpeg_start, pos)
-                    if pos == -1:
-                        break
-                    start_positions.append(pos)
-                    pos += 1
-
-                # Extract each JPEG
-                for i, start_pos in enumerate(start_positions):
-                    # Find end of this JPEG
-                    end_pos = wxdb_data.find(jpeg_end, start_pos)
-                    if end_pos == -1:
-                        if i < len(start_positions) - 1:
-                            end_pos = start_positions[i + 1]
-                        else:
-                            end_pos = len(wxdb_data)
+        # Try to index the WXDB block
+        if not (hasattr(reader, 'file_obj') and hasattr(reader, 'block_info')):
+            return images
+        if 'WXDB' not in reader.block_info:
+            return images
+        if verbose:
+            print('Found WXDB block, indexing optical images...')
+        _, offset, size = reader.block_info['WXDB']
+        block_end = offset + size
+        path = os.path.abspath(reader.file_obj.name)
+
+        with mmap.mmap(
+            reader.file_obj.fileno(), 0, access=mmap.ACCESS_READ
+        ) as wxdb_data:
+            # Find all JPEG start positions
+            start_positions = []
+            pos = wxdb_data.find(JPEG_START, offset, block_end)
+            while pos != -1:
+                start_positions.append(pos)
+                pos = wxdb_data.find(JPEG_START, pos + 1, block_end)
+
+            # Find the end of each JPEG
+            for i, start_pos in enumerate(start_positions):
+                end_pos = wxdb_data.find(JPEG_END, start_pos, block_end)
+                if end_pos == -1:
+                    if i < len(start_positions) - 1:
+                        end_pos = start_positions[i + 1]
                     else:
-                        end_pos += 2
-
-                    jpeg_data = wxdb_data[start_pos:end_pos]
-
-                    try:
-                        img = Image.open(io.BytesIO(jpeg_data))
-                        images.append(img)
-                        if verbose:
-                            print(
-                                f'Successfully extracted image {i + 1}, '
-                                f'size: {img.size}'
-                            )
-                    except Exception as e:
-                        if verbose:
-                            print(f'Failed to extract image {i + 1}: {e}')
-                        images.append(None)
+                        end_pos = block_end
+                else:
+                    end_pos += 2
+
+                images.append(OpticalImageRef(path, start_pos, end_pos - start_pos))
+                if verbose:
+                    print(
+                        f'Found image {i + 1} at byte {start_pos}, '
+                        f'{end_pos - start_pos} bytes'
+                    )
 
         return images
 
-    def save_optical_images(self, folder, filename_prefix, verbose=False):
-        """Save all optical microscopy images to disk as PNG files.
+    def save_optical_images(
+        self, folder, filename_prefix, verbose=False, image_format='png'
+    ):
+        """Save all optical microscopy images to disk.
 
-        Exports optical images from all measurement points to individual PNG files
-        with filenames encoding the position information.
+        Exports optical images from all measurement points to individual files
+        with filenames encoding the position information. JPEG export writes
+        the original bytes from the WDF file without decoding them, PNG export
+        transcodes the images in MAX_IMAGE_WORKERS threads.
 
         Args:
             folder (str): Directory path where images will be saved.
             filename_prefix (str): Prefix for image filenames (typically sample ID).
             verbose (bool, optional): If True, prints save statistics.
                 Defaults to False.
+            image_format (str, optional): 'png' or 'jpeg'. Defaults to 'png'.
 
         Returns:
             tuple[int, list[str or None]]:
@@ -384,6 +840,7 @@ class MappingRamanMeas:
 
         File Naming Convention:
             Images are saved as: {prefix}_point{index}_x{x_pos}_y{y_pos}.png
+            (or .jpg for JPEG export)
             Example: sample_001_point0_x2000_y5000.png
             where positions are in micrometers (μm) without decimal points.
 
@@ -397,32 +854,176 @@ class MappingRamanMeas:
             >>> print(filenames[0])
             'sample_001_point0_x2000_y5000.png'
         """
-
-        saved_count = 0
-        saved_filenames = []
-        for i, raman_meas in enumerate(self.raman_meas_list):
-            if raman_meas.image is not None:
-                filename = (
-                    f'{filename_prefix}_point{i}_'
-                    f'x{raman_meas.x_pos:.0f}_y{raman_meas.y_pos:.0f}.png'
-                )
-                img_path = os.path.join(folder, filename)
-                raman_meas.image.save(img_path)
-                saved_count += 1
-                saved_filenames.append(filename)
+        if image_format not in {'png', 'jpeg'}:
+            raise ValueError(f'Unsupported image format: {image_format}')
+        extension = 'jpg' if image_format == 'jpeg' else 'png'
+
+        def save(i, raman_meas):
+            if not raman_meas.has_image:
+                return None
+            filename = (
+                f'{filename_prefix}_point{i}_'
+                f'x{raman_meas.x_pos:.0f}_y{raman_meas.y_pos:.0f}.{extension}'
+            )
+            img_path = os.path.join(folder, filename)
+            if image_format == 'jpeg' and raman_meas.image_ref is not None:
+                with open(img_path, 'wb') as file:
+                    file.write(raman_meas.image_ref.read_bytes())
+            elif raman_meas.image is not None:
+                image = raman_meas.image
+                if image_format == 'jpeg' and image.mode not in {'RGB', 'L'}:
+                    image = image.convert('RGB')
+                image.save(img_path)
             else:
-                saved_filenames.append(None)
+                return None
+            return filename
+
+        with ThreadPoolExecutor(max_workers=MAX_IMAGE_WORKERS) as executor:
+            saved_filenames = list(
+                executor.map(save, *zip(*enumerate(self.raman_meas_list)))
+            )
+        saved_count = sum(filename is not None for filename in saved_filenames)
 
         if verbose:
             print(f'Saved {saved_count} optical images to {folder}')
         return saved_count, saved_filenames
 
+    def preprocess(
+        self, pipeline, batch_size=SPECTRA_BATCH_SIZE, max_workers=1, verbose=False
+    ):
+        """Apply a preprocessing pipeline to all spectra.
+
+        The spectra are processed in chunks of batch_size points, in this
+        process unless more than one worker is requested for a map with more
+        than one chunk (see map_chunks), and written into one float32 array
+        allocated up front. The processed spectra replace spectra, so intensity
+        maps, normalization, plots and iter_batches all use them; the spectra
+        as read are kept in raw_spectra, and calling preprocess again starts
+        from them.
+
+        Args:
+            pipeline (PreprocessingPipeline): Stages to apply, see
+                raman_preprocessing.
+            batch_size (int, optional): Number of spectra per chunk.
+                Defaults to SPECTRA_BATCH_SIZE.
+            max_workers (int, optional): Number of worker processes, None for
+                the number of CPUs. Defaults to 1, processing all chunks in
+                this process.
+            verbose (bool, optional): If True, prints the applied stages.
+                Defaults to False.
+
+        Returns:
+            None. Sets self.spectra (float32, in memory) and self.raw_spectra.
+
+        Example:
+            >>> from nomad_dtu_nanolab_plugin.raman_preprocessing import (
+            ...     PreprocessingPipeline,
+            ... )
+            >>> mapping.preprocess(
+            ...     PreprocessingPipeline.from_config(['cosmic_rays', 'baseline'])
+            ... )
+        """
+        if self.spectra is None or not pipeline:
+            return
+        if verbose:
+            print(f'Preprocessing {len(self.spectra)} spectra: {pipeline}')
+
+        if self.raw_spectra is None:
+            self.raw_spectra = self.spectra
+        starts = range(0, len(self.raw_spectra), batch_size)
+        chunks = (self.raw_spectra[start : start + batch_size] for start in starts)
+        processed = map_chunks(
+            pipeline, chunks, max_workers=max_workers if len(starts) > 1 else 1
+        )
+        spectra = np.empty(self.raw_spectra.shape, dtype=np.float32)
+        for start, chunk in zip(starts, processed):
+            spectra[start : start + len(chunk)] = chunk
+        self.spectra = spectra
+        self.norm_spectra = None
+
+    def fit_peaks(  # noqa: PLR0913
+        self,
+        centers,
+        *,
+        shape='lorentzian',
+        fwhm=10.0,
+        window=50.0,
+        batch_size=SPECTRA_BATCH_SIZE,
+        max_workers=1,
+        verbose=False,
+    ):
+        """Fit the same peaks to the spectra of all points.
+
+        The points are visited row by row in serpentine order, so consecutive
+        points are neighbours and every fit starts from the result of the
+        previous point (see raman_fitting.fit_spectra). The points are fitted
+        in chunks of batch_size points, each starting from the initial guesses,
+        in this process unless more than one worker is requested (see
+        map_chunks). The spectra of a chunk are only read when it is fitted.
+
+        Args:
+            centers (list[float]): Initial peak positions in cm⁻¹.
+            shape (str, optional): 'lorentzian' or 'voigt'.
+                Defaults to 'lorentzian'.
+            fwhm (float, optional): Initial FWHM of the peaks in cm⁻¹.
+                Defaults to 10.
+            window (float, optional): Fitted range in cm⁻¹ beyond the
+                outermost peaks. Defaults to 50.
+            batch_size (int, optional): Number of spectra per chunk.
+                Defaults to SPECTRA_BATCH_SIZE.
+            max_workers (int, optional): Number of worker processes, None for
+                the number of CPUs. Defaults to 1, fitting all chunks in this
+                process.
+            verbose (bool, optional): If True, prints the number of failed
+                fits. Defaults to False.
+
+        Returns:
+            dict[str, np.ndarray] or None: 'center', 'fwhm' and 'area' of
+                shape (n_points, n_peaks) and 'success' of shape (n_points,),
+                in the order of raman_meas_list. Also stored in peak_fits.
+
+        Example:
+            >>> fits = mapping.fit_peaks([380, 520], shape='voigt')
+            >>> fits['center'][:, 0]  # Position of the first peak at all points
+        """
+        if self.spectra is None or len(centers) == 0:
+            return None
+
+        rows = np.unique(np.round(self.y_pos, 3), return_inverse=True)[1]
+        order = np.lexsort((np.where(rows % 2, -self.x_pos, self.x_pos), rows))
+        kwargs = dict(centers=list(centers), shape=shape, fwhm=fwhm, window=window)
+        starts = range(0, len(order), batch_size)
+        chunks = (
+            (self.wavenumber, self.spectra[order[start : start + batch_size]], kwargs)
+            for start in starts
+        )
+        chunk_fits = map_chunks(
+            fit_chunk, chunks, max_workers=max_workers if len(starts) > 1 else 1
+        )
+
+        self.peak_fits = None
+        for start, fits in zip(starts, chunk_fits):
+            if self.peak_fits is None:
+                self.peak_fits = {
+                    name: np.empty((len(order), *values.shape[1:]), dtype=values.dtype)
+                    for name, values in fits.items()
+                }
+            for name, values in fits.items():
+                self.peak_fits[name][order[start : start + batch_size]] = values
+        if verbose:
+            failed = np.count_nonzero(~self.peak_fits['success'])
+            print(
+                f'Fitted {len(centers)} peaks at {len(order)} points, {failed} failed'
+            )
+        return self.peak_fits
+
     def normalize_intensity(self, x_range: tuple = None, verbose=False):
         """Normalize Raman intensities for all spectra.
 
         Normalizes the intensity values by dividing by the maximum intensity,
         either across the full spectrum or within a specified wavenumber range.
-        Adds a 'norm_intensity' column to each measurement's data DataFrame.
+        All spectra are normalized in one array operation into norm_spectra,
+        which is the 'norm_intensity' of each measurement.
 
         Args:
             x_range (tuple[float, float], optional): Wavenumber range (min, max) in cm⁻¹
@@ -432,8 +1033,7 @@ class MappingRamanMeas:
                 Defaults to False.
 
         Returns:
-            None. Modifies each RamanMeas.data DataFrame in-place by adding
-                'norm_intensity'.
+            None. Sets self.norm_spectra.
             - Each spectrum is normalized independently to its own maximum
             - Avoids division by zero by checking max_int > 0
             - Normalized values range from 0 to 1
@@ -450,26 +1050,23 @@ class MappingRamanMeas:
             range_str = f'in range {x_range}' if x_range else 'using full spectrum'
             print(f'Normalizing {len(self.raman_meas_list)} spectra {range_str}')
 
-        for raman_meas in self.raman_meas_list:
-            if x_range is None:
-                # Normalize each spectrum by its own max
-                max_int = raman_meas.data['intensity'].max()
+        if self.spectra is None:
+            return
+        spectra = self.spectra
+        if x_range is None:
+            # Normalize each spectrum by its own max
+            max_int = spectra.max(axis=1)
+        else:
+            # Filter the data based on the x_range, then get max from filtered data
+            mask = (self.wavenumber >= x_range[0]) & (self.wavenumber <= x_range[1])
+            if mask.any():
+                max_int = spectra[:, mask].max(axis=1)
             else:
-                # Filter the data based on the x_range, then get max from filtered data
-                mask = (raman_meas.data['wavenumber'] >= x_range[0]) & (
-                    raman_meas.data['wavenumber'] <= x_range[1]
-                )
-                filtered_data = raman_meas.data[mask]
-                max_int = (
-                    filtered_data['intensity'].max() if len(filtered_data) > 0 else 1
-                )
+                max_int = np.ones(len(spectra), dtype=spectra.dtype)
 
-            if max_int > 0:  # Avoid division by zero
-                raman_meas.data['norm_intensity'] = (
-                    raman_meas.data['intensity'] / max_int
-                )
-            else:
-                raman_meas.data['norm_intensity'] = raman_meas.data['intensity']
+        # Avoid division by zero, such spectra are left as they are
+        max_int = np.where(max_int > 0, max_int, 1).astype(spectra.dtype)
+        self.norm_spectra = spectra / max_int[:, None]
 
     def plot_spectra(
         self,
@@ -525,9 +1122,9 @@ class MappingRamanMeas:
             if verbose:
                 print('Normalizing spectra...')
             self.normalize_intensity(x_range=x_range, verbose=verbose)
-            y_plot = 'norm_intensity'
+            spectra = self.norm_spectra
         elif method == 'default':
-            y_plot = 'intensity'
+            spectra = self.spectra
 
         # Limit number of spectra to plot if specified
         spectra_to_plot = self.raman_meas_list
@@ -555,33 +1152,32 @@ class MappingRamanMeas:
             color_scale[int(val * (len(color_scale) - 1))] for val in norm_color_values
         ]
 
+        # Filter data by x_range if specified
+        wavenumber = self.wavenumber
+        plot_spectra = spectra[: len(spectra_to_plot)]
+        if x_range is not None:
+            mask = (wavenumber >= x_range[0]) & (wavenumber <= x_range[1])
+            wavenumber = wavenumber[mask]
+            plot_spectra = plot_spectra[:, mask]
+
         # Plot spectra with the Plotly library with the position as legend
         fig = go.Figure()
-        for i, (raman_meas, color) in enumerate(zip(spectra_to_plot, colors)):
-            # Filter data by x_range if specified
-            if x_range is not None:
-                mask = (raman_meas.data['wavenumber'] >= x_range[0]) & (
-                    raman_meas.data['wavenumber'] <= x_range[1]
-                )
-                plot_data = raman_meas.data[mask]
-            else:
-                plot_data = raman_meas.data
-
+        for i, (raman_meas, color, intensity) in enumerate(
+            zip(spectra_to_plot, colors, plot_spectra)
+        ):
             # Add some debug info for first few spectra
             if verbose and i < NBR_SPECTRA:
-                intensity_range = (
-                    f'{plot_data[y_plot].min():.2f}-{plot_data[y_plot].max():.2f}'
-                )
+                intensity_range = f'{intensity.min():.2f}-{intensity.max():.2f}'
                 print(
                     f'Spectrum {i}:',
                     f'pos=({raman_meas.x_pos:.2f}, {raman_meas.y_pos:.2f})',
-                    f'intensity_range={intensity_range}, n_points={len(plot_data)}',
+                    f'intensity_range={intensity_range}, n_points={len(intensity)}',
                 )
 
             fig.add_trace(
                 go.Scatter(
-                    x=plot_data['wavenumber'],
-                    y=plot_data[y_plot],
+                    x=wavenumber,
+                    y=intensity,
                     mode='lines',
                     name=f'x={raman_meas.x_pos:.2f}, y={raman_meas.y_pos:.2f}',
                     line=dict(color=color),
@@ -638,35 +1234,43 @@ class MappingRamanMeas:
                 f'{wavenumber_tolerance} cm⁻¹'
             )
 
-        x_positions = []
-        y_positions = []
-        intensities = []
-
-        for raman_meas in self.raman_meas_list:
-            # Note: x_pos and y_pos are already in micrometers from WDF file
-            # These correspond to stage positions (absolute coordinates)
-            x_positions.append(raman_meas.x_pos)
-            y_positions.append(raman_meas.y_pos)
-
-            # Find intensity at target wavenumber
-            mask = (
-                raman_meas.data['wavenumber']
-                >= target_wavenumber - wavenumber_tolerance
-            ) & (
-                raman_meas.data['wavenumber']
-                <= target_wavenumber + wavenumber_tolerance
-            )
-            filtered_data = raman_meas.data[mask]
+        # Note: x_pos and y_pos are already in micrometers from WDF file
+        # These correspond to stage positions (absolute coordinates)
+        maps = self.create_intensity_maps([target_wavenumber], wavenumber_tolerance)
+        return maps.rename(columns={maps.columns[-1]: 'intensity'})
 
-            if len(filtered_data) > 0:
-                intensity = filtered_data['intensity'].mean()
-            else:
-                intensity = 0
-            intensities.append(intensity)
+    def create_intensity_maps(self, target_wavenumbers, wavenumber_tolerance=5):
+        """Create spatial maps of the Raman intensity in many bands at once.
+
+        Like create_intensity_map, but for any number of bands in one pass over
+        the spectra (see band_intensities).
+
+        Args:
+            target_wavenumbers (list[float]): Band centers in cm⁻¹.
+            wavenumber_tolerance (float or list[float], optional): Half width of
+                the bands in cm⁻¹, one for all or one per band.
+                Defaults to 5 cm⁻¹.
 
-        return pd.DataFrame(
-            {'x_pos': x_positions, 'y_pos': y_positions, 'intensity': intensities}
+        Returns:
+            pd.DataFrame: DataFrame with columns 'x_pos' and 'y_pos' in μm and
+                one column of average intensities per band, labeled by its
+                center wavenumber.
+
+        Example:
+            >>> maps = mapping.create_intensity_maps([380, 420, 520])
+            >>> maps[420].max()
+        """
+        target_wavenumbers = list(target_wavenumbers)
+        if self.spectra is None:
+            return pd.DataFrame(columns=['x_pos', 'y_pos', *target_wavenumbers])
+
+        intensities = band_intensities(
+            self.wavenumber, self.spectra, target_wavenumbers, wavenumber_tolerance
         )
+        maps = pd.DataFrame(intensities, columns=target_wavenumbers)
+        maps.insert(0, 'y_pos', self.y_pos)
+        maps.insert(0, 'x_pos', self.x_pos)
+        return maps
 
     def plot_intensity_map(
         self, target_wavenumber=None, wavenumber_tolerance=5, verbose=False
@@ -724,20 +1328,11 @@ class MappingRamanMeas:
             # Find the wavenumber with the absolute maximum intensity
             # across all spectra (excluding 510-530 cm⁻¹ range
             # corresponding to the Si peak)
-            max_intensity = 0
-            target_wavenumber = 520  # default fallback (Si)
-            range_Si = 10
-            for raman_meas in self.raman_meas_list:
-                filtered = raman_meas.data[
-                    (raman_meas.data['wavenumber'] < target_wavenumber - range_Si)
-                    | (raman_meas.data['wavenumber'] > target_wavenumber + range_Si)
-                ]
-                if len(filtered) > 0:
-                    current_max_idx = filtered['intensity'].idxmax()
-                    current_max_intensity = filtered.loc[current_max_idx, 'intensity']
-                    if current_max_intensity > max_intensity:
-                        max_intensity = current_max_intensity
-                        target_wavenumber = filtered.loc[current_max_idx, 'wavenumber']
+            target_wavenumber, max_intensity = SI_PEAK, 0
+            if self.spectra is not None:
+                target_wavenumber, max_intensity = strongest_wavenumber(
+                    self.wavenumber, self.spectra
+                )
 
             if verbose:
                 print(
@@ -750,16 +1345,12 @@ class MappingRamanMeas:
         )
 
         # Create a pivot table for the heatmap
-        x_unique = sorted(map_data['x_pos'].unique())
-        y_unique = sorted(map_data['y_pos'].unique())
+        x_unique, x_idx = np.unique(map_data['x_pos'].to_numpy(), return_inverse=True)
+        y_unique, y_idx = np.unique(map_data['y_pos'].to_numpy(), return_inverse=True)
 
         # Create intensity matrix
         intensity_matrix = np.zeros((len(y_unique), len(x_unique)))
-
-        for _, row in map_data.iterrows():
-            x_idx = x_unique.index(row['x_pos'])
-            y_idx = y_unique.index(row['y_pos'])
-            intensity_matrix[y_idx, x_idx] = row['intensity']
+        intensity_matrix[y_idx, x_idx] = map_data['intensity'].to_numpy()
 
         fig = go.Figure(
             data=go.Heatmap(
@@ -867,3 +1458,110 @@ class MappingRamanMeas:
             plt.savefig(save_path, dpi=150, bbox_inches='tight')
 
         return fig
+
+    def create_image_mosaic(self, tile_size=THUMBNAIL_SIZE, verbose=False):
+        """Composite the optical images into one mosaic by stage position.
+
+        Every optical image is downsampled once into a cached thumbnail (see
+        RamanMeas.thumbnail) and placed as a tile on a grid whose columns are
+        the distinct x positions and whose rows are the distinct y positions
+        of the map, with the highest y position at the top as in
+        plot_intensity_map.
+
+        Args:
+            tile_size (int, optional): Longest side of the tiles in pixels.
+                Defaults to THUMBNAIL_SIZE.
+            verbose (bool, optional): If True, prints status messages.
+                Defaults to False.
+
+        Returns:
+            np.ndarray or None:
+                - RGB mosaic as uint8 array of shape (height, width, 3)
+                - None if no optical images are available
+
+        Notes:
+            - Positions without an optical image are left white
+            - The thumbnails are computed in MAX_IMAGE_WORKERS threads
+
+        Example:
+            >>> mosaic = mapping.create_image_mosaic(tile_size=128)
+            >>> mosaic.shape
+            (82, 1152, 3)
+        """
+        with ThreadPoolExecutor(max_workers=MAX_IMAGE_WORKERS) as executor:
+            thumbnails = list(
+                executor.map(
+                    lambda raman_meas: raman_meas.thumbnail(tile_size),
+                    self.raman_meas_list,
+                )
+            )
+        with_images = [i for i, tile in enumerate(thumbnails) if tile is not None]
+        if not with_images:
+            if verbose:
+                print('No optical images available')
+            return None
+
+        tile_width = max(thumbnails[i].width for i in with_images)
+        tile_height = max(thumbnails[i].height for i in with_images)
+        x_unique, cols = np.unique(self.x_pos[with_images], return_inverse=True)
+        y_unique, rows = np.unique(-self.y_pos[with_images], return_inverse=True)
+        mosaic = np.full(
+            (len(y_unique) * tile_height, len(x_unique) * tile_width, 3),
+            255,
+            dtype=np.uint8,
+        )
+        for i, row, col in zip(with_images, rows, cols):
+            tile = np.asarray(thumbnails[i])
+            top = row * tile_height
+            left = col * tile_width
+            mosaic[top : top + tile.shape[0], left : left + tile.shape[1]] = tile
+
+        if verbose:
+            print(
+                f'Created {len(y_unique)} x {len(x_unique)} mosaic of '
+                f'{len(with_images)} optical images'
+            )
+        return mosaic
+
+    def save_image_pyramid(self, save_path, tile_size=THUMBNAIL_SIZE, verbose=False):
+        """Save the optical image mosaic at decreasing resolutions.
+
+        The mosaic of create_image_mosaic is written to save_path and then
+        halved in size until its longest side fits in one tile. Level n is
+        written next to save_path as {stem}_{n}{extension}, so an overview can
+        be shown without loading the full-size images.
+
+        Args:
+            save_path (str): File path of the full resolution mosaic.
+            tile_size (int, optional): Longest side of the tiles in pixels.
+                Defaults to THUMBNAIL_SIZE.
+            verbose (bool, optional): If True, prints status messages.
+                Defaults to False.
+
+        Returns:
+            list[str]: Paths of the written levels, from full resolution to
+                smallest. Empty if no optical images are available.
+
+        Example:
+            >>> mapping.save_image_pyramid('/output/optical_grid.png')
+            ['/output/optical_grid.png', '/output/optical_grid_1.png',
+             '/output/optical_grid_2.png']
+        """
+        from PIL import Image
+
+        mosaic = self.create_image_mosaic(tile_size=tile_size, verbose=verbose)
+        if mosaic is None:
+            return []
+
+        image = Image.fromarray(mosaic)
+        stem, extension = os.path.splitext(save_path)
+        paths = [save_path]
+        image.save(save_path)
+        while max(image.size) > tile_size:
+            image = image.reduce(2)
+            paths.append(f'{stem}_{len(paths)}{extension}')
+            image.save(paths[-1])
+
+        if verbose:
+            print(f'Saved {len(paths)} mosaic levels to {os.path.dirname(save_path)}')
+        return paths
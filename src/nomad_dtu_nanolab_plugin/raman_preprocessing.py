@@ -0,0 +1,221 @@
+"""Preprocessing of Raman spectra before intensity maps and fits.
+
+Every stage works on a whole cube of spectra at once, an
+(n_spectra x n_wavenumbers) array, and returns a new float32 cube:
+
+    - remove_cosmic_rays: replaces spikes found with a median filter
+    - subtract_baseline: subtracts asymmetric least squares baselines
+    - smooth_spectra: Savitzky-Golay smoothing along the wavenumber axis
+
+A PreprocessingPipeline chains stages by name and can be built from the
+configuration of the Raman schema package. MappingRamanMeas.preprocess
+applies it in chunks, optionally across a process pool.
+
+Typical usage:
+    >>> pipeline = PreprocessingPipeline.from_config(
+    ...     ['cosmic_rays', {'baseline': {'lam': 1e6}}, 'smooth']
+    ... )
+    >>> mapping.preprocess(pipeline)
+"""
+
+import numpy as np
+from scipy.linalg import solveh_banded
+from scipy.ndimage import median_filter
+from scipy.signal import savgol_filter
+
+MAD_TO_SIGMA = 1.4826  # Median absolute deviation of a normal distribution
+MIN_BASELINE_POINTS = 3  # Points needed for the second differences of a baseline
+
+
+def remove_cosmic_rays(spectra, window=5, threshold=8.0):
+    """Replace cosmic ray spikes by the median filtered spectra.
+
+    Every spectrum is median filtered along the wavenumber axis. A point is a
+    spike if it exceeds the filtered spectrum by more than threshold times the
+    robust noise level (median absolute deviation) of the spectrum and is next
+    to a step between two points of more than threshold times the noise level
+    of the steps. The second condition keeps the tops of Raman peaks, which
+    the median filter flattens but which are reached in small steps. Spikes
+    are replaced by the filtered values.
+
+    Raman peaks only a few points wide cannot be told apart from spikes this
+    way and may be clipped; raise threshold for maps with such peaks.
+
+    Args:
+        spectra (np.ndarray): Spectra of shape (n_spectra, n_wavenumbers).
+        window (int, optional): Width of the median filter in points. Spikes
+            must be narrower than half the window. Defaults to 5.
+        threshold (float, optional): Spike threshold in noise levels.
+            Defaults to 8.
+
+    Returns:
+        np.ndarray: float32 spectra without spikes.
+    """
+    spectra = np.asarray(spectra, dtype=np.float32)
+    filtered = median_filter(spectra, size=(1, window), mode='nearest')
+    high = _outliers(spectra - filtered, threshold)
+
+    steps = np.diff(spectra, axis=1)
+    steps = np.abs(steps - np.median(steps, axis=1, keepdims=True))
+    steep = _outliers(steps, threshold)
+    beside_step = np.zeros(spectra.shape, dtype=bool)
+    beside_step[:, 1:] |= steep
+    beside_step[:, :-1] |= steep
+
+    return np.where(high & beside_step, filtered, spectra)
+
+
+def _outliers(residual, threshold):
+    """Points of every row above threshold times its median absolute value."""
+    noise = MAD_TO_SIGMA * np.median(np.abs(residual), axis=1, keepdims=True)
+    return residual > threshold * np.maximum(noise, np.finfo(np.float32).tiny)
+
+
+def als_baseline(spectra, lam=1e5, p=0.01, n_iter=10):
+    """Asymmetric least squares baselines of many spectra.
+
+    Solves (W + lam D'D) z = W y for every spectrum, with D the second
+    difference matrix, and reweights the points above the baseline with p and
+    the points below with 1 - p (Eilers and Boelens, 2005). The systems of all
+    spectra are stacked into one symmetric banded system, so every iteration
+    is a single banded solve for the whole cube.
+
+    Args:
+        spectra (np.ndarray): Spectra of shape (n_spectra, n_wavenumbers).
+        lam (float, optional): Smoothness of the baseline. Defaults to 1e5.
+        p (float, optional): Weight of the points above the baseline.
+            Defaults to 0.01.
+        n_iter (int, optional): Number of reweighting iterations.
+            Defaults to 10.
+
+    Returns:
+        np.ndarray: float64 baselines of the same shape as spectra.
+    """
+    y = np.asarray(spectra, dtype=np.float64)
+    n_spectra, n_wavenumbers = y.shape
+    if n_wavenumbers < MIN_BASELINE_POINTS:
+        return y.copy()
+
+    # Upper bands of D'D for one spectrum, zero where they would couple the
+    # last points of a spectrum to the first points of the next one
+    diagonal = np.full(n_wavenumbers, 6.0)
+    diagonal[[0, -1]] = 1.0
+    diagonal[[1, -2]] = 5.0
+    first = np.full(n_wavenumbers, -4.0)
+    first[[1, -1]] = -2.0
+    first[0] = 0.0
+    second = np.ones(n_wavenumbers)
+    second[:2] = 0.0
+    bands = lam * np.vstack([np.tile(second, n_spectra), np.tile(first, n_spectra)])
+    penalty = lam * np.tile(diagonal, n_spectra)
+
+    y = y.ravel()
+    weights = np.ones_like(y)
+    for _ in range(n_iter):
+        baseline = solveh_banded(
+            np.vstack([bands, penalty + weights]), weights * y, check_finite=False
+        )
+        weights = np.where(y > baseline, p, 1 - p)
+    return baseline.reshape(n_spectra, n_wavenumbers)
+
+
+def subtract_baseline(spectra, lam=1e5, p=0.01, n_iter=10):
+    """Subtract the asymmetric least squares baselines (see als_baseline).
+
+    Returns:
+        np.ndarray: float32 spectra without baseline.
+    """
+    baseline = als_baseline(spectra, lam=lam, p=p, n_iter=n_iter)
+    return (np.asarray(spectra, dtype=np.float64) - baseline).astype(np.float32)
+
+
+def smooth_spectra(spectra, window=9, polyorder=3):
+    """Savitzky-Golay smoothing of every spectrum along the wavenumber axis.
+
+    Args:
+        spectra (np.ndarray): Spectra of shape (n_spectra, n_wavenumbers).
+        window (int, optional): Window length in points, odd. Defaults to 9.
+        polyorder (int, optional): Order of the fitted polynomials.
+            Defaults to 3.
+
+    Returns:
+        np.ndarray: float32 smoothed spectra.
+    """
+    spectra = np.asarray(spectra, dtype=np.float32)
+    if spectra.shape[1] < window:
+        return spectra
+    return savgol_filter(spectra, window, polyorder, axis=1).astype(np.float32)
+
+
+PREPROCESSING_STAGES = {
+    'cosmic_rays': remove_cosmic_rays,
+    'baseline': subtract_baseline,
+    'smooth': smooth_spectra,
+}
+
+
+class PreprocessingPipeline:
+    """Sequence of preprocessing stages applied to a cube of spectra.
+
+    The stages are stored by name with their parameters, so a pipeline can be
+    sent to worker processes and written to an archive as text.
+
+    Attributes:
+        stages (list[tuple[str, dict]]): Names of the stages in
+            PREPROCESSING_STAGES and their keyword arguments, in the order
+            they are applied.
+
+    Example:
+        >>> pipeline = PreprocessingPipeline(
+        ...     [('cosmic_rays', {}), ('baseline', {'lam': 1e6}), ('smooth', {})]
+        ... )
+        >>> clean = pipeline(mapping.spectra)
+        >>> str(pipeline)
+        'cosmic_rays > baseline(lam=1000000.0) > smooth'
+    """
+
+    def __init__(self, stages):
+        for name, _ in stages:
+            if name not in PREPROCESSING_STAGES:
+                raise ValueError(f'Unknown preprocessing stage: {name}')
+        self.stages = [(name, dict(params)) for name, params in stages]
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a pipeline from a list of stage names or {name: params} dicts.
+
+        Args:
+            config (list[str | dict[str, dict]]): e.g.
+                ['cosmic_rays', {'baseline': {'lam': 1e6}}, 'smooth'].
+
+        Returns:
+            PreprocessingPipeline: The pipeline of the configured stages.
+        """
+        stages = []
+        for stage in config:
+            if isinstance(stage, str):
+                stages.append((stage, {}))
+            else:
+                stages.extend((name, params or {}) for name, params in stage.items())
+        return cls(stages)
+
+    def __call__(self, spectra):
+        """Apply all stages to the spectra and return the float32 result."""
+        spectra = np.asarray(spectra, dtype=np.float32)
+        for name, params in self.stages:
+            spectra = PREPROCESSING_STAGES[name](spectra, **params)
+        return spectra
+
+    def __bool__(self):
+        return bool(self.stages)
+
+    def __str__(self):
+        return ' > '.join(
+            name
+            + (
+                '(' + ', '.join(f'{k}={v}' for k, v in params.items()) + ')'
+                if params
+                else ''
+            )
+            for name, params in self.stages
+        )
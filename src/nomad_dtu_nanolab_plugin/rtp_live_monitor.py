@@ -0,0 +1,557 @@
+"""Live monitoring of a running RTP anneal.
+
+`parse_rtp_logfiles` only works on finished recordings. `RTPLiveMonitor`
+tails the growing Eklipse CSV and CX-Thermo diagnostics files instead: every
+`update()` reads only the lines appended since the previous call, extends
+the merged process timeline with an online merge-asof, and advances a
+running step classification and overview (peak temperature, dwell time so
+far, gas usage) without reprocessing the history. `finish()` flushes the
+remaining samples and runs the regular step/overview analysis on the merged
+timeline, so the final result matches the offline parser.
+
+Typical use next to the furnace:
+
+    python -m nomad_dtu_nanolab_plugin.rtp_live_monitor \
+        'sample_RTP_Recording Set 2025.11.28-13.32.19.CSV' \
+        sample_RTP_LOGFILE20251128140851.txt --interval 5
+
+A timeline point is only merged once both logs have samples at or after it,
+because a later sample could still be its nearest neighbour. A log that
+falls more than LIVE_STREAM_STALL_S behind the other (e.g. the CX-Thermo
+logger was started late) is treated as stalled so the timeline keeps
+moving; samples it writes for already merged times are then only used for
+later points.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from nomad_dtu_nanolab_plugin import rtp_log_reader as reader
+
+# Lag (s) after which a log without new samples no longer holds back the
+# merged timeline.
+LIVE_STREAM_STALL_S = 60.0
+# Default polling interval (s) of the command line monitor.
+LIVE_POLL_INTERVAL_S = 5.0
+# TrendLog data rows start with a timestamp such as 2025/11/28_14:12:00.
+TRENDLOG_ROW_RE = re.compile(r'^\d{4}/\d{2}/\d{2}_\d{2}:\d{2}:\d{2}(?:\s|$)')
+# Gas labels of the merged flow channels, as used for `used_gases`.
+GAS_NAMES = dict(zip(reader.FLOW_COLUMNS, ('Ar', 'N2', 'PH3', 'NH3', 'H2S')))
+
+
+@dataclass
+class LiveRTPSegment:
+    # Slope class of the segment: Heating, Dwell or Cooling.
+    name: str
+    # Segment boundaries on the merged process timeline.
+    start_time_s: float
+    end_time_s: float
+
+    @property
+    def duration_s(self) -> float:
+        return self.end_time_s - self.start_time_s
+
+
+@dataclass
+class LiveRTPStatus:
+    # Number of merged timeline samples and the elapsed time of the last one.
+    num_samples: int = 0
+    elapsed_time_s: float | None = None
+    # Latest and highest real (non-virtual) process temperature.
+    current_temperature_k: float | None = None
+    peak_temperature_k: float | None = None
+    # Step classification so far; the last segment is still running.
+    segments: list[LiveRTPSegment] = field(default_factory=list)
+    # Total time spent in Dwell segments so far.
+    dwell_time_s: float = 0.0
+    # Gases that exceeded the parasitic flow cutoff, and their volume so far.
+    used_gases: list[str] = field(default_factory=list)
+    gas_volume_m3: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def current_step(self) -> LiveRTPSegment | None:
+        return self.segments[-1] if self.segments else None
+
+
+class _LogTail:
+    """Return the complete lines appended to a growing text file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = str(path)
+        self._offset = 0
+        self._partial = b''
+
+    def read_lines(self, final: bool = False) -> list[str]:
+        """Read new lines; a trailing line without newline waits unless final."""
+        try:
+            with open(self.path, 'rb') as handle:
+                if os.fstat(handle.fileno()).st_size < self._offset:
+                    # The file was replaced or truncated; start over. Repeated
+                    # header lines simply fail to parse as samples.
+                    self._offset = 0
+                    self._partial = b''
+                handle.seek(self._offset)
+                chunk = handle.read()
+        except FileNotFoundError:
+            chunk = b''
+        self._offset += len(chunk)
+
+        data = self._partial + chunk
+        lines = data.split(b'\n')
+        self._partial = lines.pop()
+        if final and self._partial:
+            lines.append(self._partial)
+            self._partial = b''
+        return [line.decode('utf-8', errors='ignore').rstrip() for line in lines]
+
+
+class _EklipseTail(_LogTail):
+    """Tail of the Eklipse recording-set CSV, yielding process channels."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._header: str | None = None
+        self._delimiter = ','
+
+    def read_channels(self, final: bool = False):
+        lines = self.read_lines(final)
+        if self._header is None:
+            for i, line in enumerate(lines):
+                if 'timestamp' in reader._normalize(line):
+                    self._header = line
+                    self._delimiter = reader._sniff_delimiter(line)
+                    lines = lines[i + 1 :]
+                    break
+            else:
+                return None
+
+        rows = [line for line in lines if line.strip()]
+        if not rows:
+            return None
+        table = reader._read_eklipse_table(
+            io.StringIO('\n'.join([self._header, *rows])), self._delimiter
+        )
+        return reader._eklipse_channels(table)
+
+
+class _CxThermoTail(_LogTail):
+    """Tail of one CX-Thermo diagnostics file, yielding temperature channels.
+
+    The metadata/header lines in front of the first sample are kept and put
+    in front of every new block of samples, so each block is parsed exactly
+    like a complete file (CSV table or TrendLog layout).
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._preamble: list[str] = []
+        self._in_table = False
+        self.key_values: dict[str, float] = {}
+
+    def _is_first_sample(self, line: str) -> bool:
+        if TRENDLOG_ROW_RE.match(line):
+            return True
+        # CSV layout: the line after the timestamp header holds data.
+        previous = self._preamble[-1] if self._preamble else ''
+        return 'timestamp' in reader._normalize(previous) and any(
+            d in previous for d in [',', ';', '\t']
+        )
+
+    def read_channels(self, final: bool = False):
+        lines = [line for line in self.read_lines(final) if line.strip()]
+        if not lines:
+            return None
+        # Later files/lines overwrite earlier keys, as for a whole-file read.
+        self.key_values.update(reader._extract_key_values('\n'.join(lines)))
+
+        samples: list[str] = []
+        for line in lines:
+            if not self._in_table and self._is_first_sample(line):
+                self._in_table = True
+            if self._in_table:
+                samples.append(line)
+            else:
+                self._preamble.append(line)
+        if not samples:
+            return None
+
+        table = reader._parse_cx_thermo_table('\n'.join(self._preamble + samples))
+        if table.empty:
+            return None
+        return reader._cx_thermo_channels(table)
+
+
+class _SlopeTracker:
+    """Online counterpart of the slope labelling in `_find_inflection_points`.
+
+    Every sample gets the label of the smoothed central-difference slope once
+    the smoothing window ahead of it is complete, so labels lag by
+    SLOPE_SMOOTH_WINDOW + 1 samples. Label flips only open a new segment
+    after lasting SLOPE_MIN_RUN_POINTS samples and SLOPE_MIN_RUN_DURATION_S,
+    like the debouncing of the offline parser. Only a short tail of samples
+    is kept in memory.
+    """
+
+    def __init__(self) -> None:
+        self.segments: list[LiveRTPSegment] = []
+        self._time = np.empty(0)
+        self._temp = np.empty(0)
+        # Absolute sample index of `_time[0]` and of the next unlabelled sample.
+        self._offset = 0
+        self._next = 0
+        self._candidate: str | None = None
+        self._candidate_start_s = 0.0
+        self._candidate_count = 0
+
+    def push(self, time_s: np.ndarray, temp_k: np.ndarray) -> None:
+        self._time = np.concatenate([self._time, time_s])
+        self._temp = np.concatenate([self._temp, temp_k])
+        half_window = reader.SLOPE_SMOOTH_WINDOW
+        total = self._offset + len(self._time)
+        # Sample i needs smoothed[i + 1], i.e. temperatures up to i + 1 + hw.
+        last = total - half_window - 2
+        first = max(self._next, 1)
+        if last < first:
+            return
+
+        # Moving average with the window shrinking at the recording start.
+        cumsum = np.concatenate([[0.0], np.cumsum(self._temp)])
+        centers = np.arange(first - 1, last + 2)
+        lo = np.maximum(centers - half_window, 0) - self._offset
+        hi = np.minimum(centers + half_window + 1, total) - self._offset
+        smoothed = (cumsum[hi] - cumsum[lo]) / (hi - lo)
+
+        idx = np.arange(first, last + 1) - self._offset
+        dt = self._time[idx + 1] - self._time[idx - 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            deriv = np.where(dt > 0, (smoothed[2:] - smoothed[:-2]) / dt, np.nan)
+        labels = [
+            reader._classify_slope(float(d)) if np.isfinite(d) else 'Dwell'
+            for d in deriv
+        ]
+        times = self._time[idx]
+        if self._next == 0:
+            # The first sample takes the slope of its neighbour.
+            labels.insert(0, labels[0])
+            times = np.concatenate([[self._time[0]], times])
+        for label, t in zip(labels, times):
+            self._add_label(label, float(t))
+
+        self._next = last + 1
+        # Keep what the smoothing window of the next sample still needs.
+        keep_from = max(self._next - 1 - half_window, 0)
+        self._time = self._time[keep_from - self._offset :]
+        self._temp = self._temp[keep_from - self._offset :]
+        self._offset = keep_from
+
+    def _add_label(self, label: str, t: float) -> None:
+        if not self.segments:
+            self.segments.append(LiveRTPSegment(label, t, t))
+            return
+        current = self.segments[-1]
+        if label == current.name:
+            self._candidate = None
+        elif label == self._candidate:
+            self._candidate_count += 1
+        else:
+            self._candidate = label
+            self._candidate_start_s = t
+            self._candidate_count = 1
+
+        if (
+            self._candidate is not None
+            and self._candidate_count >= reader.SLOPE_MIN_RUN_POINTS
+            and t - self._candidate_start_s >= reader.SLOPE_MIN_RUN_DURATION_S
+        ):
+            current.end_time_s = self._candidate_start_s
+            self.segments.append(LiveRTPSegment(label, self._candidate_start_s, t))
+            self._candidate = None
+        else:
+            current.end_time_s = t
+
+
+class RTPLiveMonitor:
+    """Incrementally parse the logs of an RTP process while it is running.
+
+    Call `update()` periodically; it returns the running `LiveRTPStatus`.
+    `finish()` returns the same `ParsedRTPData` as `parse_rtp_logfiles`.
+    CX-Thermo diagnostics files are expected in recording order.
+    """
+
+    def __init__(
+        self,
+        eklipse_csv_path: str,
+        cx_thermo_diagnostics_txt_paths: list[str],
+        logger=None,
+        stall_s: float = LIVE_STREAM_STALL_S,
+    ) -> None:
+        if not reader._ensure_deps():
+            raise RuntimeError('numpy/pandas not available')
+        self.logger = logger
+        self.stall = pd.Timedelta(seconds=stall_s)
+        self._eklipse = _EklipseTail(eklipse_csv_path)
+        self._cx_thermo = [
+            _CxThermoTail(path)
+            for path in dict.fromkeys(cx_thermo_diagnostics_txt_paths)
+        ]
+        # Unmerged samples (plus merge context) and time range per log.
+        self._buffers: dict[str, pd.DataFrame | None] = {'t': None, 'e': None}
+        self._first: dict[str, pd.Timestamp | None] = {'t': None, 'e': None}
+        self._last: dict[str, pd.Timestamp | None] = {'t': None, 'e': None}
+        # All timeline points before this timestamp have been merged.
+        self._merged_until: pd.Timestamp | None = None
+        self._start: pd.Timestamp | None = None
+        self._chunks: list[pd.DataFrame] = []
+        self._slopes = _SlopeTracker()
+        self._last_time_s: float | None = None
+        self._last_flows: dict[str, float] = {}
+        self.status = LiveRTPStatus()
+
+    @property
+    def process_df(self):
+        """Merged process timeline so far (same layout as the offline parser)."""
+        if not self._chunks:
+            return pd.DataFrame()
+        if len(self._chunks) > 1:
+            self._chunks = [pd.concat(self._chunks, ignore_index=True, sort=False)]
+        return self._chunks[0]
+
+    def update(self) -> LiveRTPStatus:
+        """Read appended log lines and advance timeline, steps and overview."""
+        self._read(final=False)
+        self._merge(final=False)
+        return self.status
+
+    def finish(self) -> reader.ParsedRTPData:
+        """Merge all remaining samples and run the full step/overview analysis."""
+        self._read(final=True)
+        self._merge(final=True)
+        process_df = self.process_df
+        if process_df.empty:
+            return reader._empty_result()
+
+        key_values: dict[str, float] = {}
+        for tail in self._cx_thermo:
+            for key, value in tail.key_values.items():
+                key_values.setdefault(key, value)
+        try:
+            return reader._analyze_process_df(
+                process_df.copy(), key_values, logger=self.logger
+            )
+        except Exception as e:
+            if self.logger is not None:
+                self.logger.warning(
+                    f'RTP live analysis encountered critical error: {e}. '
+                    'Returning empty result.'
+                )
+            return reader._empty_result()
+
+    def _read(self, final: bool) -> None:
+        self._ingest('e', self._eklipse.read_channels(final))
+        for tail in self._cx_thermo:
+            self._ingest('t', tail.read_channels(final))
+
+    def _ingest(self, stream: str, channels) -> None:
+        if channels is None or channels.empty or 'timestamp' not in channels:
+            return
+        channels = channels.assign(
+            timestamp=channels['timestamp'].astype('datetime64[ns]')
+        )
+        buffer = self._buffers[stream]
+        if buffer is not None:
+            channels = pd.concat([buffer, channels], ignore_index=True, sort=False)
+        channels = channels.sort_values('timestamp', kind='stable')
+        if stream == 't' and len(self._cx_thermo) > 1:
+            # Stacked diagnostics files may overlap; keep the first sample.
+            channels = channels.drop_duplicates(subset=['timestamp'], keep='first')
+        self._buffers[stream] = channels.reset_index(drop=True)
+
+        newest = channels['timestamp'].iloc[-1]
+        if self._first[stream] is None:
+            self._first[stream] = channels['timestamp'].iloc[0]
+        if self._last[stream] is None or newest > self._last[stream]:
+            self._last[stream] = newest
+
+    def _watermark(self) -> pd.Timestamp | None:
+        """Timeline points before this time can no longer change."""
+        present = {k: v for k, v in self._last.items() if v is not None}
+        if not present:
+            return None
+        newest = max(present.values())
+        active = [ts for ts in present.values() if newest - ts <= self.stall]
+        if len(active) == len(self._last):
+            return min(active)
+        if len(present) == 1:
+            # Wait for the other log unless it is overdue.
+            (stream,) = present
+            if newest - self._first[stream] <= self.stall:
+                return None
+        # A log that is missing or stalled can still deliver samples near
+        # the current time once it resumes, so keep one merge tolerance open.
+        return min(active) - pd.Timedelta(seconds=reader.PROCESS_MERGE_TOLERANCE_S)
+
+    def _merge(self, final: bool) -> None:
+        watermark = None if final else self._watermark()
+        if not final and watermark is None:
+            return
+        t, e = self._buffers['t'], self._buffers['e']
+        stamps = pd.concat(
+            [buf['timestamp'] for buf in (t, e) if buf is not None], ignore_index=True
+        )
+        if stamps.empty:
+            return
+        if self._merged_until is not None:
+            stamps = stamps[stamps >= self._merged_until]
+        if watermark is not None:
+            stamps = stamps[stamps < watermark]
+        if stamps.empty:
+            return
+        timeline = pd.DataFrame(
+            {'timestamp': stamps.drop_duplicates().sort_values(ignore_index=True)}
+        )
+
+        process = reader._merge_onto_timeline(
+            timeline, *(buf for buf in (t, e) if buf is not None)
+        )
+        if t is None or e is None:
+            if t is None:
+                process['temperature_k'] = np.nan
+            else:
+                # Same placeholders as the offline temperature-only fallback.
+                process['pressure_raw'] = np.nan
+                for col in reader.FLOW_COLUMNS:
+                    process[col] = 0.0
+
+        if self._start is None:
+            self._start = process['timestamp'].iloc[0]
+        process['time_s'] = (process['timestamp'] - self._start).dt.total_seconds()
+        process = process[np.isfinite(process['time_s'])].copy()
+        self._chunks.append(process)
+
+        last_merged = timeline['timestamp'].iloc[-1]
+        self._merged_until = watermark if watermark is not None else last_merged
+        # Samples further than the merge tolerance before the next timeline
+        # point can no longer be anyone's nearest neighbour.
+        horizon = self._merged_until - pd.Timedelta(
+            seconds=reader.PROCESS_MERGE_TOLERANCE_S
+        )
+        for stream, buf in self._buffers.items():
+            if buf is not None:
+                self._buffers[stream] = buf[buf['timestamp'] >= horizon].reset_index(
+                    drop=True
+                )
+        self._advance(process)
+
+    def _advance(self, chunk) -> None:
+        """Update the running overview with newly merged timeline rows."""
+        status = self.status
+        time_s = chunk['time_s'].to_numpy(dtype=float)
+        if len(time_s) == 0:
+            return
+        status.num_samples += len(time_s)
+        status.elapsed_time_s = float(time_s[-1])
+
+        # Gas usage: left Riemann sum from the previous merged sample.
+        previous_time = (
+            self._last_time_s if self._last_time_s is not None else time_s[0]
+        )
+        dt = np.diff(time_s, prepend=previous_time)
+        for col, gas in GAS_NAMES.items():
+            if col not in chunk:
+                continue
+            flow = np.nan_to_num(chunk[col].to_numpy(dtype=float))
+            flow_before = np.concatenate([[self._last_flows.get(col, 0.0)], flow[:-1]])
+            volume = float(np.sum(flow_before * dt))
+            status.gas_volume_m3[gas] = status.gas_volume_m3.get(gas, 0.0) + volume
+            self._last_flows[col] = float(flow[-1])
+            if gas not in status.used_gases and np.any(
+                flow > reader.MIN_USED_GAS_FLOW_M3_S
+            ):
+                status.used_gases.append(gas)
+        self._last_time_s = float(time_s[-1])
+
+        if 'temperature_k' not in chunk:
+            return
+        temp = chunk['temperature_k'].to_numpy(dtype=float)
+        virtual = reader._identify_virtual_temperature_samples(chunk)
+        valid = np.isfinite(temp) & np.isfinite(time_s)
+        if virtual is not None:
+            valid &= ~virtual
+        if not np.any(valid):
+            return
+        status.current_temperature_k = float(temp[valid][-1])
+        peak = float(np.max(temp[valid]))
+        if status.peak_temperature_k is None or peak > status.peak_temperature_k:
+            status.peak_temperature_k = peak
+
+        self._slopes.push(time_s[valid], temp[valid])
+        status.segments = self._slopes.segments
+        status.dwell_time_s = sum(
+            seg.duration_s for seg in status.segments if seg.name == 'Dwell'
+        )
+
+
+def _format_status(status: LiveRTPStatus) -> str:
+    def _num(value: float | None, fmt: str) -> str:
+        return format(value, fmt) if value is not None else '-'
+
+    step = status.current_step
+    step_text = f'{step.name} ({step.duration_s:.0f} s)' if step else '-'
+    return (
+        f'{_num(status.elapsed_time_s, ".0f")} s  {step_text}  '
+        f'T={_num(status.current_temperature_k, ".1f")} K  '
+        f'peak={_num(status.peak_temperature_k, ".1f")} K  '
+        f'dwell={status.dwell_time_s:.0f} s  '
+        f'gases={",".join(status.used_gases) or "-"}'
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m nomad_dtu_nanolab_plugin.rtp_live_monitor',
+        description=(
+            'Follow the Eklipse and CX-Thermo logs of a running RTP process and '
+            'print the current step and overview. Stop with Ctrl+C to print the '
+            'final step list.'
+        ),
+    )
+    parser.add_argument('eklipse_csv', help='growing Eklipse recording-set CSV')
+    parser.add_argument('diagnostics', nargs='+', help='CX-Thermo diagnostics file(s)')
+    parser.add_argument(
+        '--interval',
+        type=float,
+        default=LIVE_POLL_INTERVAL_S,
+        help='seconds between updates',
+    )
+    parser.add_argument('--stall', type=float, default=LIVE_STREAM_STALL_S)
+    args = parser.parse_args(argv)
+
+    monitor = RTPLiveMonitor(args.eklipse_csv, args.diagnostics, stall_s=args.stall)
+    try:
+        while True:
+            print(_format_status(monitor.update()), flush=True)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+    result = monitor.finish()
+    for step in result.steps:
+        print(
+            f'{step.name:<14} {step.duration_s:8.0f} s  '
+            f'{step.initial_temperature_k:7.1f} K -> {step.final_temperature_k:7.1f} K'
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -48,6 +48,65 @@ RATE_OF_RISE_MAX_THROTTLE_POSITION = 100.0
 RATE_OF_RISE_MIN_STATIC_SAMPLES = 10
 RATE_OF_RISE_MIN_VALID_POINTS = 2
 NUMBER_2 = 2
+# Maximum distance (s) between a timeline point and the CX-Thermo/Eklipse
+# sample merged onto it.
+PROCESS_MERGE_TOLERANCE_S = 8.0
+# Merged process channels holding the measured and set gas flows (m^3/s).
+FLOW_COLUMNS = (
+    'ar_flow_m3_s',
+    'n2_flow_m3_s',
+    'ph3_in_ar_flow_m3_s',
+    'nh3_in_ar_flow_m3_s',
+    'h2s_in_ar_flow_m3_s',
+)
+FLOW_SETPOINT_COLUMNS = (
+    'ar_flow_setpoint_m3_s',
+    'n2_flow_setpoint_m3_s',
+    'ph3_in_ar_flow_setpoint_m3_s',
+    'nh3_in_ar_flow_setpoint_m3_s',
+    'h2s_in_ar_flow_setpoint_m3_s',
+)
+# Storage type of the merged process channels, float64 so that the values
+# written to the archive are the logged ones.
+PROCESS_CHANNEL_DTYPE = 'float64'
+
+# ---------------------------------------------------------------------------
+# Eklipse recording-set columns (normalized-name regexes) used by the parser.
+# Add more options if different logfiles are used in the future. Only these
+# columns are read from the CSV.
+# ---------------------------------------------------------------------------
+EKLIPSE_TIME_PATTERNS = [r'timestamp', r'^time$']
+EKLIPSE_PRESSURE_PATTERNS = [r'capmanpressure$']
+# Measured and set mass-flow controller channels (sccm in the log).
+EKLIPSE_FLOW_PATTERNS = {
+    'ar_flow_m3_s': [r'mfc1flow$'],
+    'n2_flow_m3_s': [r'mfc2flow$'],
+    'ph3_in_ar_flow_m3_s': [r'mfc4flow$'],
+    'nh3_in_ar_flow_m3_s': [r'mfc5flow$'],
+    'h2s_in_ar_flow_m3_s': [r'mfc6flow$'],
+    'ar_flow_setpoint_m3_s': [r'mfc1setpoint$'],
+    'n2_flow_setpoint_m3_s': [r'mfc2setpoint$'],
+    'ph3_in_ar_flow_setpoint_m3_s': [r'mfc4setpoint$'],
+    'nh3_in_ar_flow_setpoint_m3_s': [r'mfc5setpoint$'],
+    'h2s_in_ar_flow_setpoint_m3_s': [r'mfc6setpoint$'],
+}
+EKLIPSE_VALVE_PATTERNS = {
+    'ballast': [r'ballastvalve$'],
+    'vent_line': [r'ventvalve$'],
+    'throttle_closed': [r'throttlevalveclosed$'],
+    'throttle_open': [r'throttlevalveopened$'],
+    'throttle_position': [r'throttlevalveposition$'],
+}
+EKLIPSE_COLUMN_RE = re.compile(
+    '|'.join(
+        [
+            *EKLIPSE_TIME_PATTERNS,
+            *EKLIPSE_PRESSURE_PATTERNS,
+            *(p for pats in EKLIPSE_FLOW_PATTERNS.values() for p in pats),
+            *(p for pats in EKLIPSE_VALVE_PATTERNS.values() for p in pats),
+        ]
+    )
+)
 
 # ---------------------------------------------------------------------------
 # Step segmentation thresholds.
@@ -221,6 +280,38 @@ def _extract_trendlog_column_names(lines: list[str]) -> list[str]:
     return known_columns
 
 
+def _sniff_delimiter(header_line: str) -> str:
+    """Infer the delimiter of a CSV header because exports can vary."""
+    try:
+        return csv.Sniffer().sniff(header_line, delimiters=',;\t').delimiter
+    except Exception:
+        if header_line.count(';') > header_line.count(','):
+            return ';'
+    return ','
+
+
+def _is_eklipse_channel_column(name) -> bool:
+    return EKLIPSE_COLUMN_RE.search(_normalize(name)) is not None
+
+
+def _read_eklipse_table(source, delimiter: str, skiprows: int = 0):
+    """Read the Eklipse recording-set table starting at its header row.
+
+    Only the columns used by `_eklipse_channels` are parsed; gas labels and
+    unused MFC/gauge channels are skipped by the C reader.
+    """
+    return pd.read_csv(
+        source,
+        sep=delimiter,
+        engine='c',
+        skipinitialspace=True,
+        on_bad_lines='skip',
+        quotechar='"',
+        skiprows=skiprows,
+        usecols=_is_eklipse_channel_column,
+    )
+
+
 def _read_csv_with_fallback(path: str):
     """Read Eklipse CSV with its fixed recording-set layout."""
     if not _ensure_deps() or pd is None:
@@ -247,26 +338,10 @@ def _read_csv_with_fallback(path: str):
                         header_line = line
                         break
 
-        # Infer delimiter from the header because exports can vary.
-        delimiter = ','
-        if header_line:
-            try:
-                sniff = csv.Sniffer().sniff(header_line, delimiters=',;\t')
-                delimiter = sniff.delimiter
-            except Exception:
-                if header_line.count(';') > header_line.count(','):
-                    delimiter = ';'
+        delimiter = _sniff_delimiter(header_line) if header_line else ','
 
         # Read starting from the detected header row.
-        return pd.read_csv(
-            path,
-            sep=delimiter,
-            engine='python',
-            skipinitialspace=True,
-            on_bad_lines='skip',
-            quotechar='"',
-            skiprows=header_idx,
-        )
+        return _read_eklipse_table(path, delimiter, skiprows=header_idx)
     except Exception:
         # Return an empty dataframe instead of failing hard; caller decides how
         # to recover.
@@ -321,19 +396,6 @@ def _apply_parasitic_flow_cutoff(flow_m3_s: float, gas: str) -> float:
     return float(flow_m3_s)
 
 
-def _mean_or_zero(df, col: str) -> float:
-    """Return nanmean of a column or 0.0 if no valid data."""
-    if col not in df.columns:
-        return 0.0
-
-    arr = _to_num(df[col]).to_numpy(dtype=float)
-
-    if len(arr) == 0 or not np.any(np.isfinite(arr)):
-        return 0.0
-
-    return float(np.nanmean(arr))
-
-
 def _temperature_to_kelvin(series):
     """Convert Celsius channels to Kelvin."""
     values = _to_num(series)
@@ -397,14 +459,7 @@ def _parse_cx_thermo_table(txt: str):
             break
 
     if header_idx is not None:
-        header_line = lines[header_idx]
-        delimiter = ','
-        try:
-            sniff = csv.Sniffer().sniff(header_line, delimiters=',;\t')
-            delimiter = sniff.delimiter
-        except Exception:
-            if header_line.count(';') > header_line.count(','):
-                delimiter = ';'
+        delimiter = _sniff_delimiter(lines[header_idx])
 
         csv_block = '\n'.join(lines[header_idx:])
         try:
@@ -571,17 +626,17 @@ def _mark_disregarded_samples(
     return True
 
 
-def _build_process_df(eklipse_df, cx_thermo_df):
-    """Merge Eklipse and CX-Thermo streams onto one shared process timeline."""
-    if pd is None:
-        raise RuntimeError('pandas not loaded')
+def _eklipse_channels(eklipse_df):
+    """Map raw Eklipse columns to timestamped pressure/flow/valve channels.
 
+    Rows without a parseable timestamp are dropped and the result is sorted
+    by time, ready to be merged onto the process timeline. Channel values
+    are stored as PROCESS_CHANNEL_DTYPE.
+    """
     # `e` holds Eklipse-derived channels (flows, pressure, valves).
-    # `t` holds CX-Thermo-derived channels (temperature, setpoint, lamp power).
     e = pd.DataFrame()
-    t = pd.DataFrame()
 
-    e_time = _find_col(eklipse_df, [r'timestamp', r'^time$', r'timestamp'])
+    e_time = _find_col(eklipse_df, EKLIPSE_TIME_PATTERNS)
     if e_time is not None:
         e['timestamp'] = _to_datetime(eklipse_df[e_time])
     else:
@@ -589,83 +644,55 @@ def _build_process_df(eklipse_df, cx_thermo_df):
             'Eklipse timestamp column not found; Eklipse data cannot be time-aligned.'
         )
 
-    p_col = _find_col(
-        eklipse_df,
-        [r'capmanpressure$'],  # add more options if different logfiles in the future
-    )
+    p_col = _find_col(eklipse_df, EKLIPSE_PRESSURE_PATTERNS)
     if p_col is not None:
-        e['pressure_raw'] = _to_num(eklipse_df[p_col])
+        e['pressure_raw'] = _to_num(eklipse_df[p_col]).astype(PROCESS_CHANNEL_DTYPE)
     else:
         e['pressure_raw'] = np.nan
 
-    # Map measured mass-flow controller channels into SI units.
-    flow_map = {  # add more options if different logfiles in the future
-        'ar_flow_m3_s': [r'mfc1flow$'],
-        'n2_flow_m3_s': [r'mfc2flow$'],
-        'ph3_in_ar_flow_m3_s': [r'mfc4flow$'],
-        'nh3_in_ar_flow_m3_s': [r'mfc5flow$'],
-        'h2s_in_ar_flow_m3_s': [r'mfc6flow$'],
-    }
-    for out_col, patterns in flow_map.items():
+    # Map measured and set mass-flow controller channels into SI units. The
+    # setpoints are used later to determine when gas setpoints are dropped
+    # during cooling.
+    for out_col, patterns in EKLIPSE_FLOW_PATTERNS.items():
         c = _find_col(eklipse_df, patterns)
         if c is None:
             e[out_col] = 0.0
         else:
-            e[out_col] = _to_num(eklipse_df[c]).fillna(0) * SCCM_TO_M3_S
-
-    # Setpoint channels are kept separately because they are used later to
-    # determine when gas setpoints are dropped during cooling.
-    flow_setpoint_map = {  # add more options if different logfiles in the future
-        'ar_flow_setpoint_m3_s': [r'mfc1setpoint$'],
-        'n2_flow_setpoint_m3_s': [r'mfc2setpoint$'],
-        'ph3_in_ar_flow_setpoint_m3_s': [r'mfc4setpoint$'],
-        'nh3_in_ar_flow_setpoint_m3_s': [r'mfc5setpoint$'],
-        'h2s_in_ar_flow_setpoint_m3_s': [r'mfc6setpoint$'],
-    }
-    for out_col, patterns in flow_setpoint_map.items():
+            flow = _to_num(eklipse_df[c]).fillna(0) * SCCM_TO_M3_S
+            e[out_col] = flow.astype(PROCESS_CHANNEL_DTYPE)
+
+    # Diagnostic columns used for base pressure and rate-of-rise:
+    # ballast/vent/throttle closed/opened are binary (1 = closed resp. open),
+    # the throttle position is continuous (0 = fully closed, 100 = fully open).
+    for out_col, patterns in EKLIPSE_VALVE_PATTERNS.items():
         c = _find_col(eklipse_df, patterns)
         if c is None:
-            e[out_col] = 0.0
-        else:
-            e[out_col] = _to_num(eklipse_df[c]).fillna(0) * SCCM_TO_M3_S
+            continue
+        values = _to_num(eklipse_df[c])
+        if out_col != 'throttle_position':
+            values = values.fillna(0)
+        e[out_col] = values.astype(PROCESS_CHANNEL_DTYPE)
 
-    # Diagnostic columns used for base pressure and rate-of-rise.
-    ballast_col = _find_col(
-        eklipse_df,
-        [r'ballastvalve$'],
-    )
-    if ballast_col is not None:
-        e['ballast'] = _to_num(eklipse_df[ballast_col]).fillna(0)
+    # Remove rows with invalid timestamps before any alignment/merge.
+    if 'timestamp' in e:
+        e = e.dropna(subset=['timestamp']).sort_values('timestamp')
+        if e.empty:
+            logger.warning(
+                'Eklipse timestamps could not be parsed; Eklipse dataframe'
+                ' is empty after filtering.',
+                stacklevel=2,
+            )
+    return e
 
-    vent_col = _find_col(
-        eklipse_df,
-        [r'ventvalve$'],
-    )
-    if vent_col is not None:
-        e['vent_line'] = _to_num(eklipse_df[vent_col]).fillna(0)
 
-    throttle_closed_col = _find_col(
-        eklipse_df,
-        [r'throttlevalveclosed$'],
-    )
-    throttle_open_col = _find_col(
-        eklipse_df,
-        [r'throttlevalveopened$'],
-    )
-    throttle_pos_col = _find_col(
-        eklipse_df,
-        [r'throttlevalveposition$'],
-    )
+def _cx_thermo_channels(cx_thermo_df):
+    """Map raw CX-Thermo columns to timestamped temperature/lamp channels.
 
-    if throttle_closed_col is not None:
-        # Binary encoding: 1 means throttle closed, 0 means open.
-        e['throttle_closed'] = _to_num(eklipse_df[throttle_closed_col]).fillna(0)
-    if throttle_open_col is not None:
-        # Binary encoding: 1 means throttle open, 0 means not open.
-        e['throttle_open'] = _to_num(eklipse_df[throttle_open_col]).fillna(0)
-    if throttle_pos_col is not None:
-        # Continuous position value: 0 = fully closed, 100 = fully open.
-        e['throttle_position'] = _to_num(eklipse_df[throttle_pos_col])
+    Rows without a parseable timestamp are dropped and the result is sorted
+    by time, ready to be merged onto the process timeline.
+    """
+    # `t` holds CX-Thermo-derived channels (temperature, setpoint, lamp power).
+    t = pd.DataFrame()
 
     # add more options if different logfiles in the future
     t_time = _find_col(cx_thermo_df, [r'timestamp'])
@@ -682,21 +709,19 @@ def _build_process_df(eklipse_df, cx_thermo_df):
         )
     if t_temp is not None:
         # Diagnostics temperatures are logged in Celsius and converted to Kelvin.
-        t['temperature_k'] = _temperature_to_kelvin(cx_thermo_df[t_temp])
+        t['temperature_k'] = _temperature_to_kelvin(cx_thermo_df[t_temp]).astype(
+            PROCESS_CHANNEL_DTYPE
+        )
     if t_setpoint is not None:
-        t['temperature_setpoint_k'] = _temperature_to_kelvin(cx_thermo_df[t_setpoint])
+        t['temperature_setpoint_k'] = _temperature_to_kelvin(
+            cx_thermo_df[t_setpoint]
+        ).astype(PROCESS_CHANNEL_DTYPE)
     if t_lamp_power is not None:
-        t['lamp_power'] = _to_num(cx_thermo_df[t_lamp_power])
+        t['lamp_power'] = _to_num(cx_thermo_df[t_lamp_power]).astype(
+            PROCESS_CHANNEL_DTYPE
+        )
 
     # Remove rows with invalid timestamps before any alignment/merge.
-    if 'timestamp' in e:
-        e = e.dropna(subset=['timestamp']).sort_values('timestamp')
-        if e.empty:
-            logger.warning(
-                'Eklipse timestamps could not be parsed; Eklipse dataframe'
-                ' is empty after filtering.',
-                stacklevel=2,
-            )
     if 'timestamp' in t:
         t = t.dropna(subset=['timestamp']).sort_values('timestamp')
         if t.empty:
@@ -705,65 +730,116 @@ def _build_process_df(eklipse_df, cx_thermo_df):
                 ' is empty after filtering.',
                 stacklevel=2,
             )
+    return t
+
+
+def _channel_mean(values) -> float:
+    """Nanmean of a channel, accumulated in float64 whatever the storage dtype."""
+    return float(np.nanmean(values, dtype=np.float64))
+
+
+def _timestamps_ns(series) -> np.ndarray:
+    """Return datetimes as int64 nanoseconds since the epoch."""
+    return series.to_numpy(dtype='datetime64[ns]').view('int64')
+
+
+def _nearest_sample_index(
+    timeline_ns: np.ndarray, sample_ns: np.ndarray, tolerance_ns: int
+) -> np.ndarray:
+    """Index of the nearest sorted sample for every timeline point, or -1.
+
+    One searchsorted pass finds the last sample at or before each point; the
+    next sample is the candidate after it. Ties and duplicated timestamps
+    resolve to the earlier (last) sample, like `pd.merge_asof` with
+    direction='nearest'.
+    """
+    n = len(sample_ns)
+    if n == 0:
+        return np.full(len(timeline_ns), -1, dtype=np.int64)
+    before = np.searchsorted(sample_ns, timeline_ns, side='right') - 1
+    after = before + 1
+    far = np.iinfo(np.int64).max
+    dist_before = np.where(
+        before >= 0, timeline_ns - sample_ns[np.maximum(before, 0)], far
+    )
+    dist_after = np.where(
+        after < n, sample_ns[np.minimum(after, n - 1)] - timeline_ns, far
+    )
+    nearest = np.where(dist_after < dist_before, after, before)
+    nearest[np.minimum(dist_before, dist_after) > tolerance_ns] = -1
+    return nearest
+
+
+def _merge_onto_timeline(timeline, *streams):
+    """Attach the nearest sample of each stream (CX-Thermo, Eklipse) to the
+    timeline points.
+
+    Samples further than PROCESS_MERGE_TOLERANCE_S away leave NaN channels.
+    Timestamps are compared as int64 nanoseconds and channel columns are
+    gathered with one index array per stream instead of merging dataframes.
+    """
+    timeline_ns = _timestamps_ns(timeline['timestamp'])
+    tolerance_ns = int(PROCESS_MERGE_TOLERANCE_S * 1e9)
+    columns = {'timestamp': timeline['timestamp'].to_numpy()}
+    for stream in streams:
+        nearest = _nearest_sample_index(
+            timeline_ns, _timestamps_ns(stream['timestamp']), tolerance_ns
+        )
+        missing = nearest < 0
+        take = np.where(missing, 0, nearest)
+        for col in stream.columns:
+            if col == 'timestamp':
+                continue
+            values = stream[col].to_numpy()
+            if len(values) == 0:
+                values = np.full(len(take), np.nan, dtype=PROCESS_CHANNEL_DTYPE)
+                columns[col] = values
+                continue
+            dtype = np.result_type(values.dtype, PROCESS_CHANNEL_DTYPE)
+            values = values[take].astype(dtype)
+            values[missing] = np.nan
+            columns[col] = values
+    return pd.DataFrame(columns)
+
+
+def _build_process_df(eklipse_df, cx_thermo_df):
+    """Merge Eklipse and CX-Thermo streams onto one shared process timeline."""
+    if pd is None:
+        raise RuntimeError('pandas not loaded')
+
+    e = _eklipse_channels(eklipse_df)
+    t = _cx_thermo_channels(cx_thermo_df)
 
     # Build a union timeline so plots can cover the full range of both logs.
     if not t.empty and not e.empty:
-        # Step 1: stacking all timestamps from CX-Thermo and Eklipse into one series
-        # and removing duplicates, NaN and sorting them.
-        timeline = pd.DataFrame(
-            {
-                'timestamp': pd.concat([t['timestamp'], e['timestamp']])
-                .dropna()
-                .drop_duplicates()
-                .sort_values()
-                .reset_index(drop=True)
-            }
-        )
-        # Step 2: For each timestamp in timeline, pandas picks the closest CX-Thermo row
-        # (before or after) within 8 seconds and copies CX-Thermo columns into process.
-        process = pd.merge_asof(
-            timeline,
-            t,
-            on='timestamp',
-            direction='nearest',
-            tolerance=pd.Timedelta(seconds=8),
-        )
-        # Step 3: Same idea again, now matching each row to the closest Eklipse
-        # sample within 8 seconds and adding pressure/flow/valve columns.
-        process = pd.merge_asof(
-            process,
-            e,
-            on='timestamp',
-            direction='nearest',
-            tolerance=pd.Timedelta(seconds=8),
+        # Step 1: all CX-Thermo and Eklipse timestamps, sorted and without
+        # duplicates.
+        timeline_ns = np.union1d(
+            _timestamps_ns(t['timestamp']), _timestamps_ns(e['timestamp'])
         )
+        timeline = pd.DataFrame({'timestamp': timeline_ns.view('datetime64[ns]')})
+        # Step 2: attach the nearest CX-Thermo and Eklipse samples (within
+        # 8 seconds) to every timeline point.
+        process = _merge_onto_timeline(timeline, t, e)
     elif not t.empty:
         # Temperature-only fallback: keep diagnostics timeline and add empty
         # placeholders for gas/pressure channels.
-        process = t.copy()
+        process = t.reset_index(drop=True)
         process['pressure_raw'] = np.nan
-        process['ar_flow_m3_s'] = 0.0
-        process['n2_flow_m3_s'] = 0.0
-        process['ph3_in_ar_flow_m3_s'] = 0.0
-        process['nh3_in_ar_flow_m3_s'] = 0.0
-        process['h2s_in_ar_flow_m3_s'] = 0.0
+        for col in FLOW_COLUMNS:
+            process[col] = 0.0
     elif not e.empty:
         # Pressure/flow-only fallback: keep Eklipse timeline and add empty
         # temperature values.
-        process = e.copy()
+        process = e.reset_index(drop=True)
         process['temperature_k'] = np.nan
     else:
         return pd.DataFrame()
 
-    process = process.dropna(subset=['timestamp']).sort_values('timestamp')
-    if process.empty:
-        return process
-
     # Express time as elapsed seconds since the start of the merged process.
-    process['time_s'] = (
-        process['timestamp'] - process['timestamp'].iloc[0]
-    ).dt.total_seconds()
-    process = process[np.isfinite(process['time_s'])].copy()
+    # Both streams were filtered to valid timestamps and sorted above.
+    process_ns = _timestamps_ns(process['timestamp'])
+    process['time_s'] = (process_ns - process_ns[0]) / 1e9
     return process
 
 
@@ -773,7 +849,7 @@ def _extract_timeseries(process_df) -> dict[str, list[float]]:
         logger.warning('Process dataframe is empty, no timeseries data available')
         return {}
 
-    df = process_df.copy()
+    df = process_df
     out: dict[str, list[float]] = {
         'time_s': [],
         'temperature_k': [],
@@ -793,213 +869,194 @@ def _extract_timeseries(process_df) -> dict[str, list[float]]:
         )
         return out
 
+    def _values(col: str) -> np.ndarray:
+        # Channels are stored compactly; export them as float64 values.
+        return _to_num(df[col]).to_numpy(dtype=float)
+
     # Always export time, even if some channels are missing.
-    out['time_s'] = [float(v) for v in _to_num(df['time_s']).fillna(0).to_list()]
+    time_s = _values('time_s')
+    out['time_s'] = np.where(np.isnan(time_s), 0.0, time_s).tolist()
 
     if 'temperature_k' in df:
-        out['temperature_k'] = [
-            float(v) for v in _to_num(df['temperature_k']).to_list()
-        ]
+        out['temperature_k'] = _values('temperature_k').tolist()
     else:
         logger.warning('Temperature data missing from process logs')
 
     if 'temperature_setpoint_k' in df:
-        out['temperature_setpoint_k'] = [
-            float(v) for v in _to_num(df['temperature_setpoint_k']).to_list()
-        ]
+        out['temperature_setpoint_k'] = _values('temperature_setpoint_k').tolist()
 
     if 'lamp_power' in df:
-        out['lamp_power'] = [float(v) for v in _to_num(df['lamp_power']).to_list()]
+        out['lamp_power'] = _values('lamp_power').tolist()
 
     if 'pressure_raw' in df:
-        pa_series = _to_num(df['pressure_raw']).apply(_pressure_to_pa)
-        pressure_pa = [
-            float(v) if v is not None and np.isfinite(v) else float('nan')
-            for v in pa_series.to_list()
-        ]
+        pressure_pa = _values('pressure_raw') * TORR_TO_PA
+        finite = np.isfinite(pressure_pa)
         # Leave pressure empty if we never got a finite pressure sample.
-        if any(np.isfinite(v) for v in pressure_pa):
-            out['pressure_pa'] = pressure_pa
+        if np.any(finite):
+            out['pressure_pa'] = np.where(finite, pressure_pa, np.nan).tolist()
 
     # Export each flow channel separately so plotting/schema code can consume
     # only the channels it needs.
-    flow_cols = {
-        'ar_flow_m3_s': 'ar_flow_m3_s',
-        'n2_flow_m3_s': 'n2_flow_m3_s',
-        'ph3_in_ar_flow_m3_s': 'ph3_in_ar_flow_m3_s',
-        'nh3_in_ar_flow_m3_s': 'nh3_in_ar_flow_m3_s',
-        'h2s_in_ar_flow_m3_s': 'h2s_in_ar_flow_m3_s',
-    }
-    for out_col, src_col in flow_cols.items():
-        if src_col in df:
-            out[out_col] = [
-                float(v) if np.isfinite(v) else float('nan')
-                for v in _to_num(df[src_col]).to_list()
-            ]
+    for col in FLOW_COLUMNS:
+        if col in df:
+            flow = _values(col)
+            out[col] = np.where(np.isfinite(flow), flow, np.nan).tolist()
 
     return out
 
 
-def _find_gas_shutoff_time(step_df) -> float | None:
-    """
-    Find the time at which gases shut off during a step.
+class _ProcessChannels:
+    """NumPy view of the process channels with shared derived masks.
 
-    Returns the timestamp (in seconds) when the first gas turns off after at
-    least one gas was active, or None if gases remain active throughout the
-    step or never activate. Uses the same threshold (MIN_USED_GAS_FLOW_M3_S)
-    as the plot construction logic.
+    Every channel used by the step windows and the vacuum diagnostics is
+    converted to a float array once, and the gas/setpoint/valve masks are
+    derived in a single pass. Transition points (gas shutoff, setpoint drop,
+    vent activation) are then found on index ranges with `np.flatnonzero`
+    edge detection instead of re-scanning dataframe slices for every step.
+    Row subsets (e.g. without disregarded samples) index the existing arrays
+    and masks rather than recomputing them.
     """
-    if (
-        step_df.empty
-        or 'time_s' not in step_df.columns
-        or not all(
-            col in step_df.columns
-            for col in [
-                'ar_flow_m3_s',
-                'n2_flow_m3_s',
-                'ph3_in_ar_flow_m3_s',
-                'nh3_in_ar_flow_m3_s',
-                'h2s_in_ar_flow_m3_s',
-            ]
-        )
-    ):
-        return None
-
-    time_arr = step_df['time_s'].to_numpy()
-    ar_arr = step_df['ar_flow_m3_s'].to_numpy()
-    n2_arr = step_df['n2_flow_m3_s'].to_numpy()
-    ph3_arr = step_df['ph3_in_ar_flow_m3_s'].to_numpy()
-    nh3_arr = step_df['nh3_in_ar_flow_m3_s'].to_numpy()
-    h2s_arr = step_df['h2s_in_ar_flow_m3_s'].to_numpy()
-
-    if len(time_arr) != len(ar_arr):
-        return None
 
-    try:
-        had_gas_on = False
-        for t, ar_f, n2_f, ph3_f, nh3_f, h2s_f in zip(
-            time_arr, ar_arr, n2_arr, ph3_arr, nh3_arr, h2s_arr
-        ):
-            flows = [ar_f, n2_f, ph3_f, nh3_f, h2s_f]
-            # Check if any gas flow is above the threshold.
-            gas_on = any(
-                np.isfinite(flow) and abs(float(flow)) > MIN_USED_GAS_FLOW_M3_S
-                for flow in flows
+    def __init__(self, columns: dict[str, np.ndarray]) -> None:
+        self.columns = columns
+        self.masks: dict[str, np.ndarray] = {}
+
+        flows = [columns.get(col) for col in FLOW_COLUMNS]
+        if all(flow is not None for flow in flows):
+            abs_flows = np.abs(np.column_stack(flows))
+            # NaN compares False, so missing samples count as "off" and
+            # never as "static".
+            self.masks['gas_on'] = np.any(abs_flows > MIN_USED_GAS_FLOW_M3_S, axis=1)
+            self.masks['gas_static'] = np.all(
+                abs_flows < MIN_USED_GAS_FLOW_M3_S, axis=1
             )
-            if gas_on:
-                had_gas_on = True
-            elif had_gas_on:
-                # First point where all gases turn off after being on.
-                return float(t)
-        # Gases never shut off (remain active until step end).
-        return None
-    except Exception as e:
-        logger.warning(f'Error detecting gas shutoff time: {e}')
-        return None
-
 
-def _find_cooling_vent_activation_time(step_df) -> float | None:
-    """Find vent activation time during cooling.
+        setpoints = [columns.get(col) for col in FLOW_SETPOINT_COLUMNS]
+        if all(setpoint is not None for setpoint in setpoints):
+            # Per-gas ON state, shape (num_samples, num_gases).
+            self.masks['setpoint_on'] = (
+                np.column_stack(setpoints) > MIN_USED_GAS_FLOW_M3_S
+            )
 
-    Returns the first timestamp where vent line is active (1) and throttle
-    is closed (1).
-    Returns None if required signals are unavailable or no such point exists
-    in the provided step slice.
-    """
-    required = ['time_s', 'vent_line', 'throttle_closed']
-    if step_df.empty or any(col not in step_df.columns for col in required):
-        return None
+        vent = columns.get('vent_line')
+        throttle_closed = columns.get('throttle_closed')
+        if vent is not None and throttle_closed is not None:
+            self.masks['vent_with_throttle_closed'] = (vent == 1) & (
+                throttle_closed == 1
+            )
 
-    try:
-        time_arr = _to_num(step_df['time_s']).to_numpy(dtype=float)
-        vent_arr = _to_num(step_df['vent_line']).to_numpy(dtype=float)
-        throttle_closed_arr = _to_num(step_df['throttle_closed']).to_numpy(dtype=float)
-        mask = (
-            np.isfinite(time_arr)
-            & np.isfinite(vent_arr)
-            & np.isfinite(throttle_closed_arr)
-            & (vent_arr == 1)
-            & (throttle_closed_arr == 1)
+    @classmethod
+    def from_frame(cls, df) -> _ProcessChannels:
+        """Convert the known process columns of `df` to float arrays."""
+        names = (
+            'time_s',
+            'temperature_k',
+            'pressure_raw',
+            'ballast',
+            'vent_line',
+            'throttle_closed',
+            'throttle_open',
+            'throttle_position',
+            *FLOW_COLUMNS,
+            *FLOW_SETPOINT_COLUMNS,
         )
-        idx = np.where(mask)[0]
-        if len(idx) == 0:
-            return None
-        return float(time_arr[int(idx[0])])
-    except Exception as e:
-        logger.warning(f'Error detecting cooling vent activation time: {e}')
-        return None
+        columns = {
+            name: _to_num(df[name]).to_numpy(dtype=float)
+            for name in names
+            if name in df.columns
+        }
+        return cls(columns)
 
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
 
-def _find_setpoint_pre_drop_time(step_df, min_flow_threshold=1e-6) -> float | None:
-    """Return the timestamp just before the first gas that was ON turns OFF.
+    def has(self, *names: str) -> bool:
+        return all(name in self.columns for name in names)
 
-    A gas is considered ON if its setpoint is finite and above `MIN_USED_GAS_FLOW_M3_S`.
-    A gas is considered OFF if its setpoint is zero or <= threshold.
+    def subset(self, selector) -> _ProcessChannels:
+        """Return the channels for a boolean row mask or slice."""
+        sub = _ProcessChannels.__new__(_ProcessChannels)
+        sub.columns = {name: arr[selector] for name, arr in self.columns.items()}
+        sub.masks = {name: arr[selector] for name, arr in self.masks.items()}
+        return sub
 
-    Returns None if:
-      - required columns missing
-      - no gas ever turns ON
-      - no ON→OFF transition occurs
-    """
-    _ = min_flow_threshold  # Kept for signature compatibility/readability.
-    required = [
-        'time_s',
-        'ar_flow_setpoint_m3_s',
-        'n2_flow_setpoint_m3_s',
-        'ph3_in_ar_flow_setpoint_m3_s',
-        'nh3_in_ar_flow_setpoint_m3_s',
-        'h2s_in_ar_flow_setpoint_m3_s',
-    ]
-    if step_df.empty or any(col not in step_df.columns for col in required):
-        return None
+    def _time_at(self, idx: int) -> float:
+        return float(self.columns['time_s'][idx])
 
-    try:
-        time_arr = _to_num(step_df['time_s']).to_numpy(dtype=float)
-
-        gas_cols = [
-            'ar_flow_setpoint_m3_s',
-            'n2_flow_setpoint_m3_s',
-            'ph3_in_ar_flow_setpoint_m3_s',
-            'nh3_in_ar_flow_setpoint_m3_s',
-            'h2s_in_ar_flow_setpoint_m3_s',
-        ]
-
-        gas_arrays = [_to_num(step_df[col]).to_numpy(dtype=float) for col in gas_cols]
-
-        # Determine ON/OFF state for each gas at each sample.
-        gas_on = np.array(
-            [
-                [np.isfinite(v) and v > MIN_USED_GAS_FLOW_M3_S for v in gas_values]
-                for gas_values in zip(*gas_arrays)
-            ]
-        )  # shape: (num_samples, num_gases)
-
-        # If no gas is ever ON, nothing to detect.
-        if not np.any(gas_on):
+    def gas_shutoff_time(self, start: int = 0, end: int | None = None) -> float | None:
+        """Time of the first all-gases-off sample after any gas was on."""
+        if 'gas_on' not in self.masks or 'time_s' not in self.columns:
             return None
+        gas_on = self.masks['gas_on'][start:end]
+        on_idx = np.flatnonzero(gas_on)
+        if len(on_idx) == 0:
+            return None
+        off_idx = np.flatnonzero(~gas_on[on_idx[0] :])
+        if len(off_idx) == 0:
+            # Gases never shut off (remain active until the range end).
+            return None
+        return self._time_at(start + int(on_idx[0] + off_idx[0]))
+
+    def vent_activation_time(
+        self, start: int = 0, end: int | None = None
+    ) -> float | None:
+        """Time of the first sample with vent open and throttle closed."""
+        if 'vent_with_throttle_closed' not in self.masks or 'time_s' not in (
+            self.columns
+        ):
+            return None
+        mask = self.masks['vent_with_throttle_closed'][start:end] & np.isfinite(
+            self.columns['time_s'][start:end]
+        )
+        idx = np.flatnonzero(mask)
+        if len(idx) == 0:
+            return None
+        return self._time_at(start + int(idx[0]))
 
-        # Track previous state to detect transitions.
-        prev_state = gas_on[0]
-
-        for i in range(1, len(gas_on)):
-            current_state = gas_on[i]
-
-            # A transition occurs if any gas was ON and is now OFF.
-            turned_off = prev_state & ~current_state
-
-            if np.any(turned_off):
-                # Return timestamp of the previous sample.
-                if np.isfinite(time_arr[i - 1]):
-                    return float(time_arr[i - 1])
-                return None
-
-            prev_state = current_state
-
-        return None
-
-    except Exception as e:
-        logger.warning(f'Error detecting setpoint pre-drop time: {e}')
-        return None
+    def setpoint_pre_drop_time(
+        self, start: int = 0, end: int | None = None
+    ) -> float | None:
+        """Time of the sample just before the first gas setpoint ON→OFF edge."""
+        if 'setpoint_on' not in self.masks or 'time_s' not in self.columns:
+            return None
+        setpoint_on = self.masks['setpoint_on'][start:end]
+        if not np.any(setpoint_on):
+            return None
+        turned_off = np.any(setpoint_on[:-1] & ~setpoint_on[1:], axis=1)
+        drop_idx = np.flatnonzero(turned_off)
+        if len(drop_idx) == 0:
+            return None
+        time_before_drop = self._time_at(start + int(drop_idx[0]))
+        return time_before_drop if np.isfinite(time_before_drop) else None
+
+    def last_gas_shutoff_index(self) -> int | None:
+        """Index of the sample after the last gas ON→OFF edge, if any."""
+        gas_on = self.masks['gas_on']
+        edges = np.flatnonzero(gas_on[:-1] & ~gas_on[1:])
+        if len(edges) == 0:
+            return None
+        return int(edges[-1]) + 1
+
+    def window_count(self, start: int, end: int, cutoff_time: float | None) -> int:
+        """Number of leading samples in [start, end) with time <= cutoff.
+
+        Falls back to the full range when no cutoff is given or no sample
+        lies before it, matching the step averaging-window rules.
+        """
+        if cutoff_time is None:
+            return end - start
+        count = int(np.count_nonzero(self.columns['time_s'][start:end] <= cutoff_time))
+        return count if count > 0 else end - start
+
+    def mean_or_zero(self, name: str, start: int, end: int) -> float:
+        """Return the float64 nanmean of a channel range or 0.0 if no valid data."""
+        arr = self.columns.get(name)
+        if arr is None:
+            return 0.0
+        window = arr[start:end]
+        if len(window) == 0 or not np.any(np.isfinite(window)):
+            return 0.0
+        return _channel_mean(window)
 
 
 # ---------------------------------------------------------------------------
@@ -1254,7 +1311,9 @@ def _find_inflection_points(
     return boundaries
 
 
-def _extract_steps(process_df) -> list[ParsedRTPStep]:
+def _extract_steps(
+    process_df, channels: _ProcessChannels | None = None
+) -> list[ParsedRTPStep]:
     """Split the run into named RTP steps: Heating, Dwell, and Cooling.
 
     The algorithm:
@@ -1270,24 +1329,28 @@ def _extract_steps(process_df) -> list[ParsedRTPStep]:
        (e.g. "Heating", "2nd Heating", "3rd Heating").
 
     The word "Dwell" is used throughout instead of "Annealing" or "Plateau".
+
+    `channels` may hold the precomputed arrays of `process_df`; otherwise
+    they are built here.
     """
     if process_df.empty:
         logger.warning('Cannot extract steps: process dataframe is empty')
         return []
 
     # Filter out 1450°C samples (marked as disregarded) for step extraction.
-    df_for_steps = process_df
+    keep = np.ones(len(process_df), dtype=bool)
     if 'is_disregarded' in process_df.columns:
-        df_for_steps = process_df[~process_df['is_disregarded']].reset_index(drop=True)
-        if df_for_steps.empty:
+        keep = ~process_df['is_disregarded'].to_numpy(dtype=bool)
+        if not np.any(keep):
             logger.warning(
                 'All temperature samples are marked as disregarded (1450°C artifacts). '
                 'Cannot extract steps.'
             )
             return []
 
-    if df_for_steps['temperature_k'].notna().sum() < MIN_POINTS_FOR_STEPS:
-        num_valid = df_for_steps['temperature_k'].notna().sum()
+    keep &= process_df['temperature_k'].notna().to_numpy()
+    num_valid = int(np.count_nonzero(keep))
+    if num_valid < MIN_POINTS_FOR_STEPS:
         logger.warning(
             f'Cannot extract steps: insufficient temperature data points '
             f'({num_valid} < {MIN_POINTS_FOR_STEPS}). '
@@ -1295,8 +1358,10 @@ def _extract_steps(process_df) -> list[ParsedRTPStep]:
         )
         return []
 
-    # Work only on rows that have both temperature and time available.
-    df = df_for_steps.dropna(subset=['temperature_k', 'time_s']).copy()
+    # Work only on rows that have both temperature and time available; this
+    # is the only row copy of the process dataframe made here.
+    keep &= process_df['time_s'].notna().to_numpy()
+    df = process_df[keep].reset_index(drop=True)
     if len(df) < MIN_POINTS_FOR_STEPS:
         logger.warning(
             f'Insufficient temperature data after dropna: {len(df)} points < '
@@ -1304,6 +1369,12 @@ def _extract_steps(process_df) -> list[ParsedRTPStep]:
         )
         return []
 
+    # Channel arrays aligned with `df`, used for all per-step windows below.
+    if channels is not None:
+        step_channels = channels.subset(keep)
+    else:
+        step_channels = _ProcessChannels.from_frame(df)
+
     temp = df['temperature_k'].to_numpy(dtype=float)
     time_s = df['time_s'].to_numpy(dtype=float)
 
@@ -1482,36 +1553,42 @@ def _extract_steps(process_df) -> list[ParsedRTPStep]:
         base_label = final_base_labels[seg_idx]
         is_cooling = base_label == 'Cooling'
 
-        # Find gas shutoff time for the averaging window.
-        shutoff_time = _find_gas_shutoff_time(sl)
-        pressure_average_window_df = (
-            sl[sl['time_s'] <= shutoff_time] if shutoff_time is not None else sl
+        # Find gas shutoff time for the averaging window. Windows are the
+        # leading samples of the step up to a cutoff time, expressed as
+        # [start, start + count) ranges on the shared channel arrays.
+        shutoff_time = step_channels.gas_shutoff_time(start, end)
+        pressure_window_end = start + step_channels.window_count(
+            start, end, shutoff_time
         )
-        flow_average_window_df = pressure_average_window_df
+        flow_window_end = pressure_window_end
 
         # For cooling: use setpoint drop for flows, vent for pressure.
         if is_cooling:
-            setpoint_pre_drop_time = _find_setpoint_pre_drop_time(sl)
-            vent_activation_time = _find_cooling_vent_activation_time(sl)
+            setpoint_pre_drop_time = step_channels.setpoint_pre_drop_time(start, end)
+            vent_activation_time = step_channels.vent_activation_time(start, end)
 
             flow_cutoff = setpoint_pre_drop_time
             pressure_cutoff = setpoint_pre_drop_time or vent_activation_time
 
             if flow_cutoff is not None:
-                candidate = sl[sl['time_s'] <= flow_cutoff]
-                flow_average_window_df = candidate if not candidate.empty else sl
+                flow_window_end = start + step_channels.window_count(
+                    start, end, flow_cutoff
+                )
 
             if pressure_cutoff is not None:
-                candidate = sl[sl['time_s'] <= pressure_cutoff]
-                pressure_average_window_df = candidate if not candidate.empty else sl
+                pressure_window_end = start + step_channels.window_count(
+                    start, end, pressure_cutoff
+                )
 
         start_time = float(sl['time_s'].iloc[0])
         initial_temperature = initial_temp
         adjusted_duration = float(sl['time_s'].iloc[-1] - start_time)
 
         pressure_pa: float | None = None
-        if 'pressure_raw' in sl.columns:
-            raw_mean = float(np.nanmean(pressure_average_window_df['pressure_raw']))
+        if step_channels.has('pressure_raw'):
+            raw_mean = _channel_mean(
+                step_channels.columns['pressure_raw'][start:pressure_window_end]
+            )
             pressure_pa = _pressure_to_pa(raw_mean)
 
         step = ParsedRTPStep(
@@ -1524,21 +1601,30 @@ def _extract_steps(process_df) -> list[ParsedRTPStep]:
             final_temperature_k=final_temp,
             pressure_pa=pressure_pa,
             ar_flow_m3_s=_apply_parasitic_flow_cutoff(
-                _mean_or_zero(flow_average_window_df, 'ar_flow_m3_s'), 'Ar'
+                step_channels.mean_or_zero('ar_flow_m3_s', start, flow_window_end), 'Ar'
             ),
             n2_flow_m3_s=_apply_parasitic_flow_cutoff(
-                _mean_or_zero(flow_average_window_df, 'n2_flow_m3_s'), 'N2'
+                step_channels.mean_or_zero('n2_flow_m3_s', start, flow_window_end), 'N2'
             ),
             ph3_in_ar_flow_m3_s=_apply_parasitic_flow_cutoff(
-                _mean_or_zero(flow_average_window_df, 'ph3_in_ar_flow_m3_s'), 'PH3'
+                step_channels.mean_or_zero(
+                    'ph3_in_ar_flow_m3_s', start, flow_window_end
+                ),
+                'PH3',
             ),
             nh3_in_ar_flow_m3_s=_apply_parasitic_flow_cutoff(
-                _mean_or_zero(flow_average_window_df, 'nh3_in_ar_flow_m3_s'), 'NH3'
+                step_channels.mean_or_zero(
+                    'nh3_in_ar_flow_m3_s', start, flow_window_end
+                ),
+                'NH3',
             ),
             h2s_in_ar_flow_m3_s=_apply_parasitic_flow_cutoff(
-                _mean_or_zero(flow_average_window_df, 'h2s_in_ar_flow_m3_s'), 'H2S'
+                step_channels.mean_or_zero(
+                    'h2s_in_ar_flow_m3_s', start, flow_window_end
+                ),
+                'H2S',
             ),
-            mean_temperature_k=float(np.nanmean(sl['temperature_k'])),
+            mean_temperature_k=_channel_mean(sl['temperature_k']),
         )
         steps.append(step)
 
@@ -1557,13 +1643,13 @@ def _extract_steps(process_df) -> list[ParsedRTPStep]:
     logger.warning(
         'No distinct Heating/Cooling steps identified. Using single Dwell step.'
     )
-    shutoff_time = _find_gas_shutoff_time(df)
+    shutoff_time = step_channels.gas_shutoff_time()
     df_for_average = (
         df[df['time_s'] <= shutoff_time] if shutoff_time is not None else df
     )
     pressure_pa = None
     if 'pressure_raw' in df.columns:
-        pressure_pa = _pressure_to_pa(float(np.nanmean(df_for_average['pressure_raw'])))
+        pressure_pa = _pressure_to_pa(_channel_mean(df_for_average['pressure_raw']))
     return [
         ParsedRTPStep(
             # Use a neutral fallback name rather than Annealing so later logic
@@ -1576,36 +1662,36 @@ def _extract_steps(process_df) -> list[ParsedRTPStep]:
             final_temperature_k=float(df['temperature_k'].iloc[-1]),
             pressure_pa=pressure_pa,
             ar_flow_m3_s=_apply_parasitic_flow_cutoff(
-                float(np.nanmean(df_for_average['ar_flow_m3_s']))
+                _channel_mean(df_for_average['ar_flow_m3_s'])
                 if 'ar_flow_m3_s' in df_for_average.columns
                 else 0.0,
                 'Ar',
             ),
             n2_flow_m3_s=_apply_parasitic_flow_cutoff(
-                float(np.nanmean(df_for_average['n2_flow_m3_s']))
+                _channel_mean(df_for_average['n2_flow_m3_s'])
                 if 'n2_flow_m3_s' in df_for_average.columns
                 else 0.0,
                 'N2',
             ),
             ph3_in_ar_flow_m3_s=_apply_parasitic_flow_cutoff(
-                float(np.nanmean(df_for_average['ph3_in_ar_flow_m3_s']))
+                _channel_mean(df_for_average['ph3_in_ar_flow_m3_s'])
                 if 'ph3_in_ar_flow_m3_s' in df_for_average.columns
                 else 0.0,
                 'PH3',
             ),
             nh3_in_ar_flow_m3_s=_apply_parasitic_flow_cutoff(
-                float(np.nanmean(df_for_average['nh3_in_ar_flow_m3_s']))
+                _channel_mean(df_for_average['nh3_in_ar_flow_m3_s'])
                 if 'nh3_in_ar_flow_m3_s' in df_for_average.columns
                 else 0.0,
                 'NH3',
             ),
             h2s_in_ar_flow_m3_s=_apply_parasitic_flow_cutoff(
-                float(np.nanmean(df_for_average['h2s_in_ar_flow_m3_s']))
+                _channel_mean(df_for_average['h2s_in_ar_flow_m3_s'])
                 if 'h2s_in_ar_flow_m3_s' in df_for_average.columns
                 else 0.0,
                 'H2S',
             ),
-            mean_temperature_k=float(np.nanmean(df['temperature_k'])),
+            mean_temperature_k=_channel_mean(df['temperature_k']),
         )
     ]
 
@@ -1731,7 +1817,9 @@ def _derive_total_heating_cooling_times(
 
 
 def _derive_end_of_process_temperature(
-    process_df, steps: list[ParsedRTPStep]
+    process_df,
+    steps: list[ParsedRTPStep],
+    channels: _ProcessChannels | None = None,
 ) -> float | None:
     """
     End-of-process temperature = temperature at the LAST gas shutoff event
@@ -1766,32 +1854,19 @@ def _derive_end_of_process_temperature(
         valid = False
 
     if valid:
-        df = process_df.copy()
-
-        temp_arr = _to_num(df['temperature_k']).to_numpy(dtype=float)
+        if channels is None:
+            channels = _ProcessChannels.from_frame(process_df)
 
-        # Stack all gas channels sample-wise so "any gas on?" can be evaluated
-        # across the full process timeline.
-        flow_stack = np.column_stack(
-            [
-                np.abs(_to_num(df[col]).fillna(0).to_numpy(dtype=float))
-                for col in required_cols[2:]
-            ]
-        )
-
-        gas_on = np.any(flow_stack > MIN_USED_GAS_FLOW_M3_S, axis=1)
+        temp_arr = channels.columns['temperature_k']
 
-        if not np.any(gas_on):
+        # "Any gas on?" per sample, evaluated across the full process timeline.
+        if not np.any(channels.masks['gas_on']):
             logger.warning(
                 'No gas activity detected; cannot determine end-of-process temperature'
             )
         else:
-            shutoff_idx = None
-
             # Find LAST ON -> OFF transition.
-            for i in range(1, len(gas_on)):
-                if gas_on[i - 1] and not gas_on[i]:
-                    shutoff_idx = i
+            shutoff_idx = channels.last_gas_shutoff_index()
 
             if shutoff_idx is None:
                 logger.warning('Gases never shut off (remain active until end of run)')
@@ -1821,7 +1896,7 @@ def _compute_rate_of_rise(time_s_arr, pressure_pa_arr, start_mask):
     We use the first and last rows that satisfy start_mask and return:
     (P(last) - P(first)) / (t(last) - t(first)).
     """
-    start_idx = np.where(start_mask)[0]
+    start_idx = np.flatnonzero(start_mask)
     if len(start_idx) < RATE_OF_RISE_MIN_VALID_POINTS:
         return None
 
@@ -1848,7 +1923,12 @@ def _compute_rate_of_rise(time_s_arr, pressure_pa_arr, start_mask):
     return (p_last - p_first) / window_s
 
 
-def _derive_general_values(process_df, key_values: dict[str, float], logger=None):
+def _derive_general_values(
+    process_df,
+    key_values: dict[str, float],
+    logger=None,
+    channels: _ProcessChannels | None = None,
+):
     """Derive base pressure, ballast pressure and rate of rise."""
     _ = key_values  # Reserved for future metadata-derived values.
 
@@ -1864,20 +1944,26 @@ def _derive_general_values(process_df, key_values: dict[str, float], logger=None
     has_throttle_column = False
     has_ballast_column = False
 
+    if channels is None:
+        channels = _ProcessChannels.from_frame(process_df)
     # Filter out disregarded samples (1450°C artifacts) for rate-of-rise calculation.
-    working_df = process_df.copy()
-    if 'is_disregarded' in working_df.columns:
-        working_df = working_df[~working_df['is_disregarded']].reset_index(drop=True)
+    working = channels
+    if 'is_disregarded' in process_df.columns:
+        working = channels.subset(~process_df['is_disregarded'].to_numpy(dtype=bool))
+    columns = working.columns
 
-    if not working_df.empty and working_df['pressure_raw'].notna().sum() > 0:
-        pressure_pa = _to_num(working_df['pressure_raw']).apply(_pressure_to_pa)
-        p_arr = pressure_pa.values.astype(float)
-        has_ballast_column = 'ballast' in working_df.columns
+    if (
+        len(working) > 0
+        and working.has('pressure_raw')
+        and np.any(np.isfinite(columns['pressure_raw']))
+    ):
+        # Torr -> Pa; missing samples stay NaN.
+        p_arr = columns['pressure_raw'] * TORR_TO_PA
+        has_ballast_column = working.has('ballast')
 
         if has_ballast_column:
             # Use the Eklipse ballast on/off signal to split pre/post ballast pressure.
-            ballast = _to_num(working_df['ballast']).fillna(0).values
-            on_positions = np.where(ballast == 1)[0]
+            on_positions = np.flatnonzero(columns['ballast'] == 1)
             if len(on_positions) > 0:
                 first_on = int(on_positions[0])
                 pre_valid = p_arr[:first_on][np.isfinite(p_arr[:first_on])]
@@ -1894,22 +1980,19 @@ def _derive_general_values(process_df, key_values: dict[str, float], logger=None
                 # Ballast-pressure window: from ballast activation until vent reopens.
                 post_start = first_on
                 post_end = len(p_arr)
-                if 'vent_line' in working_df.columns:
-                    vent = (
-                        _to_num(working_df['vent_line']).fillna(0).values.astype(float)
+                if working.has('vent_line'):
+                    vent_positions = np.flatnonzero(
+                        columns['vent_line'][first_on + 1 :] == 1
                     )
-                    vent_positions = np.where(
-                        (np.arange(len(vent)) > first_on) & (vent == 1)
-                    )[0]
                     if len(vent_positions) > 0:
-                        post_end = int(vent_positions[0])
+                        post_end = first_on + 1 + int(vent_positions[0])
 
                 post_slice = p_arr[post_start:post_end]
                 post_valid = post_slice[np.isfinite(post_slice)]
                 if len(post_valid) > 0:
                     # Ballast base pressure is summarized by the mean during
                     # the ballast-on / pre-vent window.
-                    base_pressure_ballast = float(np.nanmean(post_valid))
+                    base_pressure_ballast = _channel_mean(post_valid)
                 else:
                     logger.warning(
                         'No valid pressure data in ballast window '
@@ -1945,23 +2028,14 @@ def _derive_general_values(process_df, key_values: dict[str, float], logger=None
         # flows below cutoff, ballast off, and pressure below 11 mTorr.
         # Keep only runs that stay valid for at least RATE_OF_RISE_MIN_STATIC_SAMPLES.
         # Throttle valve open=0 is mandatory.
-        has_vent_column = 'vent_line' in working_df.columns
-        has_throttle_closed = 'throttle_closed' in working_df.columns
-        has_throttle_open = 'throttle_open' in working_df.columns
-        has_throttle_pos = 'throttle_position' in working_df.columns
-        has_gas_flow_columns = all(
-            col in working_df.columns
-            for col in [
-                'ar_flow_m3_s',
-                'n2_flow_m3_s',
-                'ph3_in_ar_flow_m3_s',
-                'nh3_in_ar_flow_m3_s',
-                'h2s_in_ar_flow_m3_s',
-            ]
-        )
+        has_vent_column = working.has('vent_line')
+        has_throttle_closed = working.has('throttle_closed')
+        has_throttle_open = working.has('throttle_open')
+        has_throttle_pos = working.has('throttle_position')
+        has_gas_flow_columns = working.has(*FLOW_COLUMNS)
         has_throttle_column = has_throttle_closed
         if (
-            'time_s' in working_df.columns
+            working.has('time_s')
             and has_vent_column
             and has_throttle_column
             and has_throttle_open
@@ -1969,38 +2043,19 @@ def _derive_general_values(process_df, key_values: dict[str, float], logger=None
             and has_ballast_column
             and has_gas_flow_columns
         ):
-            time_arr = _to_num(working_df['time_s']).values.astype(float)
-            vent = _to_num(working_df['vent_line']).values.astype(float)
-            throt_closed = _to_num(working_df['throttle_closed']).values.astype(float)
-            throt_open = _to_num(working_df['throttle_open']).values.astype(float)
-            throt_pos = _to_num(working_df['throttle_position']).values.astype(float)
-            ballast = _to_num(working_df['ballast']).values.astype(float)
-            ar_flow = _to_num(working_df['ar_flow_m3_s']).values.astype(float)
-            n2_flow = _to_num(working_df['n2_flow_m3_s']).values.astype(float)
-            ph3_flow = _to_num(working_df['ph3_in_ar_flow_m3_s']).values.astype(float)
-            nh3_flow = _to_num(working_df['nh3_in_ar_flow_m3_s']).values.astype(float)
-            h2s_flow = _to_num(working_df['h2s_in_ar_flow_m3_s']).values.astype(float)
-            gas_static = (
-                np.isfinite(ar_flow)
-                & np.isfinite(n2_flow)
-                & np.isfinite(ph3_flow)
-                & np.isfinite(nh3_flow)
-                & np.isfinite(h2s_flow)
-                & (np.abs(ar_flow) < MIN_USED_GAS_FLOW_M3_S)
-                & (np.abs(n2_flow) < MIN_USED_GAS_FLOW_M3_S)
-                & (np.abs(ph3_flow) < MIN_USED_GAS_FLOW_M3_S)
-                & (np.abs(nh3_flow) < MIN_USED_GAS_FLOW_M3_S)
-                & (np.abs(h2s_flow) < MIN_USED_GAS_FLOW_M3_S)
-            )
+            time_arr = columns['time_s']
+            throt_pos = columns['throttle_position']
+            # Shared "all flows finite and below cutoff" mask of the channels.
+            gas_static = working.masks['gas_static']
 
             static_vacuum_mask = (
                 np.isfinite(time_arr)
                 & np.isfinite(p_arr)
-                & (vent == 0)
-                & (throt_closed == 1)
-                & (throt_open == 0)
+                & (columns['vent_line'] == 0)
+                & (columns['throttle_closed'] == 1)
+                & (columns['throttle_open'] == 0)
                 & gas_static
-                & (ballast == 0)
+                & (columns['ballast'] == 0)
             )
             throttle_motion_mask = (
                 np.isfinite(throt_pos)
@@ -2013,11 +2068,11 @@ def _derive_general_values(process_df, key_values: dict[str, float], logger=None
             # Build valid static-vacuum runs first, then prefer one that contains
             # a settled zero-position sample after an in-motion throttle segment.
             start_mask = np.zeros_like(static_vacuum_mask, dtype=bool)
-            static_idx = np.where(static_vacuum_mask)[0]
+            static_idx = np.flatnonzero(static_vacuum_mask)
             valid_runs: list[np.ndarray] = []
             if len(static_idx) > 0:
                 # Split the static-vacuum mask into contiguous runs.
-                run_edges = np.where(np.diff(static_idx) > 1)[0]
+                run_edges = np.flatnonzero(np.diff(static_idx) > 1)
                 run_starts = np.concatenate(([0], run_edges + 1))
                 run_ends = np.concatenate((run_edges, [len(static_idx) - 1]))
                 for rs, re in zip(run_starts, run_ends):
@@ -2032,7 +2087,7 @@ def _derive_general_values(process_df, key_values: dict[str, float], logger=None
             for run in valid_runs:
                 # Prefer a run that contains a zero-position sample below 15 mTorr
                 # after the throttle has already been in motion within that run.
-                run_motion_positions = np.where(throttle_motion_mask[run])[0]
+                run_motion_positions = np.flatnonzero(throttle_motion_mask[run])
                 if len(run_motion_positions) == 0:
                     continue
 
@@ -2071,7 +2126,7 @@ def _derive_general_values(process_df, key_values: dict[str, float], logger=None
                         'was present in that run.'
                     )
 
-            start_idx = np.where(start_mask)[0]
+            start_idx = np.flatnonzero(start_mask)
             rate_of_rise = _compute_rate_of_rise(time_arr, p_arr, start_mask)
             if rate_of_rise is not None and len(start_idx) > 0:
                 # Log the final matched window explicitly for debugging.
@@ -2212,6 +2267,75 @@ def _detect_used_gases(
     return used_gases
 
 
+def _analyze_process_df(process_df, key_values: dict[str, float], logger=None):
+    """Derive steps, overview and vacuum diagnostics from a merged process log.
+
+    Shared by `parse_rtp_logfiles` and the live monitor, which builds the same
+    merged dataframe incrementally.
+    """
+    # Pre-identify 1450°C samples and mark them to exclude from step extraction.
+    if 'is_disregarded' not in process_df.columns:
+        process_df['is_disregarded'] = False
+    _mark_disregarded_samples(process_df, logger=logger)
+
+    # Convert the process channels and their gas/valve masks once; the step
+    # extraction and the vacuum diagnostics below share them.
+    channels = _ProcessChannels.from_frame(process_df)
+    steps = _extract_steps(process_df, channels)
+    has_detected_annealing = _main_annealing_step_index(steps) is not None
+
+    # Start from an empty overview.
+    overview = _empty_result().overview
+
+    # These values are independent of annealing detection.
+    total_heating_time, total_cooling_time = _derive_total_heating_cooling_times(steps)
+    overview['total_heating_time'] = total_heating_time
+    overview['total_cooling_time'] = total_cooling_time
+    overview['end_of_process_temperature'] = _derive_end_of_process_temperature(
+        process_df, steps, channels
+    )
+
+    # Populate annealing-specific overview values only if annealing exists.
+    if has_detected_annealing:
+        anneal_overview = _derive_overview(steps)
+        for key, value in anneal_overview.items():
+            if key not in {
+                'total_heating_time',
+                'total_cooling_time',
+                'end_of_process_temperature',
+            }:
+                overview[key] = value
+
+    elif logger is not None:
+        logger.warning(
+            'No annealing step detected; RTP overview will not be auto-populated '
+            'except for end of process temperature, number of dwells'
+            ' and material space. Feel free to manually populate'
+            ' the overview fields.'
+        )
+
+    base_pressure, base_pressure_ballast, rate_of_rise = _derive_general_values(
+        process_df, key_values, logger=logger, channels=channels
+    )
+    used_gases = _detect_used_gases(steps, overview)
+    timeseries = _extract_timeseries(process_df)
+
+    if not steps and logger is not None:
+        logger.warning('No process steps extracted from log files')
+
+    return ParsedRTPData(
+        used_gases=used_gases,
+        base_pressure_pa=base_pressure,
+        base_pressure_ballast_pa=base_pressure_ballast,
+        rate_of_rise_pa_s=rate_of_rise,
+        chiller_flow_m3_s=None,
+        overview=overview,
+        steps=steps,
+        timeseries=timeseries,
+        has_detected_annealing=has_detected_annealing,
+    )
+
+
 def parse_rtp_logfiles(
     eklipse_csv_path: str,
     cx_thermo_diagnostics_txt_paths: list[str] | None = None,
@@ -2276,67 +2400,7 @@ def parse_rtp_logfiles(
                 )
 
         process_df = _build_process_df(eklipse_df, cx_thermo_df)
-
-        # Pre-identify 1450°C samples and mark them to exclude from step extraction.
-        if 'is_disregarded' not in process_df.columns:
-            process_df['is_disregarded'] = False
-        _mark_disregarded_samples(process_df, logger=logger)
-
-        steps = _extract_steps(process_df)
-        has_detected_annealing = _main_annealing_step_index(steps) is not None
-
-        # Start from an empty overview.
-        overview = _empty_result().overview
-
-        # These values are independent of annealing detection.
-        total_heating_time, total_cooling_time = _derive_total_heating_cooling_times(
-            steps
-        )
-        overview['total_heating_time'] = total_heating_time
-        overview['total_cooling_time'] = total_cooling_time
-        overview['end_of_process_temperature'] = _derive_end_of_process_temperature(
-            process_df, steps
-        )
-
-        # Populate annealing-specific overview values only if annealing exists.
-        if has_detected_annealing:
-            anneal_overview = _derive_overview(steps)
-            for key, value in anneal_overview.items():
-                if key not in {
-                    'total_heating_time',
-                    'total_cooling_time',
-                    'end_of_process_temperature',
-                }:
-                    overview[key] = value
-
-        elif logger is not None:
-            logger.warning(
-                'No annealing step detected; RTP overview will not be auto-populated '
-                'except for end of process temperature, number of dwells'
-                ' and material space. Feel free to manually populate'
-                ' the overview fields.'
-            )
-
-        base_pressure, base_pressure_ballast, rate_of_rise = _derive_general_values(
-            process_df, key_values, logger=logger
-        )
-        used_gases = _detect_used_gases(steps, overview)
-        timeseries = _extract_timeseries(process_df)
-
-        if not steps and logger is not None:
-            logger.warning('No process steps extracted from log files')
-
-        return ParsedRTPData(
-            used_gases=used_gases,
-            base_pressure_pa=base_pressure,
-            base_pressure_ballast_pa=base_pressure_ballast,
-            rate_of_rise_pa_s=rate_of_rise,
-            chiller_flow_m3_s=None,
-            overview=overview,
-            steps=steps,
-            timeseries=timeseries,
-            has_detected_annealing=has_detected_annealing,
-        )
+        return _analyze_process_df(process_df, key_values, logger=logger)
     except Exception as e:
         # Never let parser edge cases crash NOMAD normalization.
         if logger is not None:
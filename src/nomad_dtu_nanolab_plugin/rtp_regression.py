@@ -0,0 +1,376 @@
+"""Batch regression harness for the RTP log reader.
+
+Runs `parse_rtp_logfiles` over a folder of Eklipse/CX-Thermo recordings in
+parallel worker processes, compares the extracted step lists, overview and
+general vacuum values against a stored golden baseline, and reports the
+parse time per recording.
+
+Typical use while tuning the segmentation thresholds:
+
+    # Record the current behaviour once.
+    python -m nomad_dtu_nanolab_plugin.rtp_regression recordings/ --update-golden
+
+    # Re-run with a modified threshold and list every changed value.
+    python -m nomad_dtu_nanolab_plugin.rtp_regression recordings/ \
+        --set DWELL_SLOPE_THRESHOLD_K_S=0.03
+
+    # Also report the peak memory allocated while parsing each recording.
+    python -m nomad_dtu_nanolab_plugin.rtp_regression recordings/ --memory
+
+Recordings are discovered recursively. Files in the same folder that share
+the prefix in front of '_RTP_' (e.g. 'indiogo_0019') form one recording,
+which needs exactly one Eklipse '.csv' and at least one CX-Thermo '.txt'.
+"""
+
+import argparse
+import json
+import logging
+import math
+import sys
+import time
+import tracemalloc
+import warnings
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from nomad_dtu_nanolab_plugin import rtp_log_reader
+
+# Default name of the golden baseline file inside the recordings folder.
+GOLDEN_FILENAME = 'rtp_golden.json'
+# Separator between the sample prefix and the rest of the RTP file names.
+RECORDING_NAME_SEPARATOR = '_rtp_'
+# Default tolerances used when comparing numeric values with the baseline.
+DEFAULT_REL_TOL = 1e-6
+DEFAULT_ABS_TOL = 1e-9
+# Step fields stored in the baseline (all other fields are derived from these).
+STEP_FIELDS = (
+    'name',
+    'duration_s',
+    'start_time_s',
+    'end_time_s',
+    'initial_temperature_k',
+    'final_temperature_k',
+    'mean_temperature_k',
+    'pressure_pa',
+    'ar_flow_m3_s',
+    'n2_flow_m3_s',
+    'ph3_in_ar_flow_m3_s',
+    'nh3_in_ar_flow_m3_s',
+    'h2s_in_ar_flow_m3_s',
+)
+
+
+def find_recordings(folder: str | Path) -> dict[str, tuple[str, list[str]]]:
+    """Group the log files below `folder` into recordings.
+
+    Returns a mapping of recording name (relative folder + sample prefix) to
+    the Eklipse CSV path and the sorted list of CX-Thermo diagnostics paths.
+    Groups without a CSV and a TXT file, or with more than one CSV, are
+    skipped because they cannot be paired unambiguously.
+    """
+    folder = Path(folder)
+    groups: dict[str, dict[str, list[str]]] = {}
+    for path in sorted(folder.rglob('*')):
+        suffix = path.suffix.lower()
+        if not path.is_file() or suffix not in {'.csv', '.txt'}:
+            continue
+        stem = path.stem
+        cut = stem.lower().find(RECORDING_NAME_SEPARATOR)
+        prefix = stem[:cut] if cut > 0 else stem
+        rel_dir = path.parent.relative_to(folder).as_posix()
+        name = prefix if rel_dir == '.' else f'{rel_dir}/{prefix}'
+        group = groups.setdefault(name, {'.csv': [], '.txt': []})
+        group[suffix].append(str(path))
+
+    recordings: dict[str, tuple[str, list[str]]] = {}
+    for name, group in groups.items():
+        if len(group['.csv']) == 1 and group['.txt']:
+            recordings[name] = (group['.csv'][0], group['.txt'])
+    return recordings
+
+
+def _clean(value):
+    """Make parser values JSON-friendly (NaN becomes None)."""
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    return value
+
+
+def summarize(parsed: 'rtp_log_reader.ParsedRTPData') -> dict:
+    """Reduce a parse result to the values tracked by the golden baseline."""
+    return {
+        'steps': [
+            {field: _clean(getattr(step, field)) for field in STEP_FIELDS}
+            for step in parsed.steps
+        ],
+        'overview': {key: _clean(val) for key, val in parsed.overview.items()},
+        'used_gases': list(parsed.used_gases),
+        'has_detected_annealing': parsed.has_detected_annealing,
+        'base_pressure_pa': _clean(parsed.base_pressure_pa),
+        'base_pressure_ballast_pa': _clean(parsed.base_pressure_ballast_pa),
+        'rate_of_rise_pa_s': _clean(parsed.rate_of_rise_pa_s),
+    }
+
+
+def _init_worker(overrides: dict[str, float]) -> None:
+    """Override reader thresholds and mute reader chatter in a worker process."""
+    logging.getLogger(rtp_log_reader.__name__).setLevel(logging.ERROR)
+    warnings.filterwarnings('ignore', category=UserWarning)
+    for name, value in overrides.items():
+        setattr(rtp_log_reader, name, value)
+    # Import numpy/pandas up front so they do not count towards the first
+    # recording's time and memory.
+    rtp_log_reader._ensure_deps()
+
+
+class _SilentLogger:
+    """Collects reader warnings instead of printing them from every worker."""
+
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+
+    def warning(self, message, *args, **kwargs) -> None:
+        self.messages.append(str(message))
+
+
+def _run_recording(
+    job: tuple[str, str, list[str], bool],
+) -> tuple[str, dict | None, float, int | None, str | None]:
+    """Parse one recording; executed inside a worker process.
+
+    With memory tracking the peak size of the Python allocations made while
+    parsing (numpy/pandas buffers included) is returned as well. Tracking
+    slows parsing down, so the time is only comparable between runs with
+    the same setting.
+
+    A recording that cannot be parsed returns no summary and the error, so
+    it does not stop the other recordings of the batch.
+    """
+    name, eklipse_path, diagnostics_paths, track_memory = job
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    summary, error, peak = None, None, None
+    try:
+        parsed = rtp_log_reader.parse_rtp_logfiles(
+            eklipse_path, diagnostics_paths, logger=_SilentLogger()
+        )
+        summary = summarize(parsed)
+    except Exception as exc:
+        error = f'{type(exc).__name__}: {exc}'
+    finally:
+        elapsed = time.perf_counter() - start
+        if track_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    return name, summary, elapsed, peak, error
+
+
+def _values_differ(expected, actual, rel_tol: float, abs_tol: float) -> bool:
+    numeric = (int, float)
+    if (
+        isinstance(expected, numeric)
+        and isinstance(actual, numeric)
+        and not isinstance(expected, bool)
+        and not isinstance(actual, bool)
+    ):
+        return not math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=abs_tol)
+    return expected != actual
+
+
+def compare(
+    expected: dict,
+    actual: dict,
+    rel_tol: float = DEFAULT_REL_TOL,
+    abs_tol: float = DEFAULT_ABS_TOL,
+) -> list[str]:
+    """Return human-readable differences between two recording summaries."""
+    diffs: list[str] = []
+
+    expected_names = [step['name'] for step in expected.get('steps', [])]
+    actual_names = [step['name'] for step in actual.get('steps', [])]
+    if expected_names != actual_names:
+        diffs.append(f'steps: {expected_names} -> {actual_names}')
+    else:
+        for exp_step, act_step in zip(expected['steps'], actual['steps']):
+            for field in STEP_FIELDS[1:]:
+                exp_val, act_val = exp_step.get(field), act_step.get(field)
+                if _values_differ(exp_val, act_val, rel_tol, abs_tol):
+                    diffs.append(f'{exp_step["name"]}.{field}: {exp_val} -> {act_val}')
+
+    for key in sorted(set(expected.get('overview', {})) | set(actual['overview'])):
+        exp_val = expected.get('overview', {}).get(key)
+        act_val = actual['overview'].get(key)
+        if _values_differ(exp_val, act_val, rel_tol, abs_tol):
+            diffs.append(f'overview.{key}: {exp_val} -> {act_val}')
+
+    for key, act_val in actual.items():
+        if key in {'steps', 'overview'}:
+            continue
+        if _values_differ(expected.get(key), act_val, rel_tol, abs_tol):
+            diffs.append(f'{key}: {expected.get(key)} -> {act_val}')
+    return diffs
+
+
+def _parse_overrides(assignments: Iterable[str]) -> dict[str, float]:
+    """Parse 'NAME=VALUE' options into reader constant overrides."""
+    overrides: dict[str, float] = {}
+    for assignment in assignments:
+        name, sep, raw_value = assignment.partition('=')
+        name = name.strip()
+        current = getattr(rtp_log_reader, name, None)
+        if not sep or not name.isupper() or not isinstance(current, int | float):
+            raise ValueError(f'Not a numeric rtp_log_reader constant: {assignment}')
+        overrides[name] = type(current)(float(raw_value))
+    return overrides
+
+
+def run(  # noqa: PLR0913
+    folder: str | Path,
+    *,
+    golden_path: str | Path | None = None,
+    update_golden: bool = False,
+    overrides: dict[str, float] | None = None,
+    workers: int | None = None,
+    rel_tol: float = DEFAULT_REL_TOL,
+    abs_tol: float = DEFAULT_ABS_TOL,
+    memory: bool = False,
+    out=sys.stdout,
+) -> int:
+    """Parse every recording in `folder` and check it against the baseline.
+
+    Returns the number of recordings that fail to parse, differ from or are
+    missing in the golden baseline, plus the number of baseline entries
+    without a recording; 0 means no regressions. With `update_golden` the
+    baseline is rebuilt from the recordings in `folder` instead and only the
+    recordings that fail to parse are counted. With `memory` the peak
+    allocation while parsing each recording is reported too.
+    """
+    folder = Path(folder)
+    golden_path = Path(golden_path) if golden_path else folder / GOLDEN_FILENAME
+    recordings = find_recordings(folder)
+    if not recordings:
+        print(f'No Eklipse/CX-Thermo recordings found in {folder}', file=out)
+        return 0
+
+    golden: dict[str, dict] = {}
+    if golden_path.is_file():
+        golden = json.loads(golden_path.read_text(encoding='utf-8'))
+
+    jobs = [
+        (name, csv, txts, memory) for name, (csv, txts) in sorted(recordings.items())
+    ]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(overrides or {},),
+    ) as pool:
+        results = list(pool.map(_run_recording, jobs))
+
+    missing = [] if update_golden else sorted(set(golden) - set(recordings))
+    failures = 0
+    total_time = 0.0
+    width = max(len(name) for name in [*recordings, *missing])
+    for name, summary, elapsed, peak, error in results:
+        total_time += elapsed
+        diffs: list[str] = []
+        if error is not None:
+            status = 'FAILED'
+            diffs = [error]
+            failures += 1
+        elif update_golden:
+            status = 'recorded'
+        elif name not in golden:
+            status = 'NEW (not in baseline)'
+            failures += 1
+        else:
+            diffs = compare(golden[name], summary, rel_tol, abs_tol)
+            status = 'ok' if not diffs else f'{len(diffs)} difference(s)'
+            if diffs:
+                failures += 1
+        peak_text = f'  {peak / 2**20:8.1f} MiB' if peak is not None else ''
+        print(f'{name:<{width}}  {elapsed:8.3f} s{peak_text}  {status}', file=out)
+        for diff in diffs:
+            print(f'    {diff}', file=out)
+    for name in missing:
+        print(f'{name:<{width}}  MISSING (in baseline, no recording)', file=out)
+        failures += 1
+
+    print(
+        f'{len(results)} recording(s), {total_time:.3f} s parse time, '
+        f'{failures} regression(s)',
+        file=out,
+    )
+
+    if update_golden:
+        # Rebuild the baseline from the recordings in the folder, so removed
+        # recordings are dropped. Recordings that fail to parse keep their
+        # previous entry.
+        golden = {
+            name: golden[name] if summary is None else summary
+            for name, summary, *_ in results
+            if summary is not None or name in golden
+        }
+        golden_path.write_text(
+            json.dumps(golden, indent=2, sort_keys=True), encoding='utf-8'
+        )
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m nomad_dtu_nanolab_plugin.rtp_regression',
+        description=(
+            'Parse a folder of RTP recordings in parallel and compare the '
+            'extracted steps and overviews against a golden baseline.'
+        ),
+    )
+    parser.add_argument('folder', help='folder with Eklipse/CX-Thermo log files')
+    parser.add_argument(
+        '--golden',
+        help=f'baseline JSON file (default: <folder>/{GOLDEN_FILENAME})',
+    )
+    parser.add_argument(
+        '--update-golden',
+        action='store_true',
+        help='write the current results as the new baseline',
+    )
+    parser.add_argument(
+        '--set',
+        dest='overrides',
+        action='append',
+        default=[],
+        metavar='NAME=VALUE',
+        help='override a numeric rtp_log_reader constant (repeatable)',
+    )
+    parser.add_argument('--workers', type=int, help='number of worker processes')
+    parser.add_argument(
+        '--memory',
+        action='store_true',
+        help='report the peak memory allocated while parsing each recording',
+    )
+    parser.add_argument('--rel-tol', type=float, default=DEFAULT_REL_TOL)
+    parser.add_argument('--abs-tol', type=float, default=DEFAULT_ABS_TOL)
+    args = parser.parse_args(argv)
+
+    try:
+        overrides = _parse_overrides(args.overrides)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    failures = run(
+        args.folder,
+        golden_path=args.golden,
+        update_golden=args.update_golden,
+        overrides=overrides,
+        workers=args.workers,
+        rel_tol=args.rel_tol,
+        abs_tol=args.abs_tol,
+        memory=args.memory,
+    )
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -203,6 +203,24 @@ rt = RTEntryPoint(
 
 
 class RamanEntryPoint(SchemaPackageEntryPoint):
+    preprocessing: list[str | dict[str, dict[str, float]]] = Field(
+        [],
+        description=(
+            'Preprocessing stages applied to the Raman spectra before they are '
+            'stored, in order. Stages are "cosmic_rays", "baseline" and '
+            '"smooth", optionally with parameters, e.g. '
+            '["cosmic_rays", {"baseline": {"lam": 1e6}}, "smooth"].'
+        ),
+    )
+    max_workers: int = Field(
+        1,
+        description=(
+            'Number of worker processes used to preprocess and fit the spectra '
+            'of maps larger than one batch. 1 processes them in the normalizing '
+            'process.'
+        ),
+    )
+
     def load(self):
         from nomad_dtu_nanolab_plugin.schema_packages.raman import m_package
 
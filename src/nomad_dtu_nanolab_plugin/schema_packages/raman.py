@@ -30,10 +30,12 @@ License: See LICENSE file
 """
 
 import os
+from collections.abc import Iterable
 from typing import TYPE_CHECKING, Any
 
 import numpy as np
 import plotly.graph_objects as go
+from nomad.config import config
 from nomad.datamodel.data import Schema
 from nomad.datamodel.datamodel import EntryArchive
 from nomad.datamodel.metainfo.annotations import (
@@ -43,20 +45,34 @@ from nomad.datamodel.metainfo.annotations import (
     ELNComponentEnum,
 )
 from nomad.datamodel.metainfo.plot import PlotlyFigure, PlotSection
-from nomad.metainfo import Package, Quantity, Section, SubSection
+from nomad.metainfo import MEnum, Package, Quantity, Section, SubSection
 from nomad.units import ureg
 from nomad_measurements.mapping.schema import MappingResult, RectangularSampleAlignment
 from nomad_measurements.utils import merge_sections
 from structlog.stdlib import BoundLogger
 
 from nomad_dtu_nanolab_plugin.categories import DTUNanolabCategory
-from nomad_dtu_nanolab_plugin.raman_map_parser import MappingRamanMeas
+from nomad_dtu_nanolab_plugin.raman_map_parser import (
+    MAX_SPECTRA_TRACES,
+    MappingRamanMeas,
+    band_intensities,
+    decimate_spectra,
+    representative_spectra,
+    strongest_wavenumber,
+)
+from nomad_dtu_nanolab_plugin.raman_preprocessing import PreprocessingPipeline
 from nomad_dtu_nanolab_plugin.schema_packages.basesections import DtuNanolabMeasurement
 
 if TYPE_CHECKING:
     from nomad.datamodel.datamodel import EntryArchive
     from structlog.stdlib import BoundLogger
 
+    from nomad_dtu_nanolab_plugin.schema_packages import RamanEntryPoint
+
+configuration: 'RamanEntryPoint' = config.get_plugin_entry_point(
+    'nomad_dtu_nanolab_plugin.schema_packages:raman'
+)
+
 m_package = Package(name='DTU Raman measurement schema')
 
 
@@ -67,14 +83,15 @@ class RamanResult(MappingResult):
     the measurement position and associated optical image.
     Inherits from MappingResult to get standardized position handling and naming.
 
-    Note: Laser wavelength, accumulation count, and exposure time are stored at
-    the RamanMeasurement level as they are common to all measurement points.
+    Note: Laser wavelength, accumulation count, exposure time and the Raman shift
+    axis are stored at the RamanMeasurement level as they are common to all
+    measurement points.
     """
 
     m_def = Section()
 
     intensity = Quantity(
-        type=np.dtype(np.float64),
+        type=np.dtype(np.float32),
         shape=['*'],
         description='The Raman intensity at each wavenumber',
     )
@@ -83,7 +100,10 @@ class RamanResult(MappingResult):
         type=np.dtype(np.float64),
         shape=['*'],
         unit='1/cm',
-        description='The Raman shift values in 1/cm',
+        description=(
+            'The Raman shift values in 1/cm. Only set in entries processed '
+            'before the axis was shared in RamanMeasurement.raman_shift.'
+        ),
     )
     optical_image = Quantity(
         type=str,
@@ -92,6 +112,26 @@ class RamanResult(MappingResult):
         ),
         a_browser=BrowserAnnotation(adaptor=BrowserAdaptors.RawFileAdaptor),
     )
+    peak_positions = Quantity(
+        type=np.dtype(np.float64),
+        shape=['*'],
+        unit='1/cm',
+        description=(
+            'Fitted positions of the peaks in RamanMeasurement.peak_fit_positions, '
+            'NaN where the fit failed.'
+        ),
+    )
+    peak_fwhm = Quantity(
+        type=np.dtype(np.float64),
+        shape=['*'],
+        unit='1/cm',
+        description='Fitted full widths at half maximum of the peaks.',
+    )
+    peak_areas = Quantity(
+        type=np.dtype(np.float64),
+        shape=['*'],
+        description='Fitted areas of the peaks above the linear background.',
+    )
 
     def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
         """Normalize the Raman result metadata.
@@ -180,6 +220,43 @@ class RamanMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
             component=ELNComponentEnum.NumberEditQuantity,
         ),
     )
+    raman_shift = Quantity(
+        type=np.dtype(np.float64),
+        shape=['*'],
+        unit='1/cm',
+        description='The Raman shift values in 1/cm, shared by all results.',
+    )
+    peak_fit_positions = Quantity(
+        type=np.dtype(np.float64),
+        shape=['*'],
+        unit='1/cm',
+        description=(
+            'Initial positions of the peaks fitted at every point of the map. '
+            'The fitted positions, widths and areas are stored in the results.'
+        ),
+        a_eln=ELNAnnotation(
+            component=ELNComponentEnum.NumberEditQuantity,
+            defaultDisplayUnit='1/cm',
+        ),
+    )
+    peak_fit_shape = Quantity(
+        type=MEnum('Lorentzian', 'Voigt'),
+        default='Lorentzian',
+        description=(
+            'Shape of the fitted peaks. Voigt peaks are approximated by '
+            'pseudo-Voigt profiles.'
+        ),
+        a_eln=ELNAnnotation(
+            component=ELNComponentEnum.EnumEditQuantity,
+        ),
+    )
+    preprocessing = Quantity(
+        type=str,
+        description=(
+            'Preprocessing stages applied to the spectra before they were '
+            'stored, set from the configuration of the Raman schema package.'
+        ),
+    )
     results = SubSection(
         section_def=RamanResult,
         repeats=True,
@@ -197,55 +274,117 @@ class RamanMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
         description='The alignment of the sample.',
     )
 
-    def write_raman_data(
+    def write_raman_data(  # noqa: PLR0913
         self,
-        raman_meas_list: list[Any],
+        batches: Iterable[tuple[list[Any], np.ndarray]],
         img_list: list[str],
         archive: 'EntryArchive',
         logger: 'BoundLogger',
+        *,
+        peak_fits: dict[str, np.ndarray] | None = None,
+        preprocessing: str | None = None,
     ) -> None:
         """Convert parsed Raman data into NOMAD result objects.
 
-        Takes raw data from the WDF parser (MappingRamanMeas) and creates
-        standardized RamanResult objects with proper units and metadata.
+        Takes raw data from the WDF parser (MappingRamanMeas.iter_batches) and
+        creates standardized RamanResult objects with proper units and metadata.
+        The spectra arrive in batches of points, so only one batch of spectra
+        is held in memory besides the results. `preprocessing` describes the
+        stages applied to the spectra and is stored with them.
 
         Processing Steps:
-            1. Iterate through each RamanMeas object
-            2. Convert positions to proper units (micrometers -> meters)
-            3. Extract intensity and wavenumber arrays
-            4. Create RamanResult with all metadata
-            5. Normalize each result (generates name from position)
-            6. Merge results into this measurement section
+            1. Store the Raman shift axis shared by all points once
+            2. Convert the positions of a batch to meters at once
+               (micrometers -> meters)
+            3. Name the results of a batch from their positions at once, as
+               MappingResult.normalize would
+            4. Create RamanResult with the float32 intensities, the fitted
+               peaks of the point (MappingRamanMeas.fit_peaks) and metadata
+            5. Replace the intensities and peaks of existing results of the
+               same points, which depend on the preprocessing and the fitted
+               positions, and merge the results into this measurement section
         """
+        # Units are applied once per batch instead of once per result
+        um_to_m = ureg('um').to('m').magnitude
+        raman_shift = None
         results = []
-        for meas, img_file in zip(raman_meas_list, img_list):
-            x_absolute = meas.x_pos * ureg('um')
-            y_absolute = meas.y_pos * ureg('um')
-            result = RamanResult(
-                intensity=meas.data['intensity'].to_list(),
-                raman_shift=meas.data['wavenumber'].to_numpy() * ureg('1/cm'),
-                optical_image=img_file,
-                x_absolute=x_absolute,
-                y_absolute=y_absolute,
-            )
-            result.normalize(archive, logger)
-            results.append(result)
+        for raman_meas_batch, spectra in batches:
+            start = len(results)
+            if raman_shift is None:
+                raman_shift = np.asarray(
+                    raman_meas_batch[0].wavenumber, dtype=np.float64
+                )
+            x_absolute = np.array([meas.x_pos for meas in raman_meas_batch]) * um_to_m
+            y_absolute = np.array([meas.y_pos for meas in raman_meas_batch]) * um_to_m
+            img_files = img_list[start : start + len(raman_meas_batch)]
+            batch_results = [
+                RamanResult(
+                    name=f'Stage x = {x * 1e3:.1f} mm, y = {y * 1e3:.1f} mm',
+                    intensity=intensity.astype(np.float32, copy=False),
+                    optical_image=img_file,
+                    x_absolute=x,
+                    y_absolute=y,
+                )
+                for intensity, img_file, x, y in zip(
+                    spectra, img_files, x_absolute, y_absolute
+                )
+            ]
+            if peak_fits is not None:
+                for i, result in enumerate(batch_results, start=start):
+                    result.peak_positions = peak_fits['center'][i]
+                    result.peak_fwhm = peak_fits['fwhm'][i]
+                    result.peak_areas = peak_fits['area'][i]
+            results.extend(batch_results)
+        if not results:
+            return
+
+        # merge_sections keeps stored values, so the intensities of a changed
+        # preprocessing and the peaks of changed fit settings are written to
+        # the existing results directly, peaks no longer fitted are removed
+        if len(self.results) == len(results):
+            for stored, result in zip(self.results, results):
+                stored.intensity = result.intensity
+                stored.peak_positions = result.peak_positions
+                stored.peak_fwhm = result.peak_fwhm
+                stored.peak_areas = result.peak_areas
+        if len(self.results) in {0, len(results)}:
+            self.preprocessing = preprocessing
 
         raman = RamanMeasurement(
+            raman_shift=raman_shift,
             results=results,
         )
         merge_sections(self, raman, logger)
 
+    def _result_raman_shifts(self) -> list[np.ndarray]:
+        """Raman shift axis of every result in 1/cm.
+
+        Older entries store the axis in every result, newer ones once in
+        raman_shift.
+        """
+        shared = (
+            self.raman_shift.to('1/cm').magnitude
+            if self.raman_shift is not None
+            else None
+        )
+        return [
+            result.raman_shift.to('1/cm').magnitude
+            if result.raman_shift is not None
+            else shared
+            for result in self.results
+        ]
+
     def read_raman_data(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
         """Read and parse WDF file, extract spectra and optical images.
 
         Main data extraction method that:
         1. Opens the WDF file from upload context
         2. Parses spectral data and positions using MappingRamanMeas
-        3. Extracts and saves optical microscopy images
-        4. Creates optical image grid for overview
-        5. Converts data to RamanResult objects
-        6. Extracts measurement-level metadata (accumulation count, exposure time)
+        3. Fits the peaks in peak_fit_positions at every point, if any
+        4. Extracts and saves optical microscopy images
+        5. Creates optical image grid for overview
+        6. Converts data to RamanResult objects
+        7. Extracts measurement-level metadata (accumulation count, exposure time)
         """
         with archive.m_context.raw_file(self.raman_data_file) as file:
             # Initialize the mapping reader
@@ -263,6 +402,41 @@ class RamanMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
 
             mapping.read_wdf_mapping(folder, [filename])
 
+            # Preprocess the spectra with the configured pipeline, if any
+            pipeline = PreprocessingPipeline.from_config(configuration.preprocessing)
+            if pipeline:
+                mapping.preprocess(pipeline, max_workers=configuration.max_workers)
+
+            # Fit the requested peaks at every point, warm-started from the
+            # neighbouring points
+            peak_fits = None
+            if self.peak_fit_positions is not None and len(self.peak_fit_positions):
+                positions = self.peak_fit_positions.to('1/cm').magnitude
+                if mapping.wavenumber is not None:
+                    outside = positions[
+                        (positions < mapping.wavenumber.min())
+                        | (positions > mapping.wavenumber.max())
+                    ]
+                    if len(outside):
+                        logger.warning(
+                            f'Peak positions {outside.tolist()} 1/cm are outside '
+                            'the measured Raman shift range and are not fitted.'
+                        )
+                peak_fits = mapping.fit_peaks(
+                    positions,
+                    shape=self.peak_fit_shape.lower(),
+                    max_workers=configuration.max_workers,
+                )
+                failed = (
+                    np.count_nonzero(~peak_fits['success'])
+                    if peak_fits is not None
+                    else 0
+                )
+                if failed:
+                    logger.warning(
+                        f'Peak fit failed at {failed} of {len(mapping.spectra)} points.'
+                    )
+
             # Extract measurement-level metadata from the WDF file
             # These are common to all measurement points
             if mapping.raman_meas_list and hasattr(mapping, 'wdf_reader'):
@@ -326,7 +500,9 @@ class RamanMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
                 else upload_folder
             )
 
-            _, img_filenames = mapping.save_optical_images(img_save_folder, meas_name)
+            _, img_filenames = mapping.save_optical_images(
+                img_save_folder, meas_name, image_format='jpeg'
+            )
             # Create relative paths for the images
             img_list = [
                 os.path.join(data_file_dir, img_name)
@@ -335,11 +511,11 @@ class RamanMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
                 for img_name in img_filenames
             ]
 
-            # Create and save the optical image grid
+            # Create and save the optical image mosaic and its smaller levels
             grid_path = os.path.join(img_save_folder, f'{meas_name}_optical_grid.png')
-            fig = mapping.create_image_grid(save_path=grid_path)
+            grid_levels = mapping.save_image_pyramid(grid_path)
             # Store the relative path to the optical image grid
-            if fig:
+            if grid_levels:
                 self.optical_image_grid = (
                     os.path.join(data_file_dir, f'{meas_name}_optical_grid.png')
                     if data_file_dir
@@ -347,7 +523,14 @@ class RamanMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
                 )
 
             # Write the data to results
-            self.write_raman_data(mapping.raman_meas_list, img_list, archive, logger)
+            self.write_raman_data(
+                mapping.iter_batches(),
+                img_list,
+                archive,
+                logger,
+                peak_fits=peak_fits,
+                preprocessing=str(pipeline) if pipeline else None,
+            )
 
     def plot(self) -> None:
         """Generate interactive Plotly visualizations of Raman data.
@@ -367,117 +550,121 @@ class RamanMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
             - Offset calculated dynamically based on intensity range
             - Excludes Si peak region (510-530 cm-1) from offset calculation
             - Better for visualizing peak evolution across positions
+
+        Large maps:
+            - At most MAX_SPECTRA_TRACES spectra are drawn, chosen by k-means
+              clustering of the log spectra (see representative_spectra)
+            - Every spectrum is downsampled to MAX_TRACE_POINTS points with
+              its peaks kept (see decimate_spectra)
+            - The traces use WebGL (Scattergl)
         Returns:
             None. Appends PlotlyFigure objects to self.figures list.
         """
-        fig = go.Figure()
-        result: RamanResult
-        for result in self.results:
-            # Fixed: raman_shift is stored as a list, not a Quantity
-            # If it's a Quantity, convert it; otherwise use it directly
-            if hasattr(result.raman_shift, 'magnitude'):
-                x_data = result.raman_shift.to('1/cm').magnitude
-            else:
-                x_data = result.raman_shift
+        OFFSET_FACTOR = 0.3  # Factor to control spacing between patterns
+        RAMAN_RANGE_EXCL = (510, 530)  # Exclude this range for offset calculation
+        RAMAN_RAYLEIGH_PEAK_FILTER = 80  # Filter to exclude the region around 0 cm-1
 
-            # Add small epsilon to avoid log(0) warnings
-            intensity_safe = np.maximum(result.intensity, 1e-10)
+        raman_shifts = self._result_raman_shifts()
+        n_results = len(self.results)
+        shared_axis = all(
+            np.array_equal(raman_shift, raman_shifts[0])
+            for raman_shift in raman_shifts[1:]
+        )
 
-            fig.add_trace(
-                go.Scatter(
-                    x=x_data,
-                    y=np.log(intensity_safe),
-                    mode='lines',
-                    name=result.name,
-                    hoverlabel=dict(namelength=-1),
+        # Log spectra grouped by Raman shift axis, normally one group for all.
+        # Add small epsilon to avoid log(0) warnings
+        if shared_axis:
+            log_spectra = np.log10(
+                np.maximum(
+                    np.vstack([result.intensity for result in self.results]), 1e-10
                 )
             )
+            selected = representative_spectra(log_spectra)
+            groups = [(raman_shifts[0], log_spectra[selected])]
+        else:
+            selected = np.unique(
+                np.linspace(0, n_results - 1, MAX_SPECTRA_TRACES).round().astype(int)
+            )
+            groups = [
+                (
+                    raman_shifts[i],
+                    np.log10(np.maximum(self.results[i].intensity, 1e-10))[None],
+                )
+                for i in selected
+            ]
 
-        # Update layout
-        fig.update_layout(
-            title='Raman Spectra',
-            xaxis_title='Raman Shift (1/cm)',
-            yaxis_title='Log Intensity',
-            template='plotly_white',
-            hovermode='closest',
-            dragmode='zoom',
-            xaxis=dict(
-                fixedrange=False,
-            ),
-            yaxis=dict(
-                fixedrange=False,
-                type='linear',
-            ),
-        )
-
-        plot_json = fig.to_plotly_json()
-        plot_json['config'] = dict(
-            scrollZoom=False,
+        # Offsets from the intensity range of every spectrum, excluding the Si
+        # peak and the Rayleigh peak region
+        ranges = []
+        x_data = []
+        y_data = []
+        for raman_shift, spectra in groups:
+            raman_shift_data = np.asarray(raman_shift)
+            mask = (
+                (raman_shift_data < RAMAN_RANGE_EXCL[0])
+                | (raman_shift_data > RAMAN_RANGE_EXCL[1])
+            ) & (raman_shift_data > RAMAN_RAYLEIGH_PEAK_FILTER)
+            ranges.extend(np.ptp(spectra[:, mask], axis=1))
+            x_decimated, y_decimated = decimate_spectra(raman_shift_data, spectra)
+            x_data.extend(x_decimated)
+            y_data.extend(y_decimated)
+        offsets = np.concatenate([[0], np.cumsum(np.array(ranges) * OFFSET_FACTOR)])
+
+        names = [self.results[i].name for i in selected]
+        subset = (
+            f' ({len(selected)} representative of {n_results})'
+            if len(selected) < n_results
+            else ''
         )
         self.figures.append(
-            PlotlyFigure(
+            self._spectra_figure(
                 label='Patterns',
-                figure=plot_json,
+                title=f'Raman Spectra{subset}',
+                yaxis_title='Log Intensity',
+                x_data=x_data,
+                # natural logarithm of the intensity
+                y_data=[y * np.log(10) for y in y_data],
+                names=names,
             )
         )
-
-        fig2 = go.Figure()
-
-        # Pre-calculate log intensities and cumulative offsets
-        log_intensities = []
-        offsets = [0]
-        cumulative_offset = 0
-
-        OFFSET_FACTOR = 0.3  # Factor to control spacing between patterns
-        RAMAN_RANGE_EXCL = (510, 530)  # Exclude this range for offset calculation
-        RAMAN_RAYLEIGH_PEAK_FILTER = 80  # Filter to exclude the region around 0 cm-1
-
-        for result in self.results:
-            if hasattr(result.raman_shift, 'magnitude'):
-                raman_shift_data = result.raman_shift.to('1/cm').magnitude
-            else:
-                raman_shift_data = result.raman_shift
-
-            log_intensity = np.log10(np.maximum(result.intensity, 1e-10))
-            log_intensities.append(log_intensity)
-
-            # Filter to exclude the specified Raman shift range for offset calculation
-            mask = (raman_shift_data < RAMAN_RANGE_EXCL[0]) | (
-                raman_shift_data > RAMAN_RANGE_EXCL[1]
+        self.figures.append(
+            self._spectra_figure(
+                label='Stacked Patterns',
+                title=f'Raman Spectra stacked{subset}',
+                yaxis_title='Log(Intensity)',
+                x_data=x_data,
+                y_data=[y + offset for y, offset in zip(y_data, offsets)],
+                names=names,
             )
-            # also exclude the Rayleigh peak region
-            mask &= raman_shift_data > RAMAN_RAYLEIGH_PEAK_FILTER
-
-            # apply mask
-            log_intensity_filtered = log_intensity[mask]
-
-            cumulative_offset += (
-                log_intensity_filtered.max() - log_intensity_filtered.min()
-            ) * OFFSET_FACTOR
-            offsets.append(cumulative_offset)
-
-        # Add traces with dynamically calculated offsets
-        for i, result in enumerate(self.results):
-            if hasattr(result.raman_shift, 'magnitude'):
-                x_data = result.raman_shift.to('1/cm').magnitude
-            else:
-                x_data = result.raman_shift
+        )
 
-            fig2.add_trace(
-                go.Scatter(
-                    x=x_data,
-                    y=log_intensities[i] + offsets[i],
+    @staticmethod
+    def _spectra_figure(  # noqa: PLR0913
+        *,
+        label: str,
+        title: str,
+        yaxis_title: str,
+        x_data: list[np.ndarray],
+        y_data: list[np.ndarray],
+        names: list[str],
+    ) -> PlotlyFigure:
+        fig = go.Figure()
+        for x, y, name in zip(x_data, y_data, names):
+            fig.add_trace(
+                go.Scattergl(
+                    x=x,
+                    y=y,
                     mode='lines',
-                    name=result.name,
+                    name=name,
                     hoverlabel=dict(namelength=-1),
                 )
             )
 
         # Update layout
-        fig2.update_layout(
-            title='Raman Spectra stacked',
+        fig.update_layout(
+            title=title,
             xaxis_title='Raman Shift (1/cm)',
-            yaxis_title='Log(Intensity)',
+            yaxis_title=yaxis_title,
             template='plotly_white',
             hovermode='closest',
             dragmode='zoom',
@@ -490,16 +677,11 @@ class RamanMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
             ),
         )
 
-        plot_json2 = fig2.to_plotly_json()
-        plot_json2['config'] = dict(
+        plot_json = fig.to_plotly_json()
+        plot_json['config'] = dict(
             scrollZoom=False,
         )
-        self.figures.append(
-            PlotlyFigure(
-                label='Stacked Patterns',
-                figure=plot_json2,
-            )
-        )
+        return PlotlyFigure(label=label, figure=plot_json)
 
     def plot_intensity_map_from_results(
         self, wavenumber_tolerance: float = 5
@@ -534,81 +716,66 @@ class RamanMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
             x_title = 'X Stage Position (mm)'
             y_title = 'Y Stage Position (mm)'
 
-        # Auto-detect target wavenumber (excluding Si peak region)
-        SI_PEAK_RANGE = (510, 530)
-        max_intensity = 0
-        target_wavenumber = 520  # default fallback
-
-        for result in self.results:
-            raman_shift_data = (
-                result.raman_shift.to('1/cm').magnitude
-                if hasattr(result.raman_shift, 'magnitude')
-                else result.raman_shift
-            )
-            intensity_data = result.intensity
-
-            # Exclude Si peak region
-            mask = (raman_shift_data < SI_PEAK_RANGE[0]) | (
-                raman_shift_data > SI_PEAK_RANGE[1]
-            )
-            if mask.any():
-                filtered_intensity = intensity_data[mask]
-                filtered_wavenumber = raman_shift_data[mask]
-                max_idx = np.argmax(filtered_intensity)
-                current_max = filtered_intensity[max_idx]
-                if current_max > max_intensity:
-                    max_intensity = current_max
-                    target_wavenumber = filtered_wavenumber[max_idx]
-
-        # Extract intensity at target wavenumber for each position
-        x_positions = []
-        y_positions = []
-        intensities = []
-
-        for result in self.results:
-            # Get positions
-            if use_relative:
-                x_pos = result.x_relative.to('mm').magnitude
-                y_pos = result.y_relative.to('mm').magnitude
-            else:
-                x_pos = result.x_absolute.to('mm').magnitude
-                y_pos = result.y_absolute.to('mm').magnitude
-
-            # Round to avoid floating-point precision issues in grid creation
-            x_positions.append(round(x_pos, 6))
-            y_positions.append(round(y_pos, 6))
-
-            # Get Raman shift and intensity
-            raman_shift_data = (
-                result.raman_shift.to('1/cm').magnitude
-                if hasattr(result.raman_shift, 'magnitude')
-                else result.raman_shift
-            )
-            intensity_data = result.intensity
+        # Stack the results, they normally share one Raman shift axis
+        raman_shifts = [np.asarray(shift) for shift in self._result_raman_shifts()]
+        shared_axis = all(
+            np.array_equal(raman_shift, raman_shifts[0])
+            for raman_shift in raman_shifts[1:]
+        )
 
-            # Find intensity at target wavenumber
-            mask = (raman_shift_data >= target_wavenumber - wavenumber_tolerance) & (
-                raman_shift_data <= target_wavenumber + wavenumber_tolerance
+        # Auto-detect target wavenumber (excluding Si peak region)
+        # and extract the intensity around it for each position
+        if shared_axis:
+            spectra = np.vstack([result.intensity for result in self.results])
+            target_wavenumber, _ = strongest_wavenumber(raman_shifts[0], spectra)
+            intensities = band_intensities(
+                raman_shifts[0], spectra, [target_wavenumber], wavenumber_tolerance
+            )[:, 0]
+        else:
+            candidates = [
+                strongest_wavenumber(raman_shift, result.intensity)
+                for raman_shift, result in zip(raman_shifts, self.results)
+            ]
+            target_wavenumber = max(candidates, key=lambda c: c[1])[0]
+            intensities = np.array(
+                [
+                    band_intensities(
+                        raman_shift,
+                        result.intensity,
+                        [target_wavenumber],
+                        wavenumber_tolerance,
+                    )[0, 0]
+                    for raman_shift, result in zip(raman_shifts, self.results)
+                ]
             )
 
-            if mask.any():
-                intensity = intensity_data[mask].mean()
-            else:
-                intensity = 0
-            intensities.append(intensity)
+        # Get positions, rounded to avoid floating-point precision issues in
+        # grid creation
+        x_positions = np.array(
+            [
+                (result.x_relative if use_relative else result.x_absolute)
+                .to('mm')
+                .magnitude
+                for result in self.results
+            ]
+        ).round(6)
+        y_positions = np.array(
+            [
+                (result.y_relative if use_relative else result.y_absolute)
+                .to('mm')
+                .magnitude
+                for result in self.results
+            ]
+        ).round(6)
 
         # Create intensity matrix for heatmap
-        x_unique = sorted(set(x_positions))
-        y_unique = sorted(set(y_positions))
+        x_unique, x_idx = np.unique(x_positions, return_inverse=True)
+        y_unique, y_idx = np.unique(y_positions, return_inverse=True)
 
         intensity_matrix = np.zeros((len(y_unique), len(x_unique)))
         count_matrix = np.zeros((len(y_unique), len(x_unique)))
-
-        for x_pos, y_pos, intensity in zip(x_positions, y_positions, intensities):
-            x_idx = x_unique.index(x_pos)
-            y_idx = y_unique.index(y_pos)
-            intensity_matrix[y_idx, x_idx] += intensity
-            count_matrix[y_idx, x_idx] += 1
+        np.add.at(intensity_matrix, (y_idx, x_idx), intensities)
+        np.add.at(count_matrix, (y_idx, x_idx), 1)
 
         # Average intensities where multiple measurements mapped to same grid point
         mask = count_matrix > 0
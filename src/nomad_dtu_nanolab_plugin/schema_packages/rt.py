@@ -1,6 +1,8 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING
 
+import h5py
 import numpy as np
 from nomad.datamodel.data import ArchiveSection, Schema
 from nomad.datamodel.metainfo.annotations import (
@@ -20,7 +22,7 @@ from nomad_measurements.mapping.schema import (
     MappingResult,
     RectangularSampleAlignment,
 )
-from nomad_measurements.utils import create_archive
+from nomad_measurements.utils import get_entry_id_from_file_name, get_reference
 
 from nomad_dtu_nanolab_plugin import autosampler_reader
 from nomad_dtu_nanolab_plugin.categories import DTUNanolabCategory
@@ -65,6 +67,15 @@ class RTSpectrum(ArchiveSection):
         description='Intensity values (R or T as fraction 0-1).',
     )
 
+    spectrum_index = Quantity(
+        type=np.int64,
+        description="""
+        Row of this spectrum in the spectra file of the RT measurement. Set
+        instead of the wavelength and intensity arrays when the spectra are
+        stored in that file.
+        """,
+    )
+
     detector_angle = Quantity(
         type=np.float64,
         unit='degree',
@@ -114,6 +125,15 @@ class RTSpectrum(ArchiveSection):
         ),
     )
 
+    average_intensity = Quantity(
+        type=np.float64,
+        description="""
+        Average intensity (R or T as fraction 0-1) over the wavelength window
+        of the RT measurement (`WAVELENGTH_MIN`-`WAVELENGTH_MAX`). Not set if
+        no data point of the spectrum lies in the window.
+        """,
+    )
+
     def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
         """
         The normalizer for the `RTSpectrum` class.
@@ -426,6 +446,207 @@ class DtuAutosamplerMeasurement(Experiment, PlotSection, Schema):
                 f'Could not generate autosampler grid plot: {e}', exc_info=True
             )
 
+    @staticmethod
+    def _datetime_label(position_data: dict) -> str:
+        """
+        Collection time of the first measurement of a library, formatted for
+        the names of its RT measurement archive.
+        """
+        # Extract datetime from first measurement for uniqueness
+        first_multi_measurement = next(iter(position_data.values()))
+        collection_time = None
+        if first_multi_measurement.measurements:
+            first_measurement = first_multi_measurement.measurements[0]
+            collection_time = first_measurement.metadata.get('Collection Time')
+
+        # Format datetime for name uniqueness
+        if collection_time is None:
+            return 'unknown'
+        if hasattr(collection_time, 'strftime'):
+            return collection_time.strftime('%Y%m%d_%H%M%S')
+        return str(collection_time).replace(' ', '_').replace(':', '')
+
+    def _library_archive_data(
+        self,
+        library_id: str,
+        position_data: dict,
+        datetime_label: str,
+        logger: 'BoundLogger',
+    ) -> tuple[dict, dict | None]:
+        """
+        Build the archive data of the `RTMeasurement` of one library and the
+        arrays of its spectra file.
+
+        The sections only hold the positions and the measurement geometry.
+        The intensities of the whole library are converted from percent in one
+        array operation. If all spectra have the same length they are stored
+        in a spectra file (see `write_spectra_file`) and the spectra sections
+        only get their row in it. Otherwise the arrays are added to the
+        serialized sections as plain lists and no spectra file is returned.
+        """
+        measurement = RTMeasurement(
+            name=f'{library_id}_RT_{datetime_label}',
+            source_fingerprint=autosampler_reader.library_fingerprint(position_data),
+            vertical_back_slit=self.vertical_back_slit,
+            vertical_front_slit=self.vertical_front_slit,
+            horizontal_slit=self.horizontal_slit,
+        )
+        measurement.accessory = 'UMA'
+        # Link to sample using lab_id (optional - can be set manually later)
+        measurement.samples = [CompositeSystemReference(lab_id=library_id)]
+
+        # Positions of all results in the unit of the schema
+        positions = np.array(
+            [
+                [multi_measurement.position_x, multi_measurement.position_y]
+                for multi_measurement in position_data.values()
+            ],
+            dtype=np.float64,
+        )
+        positions = (positions * ureg('mm')).to('m').magnitude
+
+        results = []
+        spectra_measurements = []
+        for (position_key, multi_measurement), (x, y) in zip(
+            position_data.items(), positions
+        ):
+            result = RTResult(name=f'Position {position_key}')
+            if multi_measurement.position_x is not None:
+                result.x_absolute = x
+                result.x_relative = x
+            if multi_measurement.position_y is not None:
+                result.y_absolute = y
+                result.y_relative = y
+
+            spectra = []
+            for single_meas in multi_measurement.measurements:
+                # Determine spectrum type from metadata
+                meas_type = single_meas.metadata.get('MeasurementType', 'Unknown')
+                if meas_type == 'T':
+                    spectrum_type = 'Transmission'
+                elif meas_type == 'R':
+                    spectrum_type = 'Reflection'
+                else:
+                    logger.warning(f'Unknown measurement type: {meas_type}')
+                    continue
+
+                # Angles are given in degrees, the unit of the schema
+                spectrum = RTSpectrum(spectrum_type=spectrum_type)
+                if 'DetectorAngle' in single_meas.metadata:
+                    spectrum.detector_angle = float(
+                        single_meas.metadata['DetectorAngle']
+                    )
+                if 'SampleAngle' in single_meas.metadata:
+                    spectrum.sample_angle = float(single_meas.metadata['SampleAngle'])
+                if 'Polarization' in single_meas.metadata:
+                    spectrum.polarization = single_meas.metadata['Polarization']
+
+                spectra.append(spectrum)
+                spectra_measurements.append(single_meas)
+            result.spectra = spectra
+            results.append(result)
+        measurement.results = results
+
+        data = measurement.m_to_dict(with_root_def=True)
+        spectra_data = [
+            spectrum_data
+            for result_data in data.get('results', [])
+            for spectrum_data in result_data.get('spectra', [])
+        ]
+
+        intensities = [single_meas.intensity for single_meas in spectra_measurements]
+        if len({len(intensity) for intensity in intensities}) == 1:
+            wavelength = spectra_measurements[0].wavelength
+            if not all(
+                np.array_equal(single_meas.wavelength, wavelength)
+                for single_meas in spectra_measurements
+            ):
+                wavelength = np.vstack(
+                    [single_meas.wavelength for single_meas in spectra_measurements]
+                )
+            # row offsets of the spectra of each position in the spectra file
+            position_offsets = np.cumsum(
+                [0] + [len(result.spectra) for result in results]
+            )
+            for index, spectrum_data in enumerate(spectra_data):
+                spectrum_data['spectrum_index'] = index
+            data['spectra_file'] = (
+                f'{library_id}_rt_measurement_{datetime_label}_spectra.h5'
+            )
+            spectra = {
+                'wavelength': wavelength,
+                # convert to fraction (intensity is in percent)
+                'intensity': np.vstack(intensities).astype(np.float64) / 100.0,
+                'position_offsets': position_offsets,
+            }
+            return data, spectra
+
+        # keep the axes referenced so that their ids stay unique
+        wavelengths = {}
+        for spectrum_data, single_meas, intensity in zip(
+            spectra_data, spectra_measurements, intensities
+        ):
+            wavelength = single_meas.wavelength
+            if id(wavelength) not in wavelengths:
+                wavelengths[id(wavelength)] = (wavelength, wavelength.tolist())
+            spectrum_data['wavelength'] = wavelengths[id(wavelength)][1]
+            spectrum_data['intensity'] = (intensity.astype(np.float64) / 100.0).tolist()
+
+        return data, None
+
+    @staticmethod
+    def _stored_fingerprint(archive: 'EntryArchive', file_name: str) -> str | None:
+        """
+        Source fingerprint of an existing RT measurement archive. Returns an
+        empty string for archives written before fingerprints were stored and
+        None if the archive does not exist.
+        """
+        if not archive.m_context.raw_path_exists(file_name):
+            return None
+        with archive.m_context.update_entry(file_name) as entry:
+            return entry.get('data', {}).get('source_fingerprint', '')
+
+    @staticmethod
+    def _write_archives(
+        archive: 'EntryArchive', contents: list, logger: 'BoundLogger'
+    ) -> list[str]:
+        """
+        Write the archive files of all RT measurements in one pass and return
+        the references to their entries.
+
+        `contents` holds the name, the archive data and the spectra file arrays
+        of each measurement. Measurements without data are up to date and
+        their existing archive is left alone. The spectra file is written
+        before the archive, so that it is available when the entry is
+        processed.
+        """
+        references = []
+        for index, (name, data, spectra) in enumerate(contents, start=1):
+            file_name = f'{name}.archive.json'
+            if data is None:
+                logger.info(
+                    f'RT measurement archive {index}/{len(contents)} '
+                    f'{file_name} is up to date.'
+                )
+            else:
+                if spectra is not None:
+                    write_spectra_file(archive, data['spectra_file'], **spectra)
+                with archive.m_context.update_entry(
+                    file_name, write=True, process=True
+                ) as entry:
+                    entry.clear()
+                    entry['data'] = data
+                logger.info(
+                    f'Wrote RT measurement archive {index}/{len(contents)} {file_name}.'
+                )
+            references.append(
+                get_reference(
+                    archive.metadata.upload_id,
+                    get_entry_id_from_file_name(file_name, archive),
+                )
+            )
+        return references
+
     def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
         """
         The normalizer for the `DtuAutosamplerMeasurement` class.
@@ -433,7 +654,7 @@ class DtuAutosamplerMeasurement(Experiment, PlotSection, Schema):
         This method:
         1. Parses the data and config files using autosampler_reader
         2. Groups data by sample/library
-        3. Creates separate RTMeasurement archives for each library
+        3. Creates separate RTMeasurement archives for new or changed libraries
         4. Adds them as steps to this experiment
         """
         super().normalize(archive, logger)
@@ -457,120 +678,42 @@ class DtuAutosamplerMeasurement(Experiment, PlotSection, Schema):
             # Group measurements by position for each sample
             library_data = autosampler_reader.group_measurements_position(samples)
 
-            measurements: list[ExperimentStep] = []
-
-            # Create a measurement archive for each library
+            # Build the data of all child archives before writing any of them
+            contents = []
             for library_id, position_data in library_data.items():
                 # Skip baseline samples (we might not to skip it in the future)
                 if library_id == 'Baseline':
                     continue
 
-                # Extract datetime from first measurement for uniqueness
-                first_multi_measurement = next(iter(position_data.values()))
-                collection_time = None
-                if first_multi_measurement.measurements:
-                    first_measurement = first_multi_measurement.measurements[0]
-                    collection_time = first_measurement.metadata.get('Collection Time')
-
-                # Format datetime for name uniqueness
-                if collection_time is not None:
-                    if hasattr(collection_time, 'strftime'):
-                        datetime_label = collection_time.strftime('%Y%m%d_%H%M%S')
-                    else:
-                        datetime_label = (
-                            str(collection_time).replace(' ', '_').replace(':', '')
-                        )
-                else:
-                    datetime_label = 'unknown'
-
-                measurement = RTMeasurement(
-                    name=f'{library_id}_RT_{datetime_label}',
-                    vertical_back_slit=self.vertical_back_slit,
-                    vertical_front_slit=self.vertical_front_slit,
-                    horizontal_slit=self.horizontal_slit,
+                datetime_label = self._datetime_label(position_data)
+                name = f'{library_id}_rt_measurement_{datetime_label}'
+                # Only regenerate archives of new or changed libraries. Archives
+                # written without a fingerprint (and without a spectra file)
+                # are regenerated once
+                stored_fingerprint = self._stored_fingerprint(
+                    archive, f'{name}.archive.json'
                 )
-
-                # Create results for each position
-                results = []
-                for position_key, multi_measurement in position_data.items():
-                    result = RTResult(
-                        name=f'Position {position_key}',
+                if stored_fingerprint == autosampler_reader.library_fingerprint(
+                    position_data
+                ):
+                    contents.append((name, None, None))
+                    continue
+                if stored_fingerprint == '':
+                    logger.info(
+                        f'Regenerating RT measurement archive {name}.archive.json '
+                        'written without a source fingerprint.'
                     )
-                    # Set positions after creation (inherited from MappingResult)
-                    if multi_measurement.position_x is not None:
-                        result.x_absolute = multi_measurement.position_x * ureg('mm')
-                        result.x_relative = multi_measurement.position_x * ureg('mm')
-                    if multi_measurement.position_y is not None:
-                        result.y_absolute = multi_measurement.position_y * ureg('mm')
-                        result.y_relative = multi_measurement.position_y * ureg('mm')
-
-                    # Create spectra from measurements
-                    spectra = []
-                    for single_meas in multi_measurement.measurements:
-                        # Determine spectrum type from metadata
-                        meas_type = single_meas.metadata.get(
-                            'MeasurementType', 'Unknown'
-                        )
-                        if meas_type == 'T':
-                            spectrum_type = 'Transmission'
-                        elif meas_type == 'R':
-                            spectrum_type = 'Reflection'
-                        else:
-                            logger.warning(f'Unknown measurement type: {meas_type}')
-                            continue
-
-                        # Create spectrum object
-                        spectrum = RTSpectrum(
-                            spectrum_type=spectrum_type,
-                            wavelength=(
-                                single_meas.data['Wavelength'].values * ureg('nm')
-                            ),
-                            intensity=single_meas.data['Intensity'].values / 100.0,
-                        )
-
-                        # Extract measurement geometry from metadata
-                        if 'DetectorAngle' in single_meas.metadata:
-                            spectrum.detector_angle = float(
-                                single_meas.metadata['DetectorAngle']
-                            ) * ureg('degree')
-                        if 'SampleAngle' in single_meas.metadata:
-                            spectrum.sample_angle = float(
-                                single_meas.metadata['SampleAngle']
-                            ) * ureg('degree')
-                        if 'Polarization' in single_meas.metadata:
-                            logger.debug(single_meas.metadata['PolarizationAngle'])
-                            logger.debug(single_meas.metadata['Polarization'])
-                            spectrum.polarization = single_meas.metadata['Polarization']
-
-                        spectra.append(spectrum)
 
-                    result.spectra = spectra
-
-                    # Verify positions were set correctly before adding to results
-                    results.append(result)
-
-                measurement.results = results
-                measurement.accessory = 'UMA'
-
-                # Log positions from results after assignment
-                # Results are stored in the archive via create_archive
-
-                # Link to sample using lab_id (optional - can be set manually later)
-                measurement.samples = [CompositeSystemReference(lab_id=library_id)]
-
-                # Create archive file for this measurement with datetime identifier
-                measurement_ref = create_archive(
-                    measurement,
-                    archive,
-                    f'{library_id}_rt_measurement_{datetime_label}.archive.json',
+                data, spectra = self._library_archive_data(
+                    library_id, position_data, datetime_label, logger
                 )
+                contents.append((name, data, spectra))
 
-                measurements.append(
-                    ExperimentStep(
-                        name=f'{library_id}_rt_measurement_{datetime_label}',
-                        activity=measurement_ref,
-                    )
-                )
+            references = self._write_archives(archive, contents, logger)
+            measurements = [
+                ExperimentStep(name=name, activity=reference)
+                for (name, _, _), reference in zip(contents, references)
+            ]
 
             self.steps = measurements
 
@@ -578,15 +721,62 @@ class DtuAutosamplerMeasurement(Experiment, PlotSection, Schema):
             self.figures = []
             self.plot_grid(archive, logger)
 
+            written = sum(data is not None for _, data, _ in contents)
             logger.info(
-                f'Created {len(measurements)} RT measurement archives '
-                f'from autosampler data.'
+                f'Created {written} of {len(measurements)} RT measurement '
+                f'archives from autosampler data.'
             )
 
         except Exception as e:
             logger.error(f'Error parsing autosampler data: {e}', exc_info=True)
 
 
+def write_spectra_file(
+    archive: 'EntryArchive',
+    file_name: str,
+    wavelength: np.ndarray,
+    intensity: np.ndarray,
+    position_offsets: np.ndarray,
+) -> None:
+    """
+    Write the spectra of an RT measurement to an HDF5 raw file.
+
+    The file holds the intensities of all spectra as rows of one array
+    (`intensity`), their wavelength axis (`wavelength`, one row per spectrum
+    or a single row shared by all of them) and the first row of each result
+    (`position_offsets`, with the total number of rows as last element).
+    """
+    with (
+        archive.m_context.raw_file(file_name, 'wb') as raw_file,
+        h5py.File(raw_file, 'w') as h5_file,
+    ):
+        h5_file.create_dataset('wavelength', data=wavelength)
+        h5_file['wavelength'].attrs['units'] = 'nm'
+        h5_file.create_dataset('intensity', data=intensity)
+        h5_file.create_dataset('position_offsets', data=position_offsets)
+
+
+def _window_index(wavelength: np.ndarray, wv_start: float, wv_end: float):
+    """
+    Index of the points of a wavelength axis within wv_start-wv_end. Monotonic
+    axes, like the descending ones exported by the Cary, are searched with
+    searchsorted and give a slice, other axes give a boolean mask.
+    """
+    steps = np.diff(wavelength)
+    if np.all(steps > 0):
+        return slice(
+            np.searchsorted(wavelength, wv_start, side='left'),
+            np.searchsorted(wavelength, wv_end, side='right'),
+        )
+    if np.all(steps < 0):
+        ascending = wavelength[::-1]
+        return slice(
+            len(wavelength) - np.searchsorted(ascending, wv_end, side='right'),
+            len(wavelength) - np.searchsorted(ascending, wv_start, side='left'),
+        )
+    return (wavelength >= wv_start) & (wavelength <= wv_end)
+
+
 class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
     m_def = Section(
         categories=[DTUNanolabCategory],
@@ -597,6 +787,9 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
     WAVELENGTH_MIN = 400  # nm
     WAVELENGTH_MAX = 800  # nm
 
+    # Maximum number of single-point csv files parsed at the same time
+    MAX_PARSE_WORKERS = 8
+
     results = SubSection(
         section_def=RTResult,
         repeats=True,
@@ -606,6 +799,27 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
         description='The alignment of the sample.',
     )
 
+    spectra_file = Quantity(
+        type=str,
+        a_browser=BrowserAnnotation(adaptor='RawFileAdaptor'),
+        description=(
+            'HDF5 file holding the wavelength and intensity arrays of all '
+            'spectra, written for measurements created from autosampler data. '
+            'The spectra then only store their row in this file, which is read '
+            'when the arrays are needed.'
+        ),
+    )
+
+    source_fingerprint = Quantity(
+        type=str,
+        description=(
+            'Fingerprint of the autosampler collects this measurement was '
+            'created from (see `autosampler_reader.library_fingerprint`). The '
+            'autosampler measurement only regenerates this archive when the '
+            'fingerprint of its library changes.'
+        ),
+    )
+
     accessory = Quantity(
         type=MEnum('UMA', 'DRA', 'None'),
         default='None',
@@ -686,7 +900,166 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
         ),
     )
 
-    def plot(self) -> None:
+    @staticmethod
+    def _config_key(spectrum: RTSpectrum) -> tuple:
+        """
+        Measurement configuration of a spectrum: spectrum type, detector angle
+        and sample angle in degrees and polarization.
+        """
+        detector_angle = getattr(spectrum, 'detector_angle', None)
+        sample_angle = getattr(spectrum, 'sample_angle', None)
+        polarization = getattr(spectrum, 'polarization', None)
+
+        # angles are stored in degrees, the unit of the quantities
+        det_val = detector_angle.magnitude if detector_angle is not None else None
+        samp_val = sample_angle.magnitude if sample_angle is not None else None
+        pol_val = polarization if polarization else 'unknown'
+
+        return (spectrum.spectrum_type, det_val, samp_val, pol_val)
+
+    def _stored_in_file(
+        self, spectrum: RTSpectrum, archive: 'EntryArchive | None'
+    ) -> bool:
+        """
+        Whether the arrays of the spectrum can be read from the spectra file.
+        """
+        return (
+            archive is not None
+            and self.spectra_file is not None
+            and spectrum.spectrum_index is not None
+        )
+
+    def read_spectra(
+        self, spectra: list[RTSpectrum], archive: 'EntryArchive | None' = None
+    ) -> list[tuple[np.ndarray, np.ndarray] | None]:
+        """
+        Wavelength (in nm) and intensity arrays of the given spectra, or None for
+        spectra without data.
+
+        The arrays of spectra stored in the spectra file are read from it,
+        which requires the archive of the measurement. Only the rows of the
+        requested spectra are read.
+        """
+        arrays = [
+            (spectrum.wavelength.magnitude, spectrum.intensity)
+            if spectrum.wavelength is not None and spectrum.intensity is not None
+            else None
+            for spectrum in spectra
+        ]
+        stored = [
+            position
+            for position, spectrum in enumerate(spectra)
+            if arrays[position] is None and self._stored_in_file(spectrum, archive)
+        ]
+        if not stored:
+            return arrays
+
+        with (
+            archive.m_context.raw_file(self.spectra_file, 'rb') as raw_file,
+            h5py.File(raw_file, 'r') as h5_file,
+        ):
+            wavelength = h5_file['wavelength']
+            shared_wavelength = wavelength[()] if wavelength.ndim == 1 else None
+            for position in stored:
+                row = spectra[position].spectrum_index
+                arrays[position] = (
+                    shared_wavelength
+                    if shared_wavelength is not None
+                    else wavelength[row],
+                    h5_file['intensity'][row],
+                )
+        return arrays
+
+    def set_average_intensities(self, archive: 'EntryArchive | None' = None) -> None:
+        """
+        Set the average intensity of all spectra over the wavelength range
+        defined by the WAVELENGTH_MIN-WAVELENGTH_MAX class constants.
+
+        For spectra stored in the spectra file only the window of the shared
+        wavelength axis is read, for all rows at once. Of the other spectra,
+        those measured on the wavelength grid of the first one are averaged
+        together: the window is looked up once on that grid and the averages
+        are taken on the stacked intensities. Spectra on other grids are
+        averaged one by one.
+        """
+        grid = None
+        shared = []
+        stored = []
+        for result in self.results:
+            for spectrum in result.spectra:
+                if spectrum.wavelength is None or spectrum.intensity is None:
+                    spectrum.average_intensity = None
+                    if self._stored_in_file(spectrum, archive):
+                        stored.append(spectrum)
+                    continue
+
+                # wavelengths are stored in nm, the unit of the quantity
+                wavelength = spectrum.wavelength.magnitude
+                if grid is None:
+                    grid = wavelength
+                on_grid = np.array_equal(wavelength, grid)
+                if on_grid and len(spectrum.intensity) == len(grid):
+                    shared.append(spectrum)
+                    continue
+
+                self._set_average_intensity(spectrum, wavelength, spectrum.intensity)
+
+        if stored:
+            self._set_stored_average_intensities(stored, archive)
+        if not shared:
+            return
+        window = _window_index(grid, self.WAVELENGTH_MIN, self.WAVELENGTH_MAX)
+        intensity = np.vstack([spectrum.intensity for spectrum in shared])[:, window]
+        averages = (
+            np.mean(intensity, axis=1) if intensity.shape[1] else [None] * len(shared)
+        )
+        for spectrum, average in zip(shared, averages):
+            spectrum.average_intensity = average
+
+    def _set_average_intensity(
+        self, spectrum: RTSpectrum, wavelength: np.ndarray, intensity: np.ndarray
+    ) -> None:
+        """
+        Set the window average of one spectrum from its arrays.
+        """
+        window = _window_index(wavelength, self.WAVELENGTH_MIN, self.WAVELENGTH_MAX)
+        intensity = intensity[window]
+        spectrum.average_intensity = (
+            float(np.mean(intensity)) if intensity.size else None
+        )
+
+    def _set_stored_average_intensities(
+        self, spectra: list[RTSpectrum], archive: 'EntryArchive'
+    ) -> None:
+        """
+        Set the window averages of spectra stored in the spectra file.
+        """
+        with (
+            archive.m_context.raw_file(self.spectra_file, 'rb') as raw_file,
+            h5py.File(raw_file, 'r') as h5_file,
+        ):
+            wavelength = h5_file['wavelength']
+            if wavelength.ndim > 1:
+                for spectrum in spectra:
+                    row = spectrum.spectrum_index
+                    self._set_average_intensity(
+                        spectrum, wavelength[row], h5_file['intensity'][row]
+                    )
+                return
+
+            window = _window_index(
+                wavelength[()], self.WAVELENGTH_MIN, self.WAVELENGTH_MAX
+            )
+            if isinstance(window, np.ndarray):
+                window = np.flatnonzero(window)
+            # only the columns of the window are read from the file
+            intensity = h5_file['intensity'][:, window]
+
+        for spectrum in spectra:
+            values = intensity[spectrum.spectrum_index]
+            spectrum.average_intensity = float(np.mean(values)) if values.size else None
+
+    def plot(self, archive: 'EntryArchive | None' = None) -> None:
         """
         Create interactive Plotly visualizations of RT measurement data.
 
@@ -703,7 +1076,8 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
         """
         import plotly.graph_objs as go
         from nomad.datamodel.metainfo.plot import PlotlyFigure
-        from scipy.interpolate import griddata
+        from scipy.interpolate import LinearNDInterpolator
+        from scipy.spatial import Delaunay
 
         if not self.results:
             return
@@ -712,68 +1086,65 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
         fig_spectra = go.Figure()
 
         MAX_TRACES = 25  # Limit traces for performance
-        trace_count = 0
         max_traces_reached = False
 
+        # Spectra with data to show, only their arrays are read
+        traced = []
         for result in self.results:
             if max_traces_reached:
                 break
 
-            position_label = result.name or 'Unknown'
-
             for spectrum in result.spectra:
-                if trace_count >= MAX_TRACES:
+                if len(traced) >= MAX_TRACES:
                     max_traces_reached = True
                     break
 
-                if spectrum.wavelength is None or spectrum.intensity is None:
-                    continue
-
-                # Convert wavelength to nm if it's a Quantity
-                if hasattr(spectrum.wavelength, 'magnitude'):
-                    wavelength = spectrum.wavelength.to('nm').magnitude
-                else:
-                    wavelength = spectrum.wavelength
+                has_arrays = (
+                    spectrum.wavelength is not None and spectrum.intensity is not None
+                )
+                if has_arrays or self._stored_in_file(spectrum, archive):
+                    traced.append((result, spectrum))
 
-                intensity = spectrum.intensity
-                spectrum_type = spectrum.spectrum_type or 'Unknown'
+        arrays = self.read_spectra([spectrum for _, spectrum in traced], archive)
+        for (result, spectrum), (wavelength, intensity) in zip(traced, arrays):
+            position_label = result.name or 'Unknown'
+            spectrum_type = spectrum.spectrum_type or 'Unknown'
 
-                detector_label = (
-                    f'{spectrum.detector_angle.to("degree").magnitude:g} deg'
-                    if getattr(spectrum, 'detector_angle', None) is not None
-                    else 'n/a'
-                )
-                sample_label = (
-                    f'{spectrum.sample_angle.to("degree").magnitude:g} deg'
-                    if getattr(spectrum, 'sample_angle', None) is not None
-                    else 'n/a'
-                )
-                polarization_label = spectrum.polarization or 'n/a'
+            detector_label = (
+                f'{spectrum.detector_angle.to("degree").magnitude:g} deg'
+                if getattr(spectrum, 'detector_angle', None) is not None
+                else 'n/a'
+            )
+            sample_label = (
+                f'{spectrum.sample_angle.to("degree").magnitude:g} deg'
+                if getattr(spectrum, 'sample_angle', None) is not None
+                else 'n/a'
+            )
+            polarization_label = spectrum.polarization or 'n/a'
 
-                # Create trace label with position and type
-                trace_name = (
-                    f'{position_label}_{spectrum_type} '
-                    f'({detector_label}, {sample_label}, {polarization_label})'
-                )
+            # Create trace label with position and type
+            trace_name = (
+                f'{position_label}_{spectrum_type} '
+                f'({detector_label}, {sample_label}, {polarization_label})'
+            )
 
-                # Use different colors/styles for R vs T
-                line_style = dict()
-                if spectrum_type == 'Reflection':
-                    line_style['dash'] = 'solid'
-                elif spectrum_type == 'Transmission':
-                    line_style['dash'] = 'dot'
+            # Use different colors/styles for R vs T
+            line_style = dict()
+            if spectrum_type == 'Reflection':
+                line_style['dash'] = 'solid'
+            elif spectrum_type == 'Transmission':
+                line_style['dash'] = 'dot'
 
-                fig_spectra.add_trace(
-                    go.Scatter(
-                        x=wavelength,
-                        y=intensity,
-                        mode='lines',
-                        name=trace_name,
-                        line=line_style,
-                        hoverlabel=dict(namelength=-1),
-                    )
+            fig_spectra.add_trace(
+                go.Scatter(
+                    x=wavelength,
+                    y=intensity,
+                    mode='lines',
+                    name=trace_name,
+                    line=line_style,
+                    hoverlabel=dict(namelength=-1),
                 )
-                trace_count += 1
+            )
 
         # Update title to indicate if traces were limited
         title = 'Reflection (solid) and Transmission (dot) Spectra'
@@ -806,72 +1177,24 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
         # polarization) gets its own heatmap
 
         spectrum_configs = {}
+        position_averages = []
+        positions = []
 
         for result in self.results:
+            # Average of each configuration at this position, taken from the
+            # first spectrum of the configuration with an average
+            averages = {}
             for spectrum in result.spectra:
                 if spectrum.spectrum_type:
-                    # Create a unique key for this spectrum configuration
-                    detector_angle = getattr(spectrum, 'detector_angle', None)
-                    sample_angle = getattr(spectrum, 'sample_angle', None)
-                    polarization = getattr(spectrum, 'polarization', None)
-
-                    det_val = (
-                        detector_angle.to('degree').magnitude
-                        if detector_angle is not None
-                        else None
-                    )
-                    samp_val = (
-                        sample_angle.to('degree').magnitude
-                        if sample_angle is not None
-                        else None
-                    )
-                    pol_val = polarization if polarization else 'unknown'
-
-                    config_key = (spectrum.spectrum_type, det_val, samp_val, pol_val)
-
+                    config_key = self._config_key(spectrum)
                     if config_key not in spectrum_configs:
                         spectrum_configs[config_key] = []
+                    if (
+                        config_key not in averages
+                        and spectrum.average_intensity is not None
+                    ):
+                        averages[config_key] = spectrum.average_intensity
 
-        # Collect position and average data for each spectrum configuration
-        def compute_avg_for_config(result: RTResult, config_key: tuple) -> float:
-            """Compute average intensity for a specific spectrum configuration."""
-            wv_start = self.WAVELENGTH_MIN
-            wv_end = self.WAVELENGTH_MAX
-            spectrum_type, det_angle, samp_angle, pol = config_key
-
-            for spectrum in result.spectra:
-                if spectrum.spectrum_type != spectrum_type:
-                    continue
-
-                # Match all configuration parameters
-                det_val = getattr(spectrum, 'detector_angle', None)
-                det_val = (
-                    det_val.to('degree').magnitude if det_val is not None else None
-                )
-                samp_val = getattr(spectrum, 'sample_angle', None)
-                samp_val = (
-                    samp_val.to('degree').magnitude if samp_val is not None else None
-                )
-                pol_val = getattr(spectrum, 'polarization', None) or 'unknown'
-
-                if det_val == det_angle and samp_val == samp_angle and pol_val == pol:
-                    if spectrum.wavelength is None or spectrum.intensity is None:
-                        continue
-
-                    if hasattr(spectrum.wavelength, 'magnitude'):
-                        wavelength = spectrum.wavelength.to('nm').magnitude
-                    else:
-                        wavelength = spectrum.wavelength
-
-                    mask = (wavelength >= wv_start) & (wavelength <= wv_end)
-                    if np.any(mask):
-                        return float(np.mean(spectrum.intensity[mask]))
-
-            return np.nan
-
-        # Populate data for each configuration
-        positions = []
-        for result in self.results:
             pos_x_attr = getattr(result, 'x_absolute', None)
             pos_y_attr = getattr(result, 'y_absolute', None)
 
@@ -887,11 +1210,12 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
                     pos_y = pos_y_attr
 
                 positions.append((pos_x, pos_y))
+                position_averages.append(averages)
 
-                # Compute average for each spectrum configuration
-                for config_key, config_values in spectrum_configs.items():
-                    avg_val = compute_avg_for_config(result, config_key)
-                    config_values.append(avg_val)
+        # Populate data for each configuration
+        for averages in position_averages:
+            for config_key, config_values in spectrum_configs.items():
+                config_values.append(averages.get(config_key, np.nan))
 
         if positions:
             # Create heatmap for each unique spectrum configuration
@@ -903,6 +1227,14 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
             unique_y = len(set(pos_y_vals))
 
             if unique_x > 1 and unique_y > 1:
+                # Create interpolation grid for smooth heatmap
+                xi = np.linspace(min(pos_x_vals), max(pos_x_vals), 100)
+                yi = np.linspace(min(pos_y_vals), max(pos_y_vals), 100)
+                xi, yi = np.meshgrid(xi, yi)
+                # All configurations are interpolated on the same triangulation
+                # of the positions, it is built for the first heatmap
+                triangulation = None
+
                 # 2D heatmap for each spectrum configuration
                 for config_key, values in spectrum_configs.items():
                     if not all(np.isnan(values)):
@@ -927,16 +1259,11 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
                             f'{spectrum_type[0]} {det_str}_{samp_str}_{pol_str}'
                         )
 
-                        # Create interpolation grid for smooth heatmap
-                        xi = np.linspace(min(pos_x_vals), max(pos_x_vals), 100)
-                        yi = np.linspace(min(pos_y_vals), max(pos_y_vals), 100)
-                        xi, yi = np.meshgrid(xi, yi)
-                        zi = griddata(
-                            (pos_x_vals, pos_y_vals),
-                            values,
-                            (xi, yi),
-                            method='linear',
-                        )
+                        if triangulation is None:
+                            triangulation = Delaunay(
+                                np.column_stack([pos_x_vals, pos_y_vals])
+                            )
+                        zi = LinearNDInterpolator(triangulation, values)(xi, yi)
 
                         # Create heatmap trace
                         heatmap = go.Heatmap(
@@ -1055,6 +1382,40 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
                             )
                         )
 
+    def _parse_data_files(
+        self, files: list[str], archive: 'EntryArchive', logger: 'BoundLogger'
+    ) -> list[list]:
+        """
+        Parse the single-point csv files with the autosampler_reader.
+
+        The files are parsed concurrently by up to MAX_PARSE_WORKERS threads.
+        The measurements are returned in the order of the files. A file that
+        cannot be parsed is logged and gives no measurements, the other files
+        are still used.
+        """
+
+        def parse(file_name: str) -> list:
+            with archive.m_context.raw_file(file_name) as raw_file:
+                return autosampler_reader.parse_file(
+                    raw_file.name, parse_sequence=False
+                )
+
+        workers = max(1, min(self.MAX_PARSE_WORKERS, len(files)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(parse, file_name) for file_name in files]
+
+        parsed = []
+        for file_name, future in zip(files, futures):
+            try:
+                parsed.append(future.result())
+            except Exception as e:
+                logger.error(
+                    f'Error parsing csv {file_name} with autosampler_reader: {e}',
+                    exc_info=True,
+                )
+                parsed.append([])
+        return parsed
+
     def normalize(self, archive: 'EntryArchive', logger: 'BoundLogger') -> None:
         """
         The normalizer for the `RTMeasurement` class.
@@ -1074,15 +1435,8 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
                 spectra_all = []
                 any_angle_meta = False
 
-                for f in files:
-                    with archive.m_context.raw_file(f) as rf:
-                        # try to parse with sequence parsing first,
-                        # if it fails, fallback to non-sequence parsing
-
-                        collects = autosampler_reader.parse_file(
-                            rf.name, parse_sequence=False
-                        )
-
+                parsed = self._parse_data_files(files, archive, logger)
+                for f, collects in zip(files, parsed):
                     for single_meas in collects:
                         meas_type = single_meas.metadata.get(
                             'MeasurementType', 'Unknown'
@@ -1097,28 +1451,27 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
                         else:
                             spectrum_type = 'Reflection'
 
-                        wavelength = single_meas.data.get('Wavelength')
-                        intensity = single_meas.data.get('Intensity')
+                        wavelength = single_meas.wavelength
+                        intensity = single_meas.intensity
                         if wavelength is None or intensity is None:
                             continue
 
                         # convert to fraction (intensity is in percent)
-                        intensity_arr = intensity / 100.0
+                        intensity_arr = intensity.astype(np.float64) / 100.0
 
+                        # wavelength in nm, the unit of the schema
                         spectrum = RTSpectrum(
                             spectrum_type=spectrum_type,
-                            wavelength=(wavelength.values * ureg('nm'))
-                            if hasattr(wavelength, 'values')
-                            else (np.asarray(wavelength) * ureg('nm')),
+                            wavelength=wavelength,
                             intensity=intensity_arr,
                         )
 
-                        # attach geometry metadata when present
+                        # attach geometry metadata when present (in degrees)
                         if 'DetectorAngle' in single_meas.metadata:
                             try:
                                 spectrum.detector_angle = float(
                                     single_meas.metadata['DetectorAngle']
-                                ) * ureg('degree')
+                                )
                                 any_angle_meta = True
                             except Exception:
                                 pass
@@ -1126,7 +1479,7 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
                             try:
                                 spectrum.sample_angle = float(
                                     single_meas.metadata['SampleAngle']
-                                ) * ureg('degree')
+                                )
                                 any_angle_meta = True
                             except Exception:
                                 pass
@@ -1180,7 +1533,8 @@ class RTMeasurement(DtuNanolabMeasurement, PlotSection, Schema):
 
         self.figures = []
         if len(self.results) > 0:
-            self.plot()
+            self.set_average_intensities(archive)
+            self.plot(archive)
 
 
 m_package.__init_metainfo__()
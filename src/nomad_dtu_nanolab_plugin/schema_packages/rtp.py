@@ -1,4 +1,5 @@
 import logging
+import os
 import re
 import tempfile
 import time
@@ -80,6 +81,11 @@ SCCM_TO_M3_S = 1e-6 / 60
 CELSIUS_TO_KELVIN_OFFSET = 273.15
 
 
+# Maximum number of directory indexes kept alive per worker process. Each
+# upload (and each local `.volumes/fs` tree) gets one entry.
+RAW_FILE_INDEX_CACHE_SIZE = 32
+
+
 def _warn_once(obj, key: str, logger, message: str) -> None:
     """Emit a warning only once per object instance for a given key."""
     if getattr(obj, key, False):
@@ -88,6 +94,194 @@ def _warn_once(obj, key: str, logger, message: str) -> None:
     setattr(obj, key, True)
 
 
+class _RawFileIndex:
+    """Basename and extension index over all files below one directory.
+
+    Replaces repeated `raw_file()` probing and `rglob` scans when resolving
+    log-file paths: the tree is listed once, after which every lookup is a
+    dictionary access. Paths are stored relative to the indexed root using
+    '/' separators, i.e. in the same form `archive.m_context.raw_file`
+    expects.
+
+    The modification time of every directory is recorded while listing.
+    Adding, removing or renaming a file changes the mtime of its parent
+    directory, so `is_stale()` detects any change of the file listing with
+    one `stat` per directory instead of a full re-listing.
+    """
+
+    def __init__(
+        self,
+        root: Path | None,
+        files: dict[str, float],
+        dir_mtimes: dict[str, int] | None = None,
+    ) -> None:
+        self.root = root
+        # Relative path -> modification time (0.0 if unknown).
+        self.files = files
+        self.dir_mtimes = dir_mtimes or {}
+        self.by_name: dict[str, list[str]] = {}
+        self.by_suffix: dict[str, list[str]] = {}
+        for rel_path in files:
+            name = rel_path.rsplit('/', 1)[-1]
+            self.by_name.setdefault(name, []).append(rel_path)
+            suffix = Path(name).suffix.lower().lstrip('.')
+            self.by_suffix.setdefault(suffix, []).append(rel_path)
+
+    @classmethod
+    def from_directory(cls, root: Path) -> '_RawFileIndex':
+        """List `root` recursively and index every regular file."""
+        files: dict[str, float] = {}
+        dir_mtimes: dict[str, int] = {}
+        for dirpath, _dirnames, filenames in os.walk(root):
+            try:
+                dir_mtimes[dirpath] = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                continue
+            rel_dir = Path(dirpath).relative_to(root).as_posix()
+            for filename in filenames:
+                try:
+                    mtime = os.stat(os.path.join(dirpath, filename)).st_mtime
+                except OSError:
+                    continue
+                rel_path = filename if rel_dir == '.' else f'{rel_dir}/{filename}'
+                files[rel_path] = mtime
+        return cls(root, files, dir_mtimes)
+
+    @classmethod
+    def from_listing(cls, paths: list[str]) -> '_RawFileIndex':
+        """Index a plain list of upload-relative paths (no mtimes available)."""
+        return cls(None, {path: 0.0 for path in paths})
+
+    def is_stale(self) -> bool:
+        """Return True if any indexed directory changed since listing."""
+        if self.root is None:
+            # Plain listings cannot be revalidated cheaply.
+            return True
+        for dirpath, mtime_ns in self.dir_mtimes.items():
+            try:
+                if os.stat(dirpath).st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _newest(self, rel_paths: list[str]) -> str:
+        # Prefer the most recently modified file; ties fall back to the
+        # lexicographically last path so the result is deterministic.
+        return max(rel_paths, key=lambda p: (self.files.get(p, 0.0), p))
+
+    def find(
+        self,
+        candidates: list[str],
+        predicate=None,
+        match_basename: bool = True,
+    ) -> str | None:
+        """Return the indexed path for the first matching candidate.
+
+        Exact relative paths are tried before basename matches, mirroring the
+        order in which the candidates were generated. `predicate` optionally
+        restricts the matches (e.g. to files inside a 'raw' folder). With
+        `match_basename=False` only exact relative paths match, as with
+        `raw_file()`.
+        """
+        for candidate in candidates:
+            if candidate in self.files and (predicate is None or predicate(candidate)):
+                return candidate
+        if not match_basename:
+            return None
+        for candidate in candidates:
+            hits = self.by_name.get(candidate.rsplit('/', 1)[-1], [])
+            if predicate is not None:
+                hits = [hit for hit in hits if predicate(hit)]
+            if hits:
+                return self._newest(hits)
+        return None
+
+    def find_by_suffix(
+        self,
+        suffix: str,
+        name_markers: tuple[str, ...] = (),
+        predicate=None,
+    ) -> str | None:
+        """Return the newest file with `suffix`, preferring conventional names.
+
+        Files whose lower-cased name contains any of `name_markers` win over
+        other files with the same extension.
+        """
+        hits = self.by_suffix.get(suffix.lower().lstrip('.'), [])
+        if predicate is not None:
+            hits = [hit for hit in hits if predicate(hit)]
+        if not hits:
+            return None
+        preferred = [
+            hit
+            for hit in hits
+            if any(m in hit.rsplit('/', 1)[-1].lower() for m in name_markers)
+        ]
+        return self._newest(preferred or hits)
+
+
+# Directory indexes keyed by absolute root path, reused across normalizations
+# of the same upload until the directory listing changes.
+_RAW_FILE_INDEXES: dict[str, _RawFileIndex] = {}
+
+
+def _get_directory_index(root: Path) -> _RawFileIndex:
+    """Return a cached index for `root`, rebuilding it if the listing changed."""
+    key = str(root)
+    index = _RAW_FILE_INDEXES.get(key)
+    if index is None or index.is_stale():
+        index = _RawFileIndex.from_directory(root)
+        _RAW_FILE_INDEXES.pop(key, None)
+        _RAW_FILE_INDEXES[key] = index
+        # Evict the oldest entries (dicts keep insertion order).
+        while len(_RAW_FILE_INDEXES) > RAW_FILE_INDEX_CACHE_SIZE:
+            _RAW_FILE_INDEXES.pop(next(iter(_RAW_FILE_INDEXES)))
+    return index
+
+
+def _get_upload_raw_file_index(archive: 'EntryArchive') -> _RawFileIndex | None:
+    """Return an index over the raw files of the archive's upload.
+
+    The raw directory is located from the processing context: the upload's
+    raw folder on the server, or the local directory used by the NOMAD
+    client and local parsing. If the raw files are not on a local disk, the
+    upload is listed once through its `upload_files` object instead. Returns
+    None if the context offers no way to list the upload.
+    """
+    context = getattr(archive, 'm_context', None)
+    if context is None:
+        return None
+
+    root = None
+    upload_files = getattr(context, 'upload_files', None)
+    if upload_files is not None:
+        try:
+            root = Path(context.raw_path())
+        except Exception:
+            root = None
+    elif getattr(context, 'local_dir', None):
+        root = Path(context.local_dir)
+    elif getattr(context, '_mainfile_dir', None) is not None:
+        root = Path(context._mainfile_dir)
+
+    if root is not None and root.is_dir():
+        return _get_directory_index(root.resolve())
+
+    if upload_files is not None:
+        list_dir = getattr(upload_files, 'raw_listdir', None) or getattr(
+            upload_files, 'raw_directory_list', None
+        )
+        if list_dir is not None:
+            try:
+                return _RawFileIndex.from_listing(
+                    [info.path for info in list_dir(recursive=True, files_only=True)]
+                )
+            except Exception:
+                return None
+    return None
+
+
 #################### DEFINE INPUT_SAMPLES (SUBSECTION) ######################
 class DtuRTPInputSampleMounting(ArchiveSection):
     """
@@ -2218,6 +2412,40 @@ class DtuRTP(ChemicalVaporDeposition, PlotSection, Schema):
                     deduped.append(candidate)
             return deduped
 
+        # Plausible repo/processing root directories to resolve relative
+        # paths against, ordered from most to least specific. The
+        # parents[N] indices depend on this file's location within the
+        # plugin's package structure.
+        base_dirs = [
+            Path.cwd(),
+            Path(__file__).resolve().parents[5],
+            Path(__file__).resolve().parents[4],
+            Path(__file__).resolve().parents[3],
+            Path(__file__).resolve().parents[4] / 'nomad-FAIR',
+        ]
+
+        # Index the upload's raw files once for this run; all tiers below
+        # are answered from cached indexes instead of probing the storage.
+        upload_index = _get_upload_raw_file_index(archive)
+
+        def _fs_indexes() -> list[_RawFileIndex]:
+            """Indexes of the local `.volumes/fs` trees, built lazily."""
+            indexes = []
+            for base in base_dirs:
+                try:
+                    fs_root = (base / '.volumes' / 'fs').resolve()
+                    if fs_root.is_dir():
+                        indexes.append(_get_directory_index(fs_root))
+                except Exception:
+                    continue
+            return indexes
+
+        def _in_raw_folder(rel_path: str) -> bool:
+            return 'raw' in rel_path.split('/')
+
+        def _in_staging_raw_folder(rel_path: str) -> bool:
+            return rel_path.startswith('staging/') and _in_raw_folder(rel_path)
+
         def _resolve_input_path(
             path_value: str, expected_suffix: str
         ) -> tuple[str, str]:
@@ -2234,8 +2462,17 @@ class DtuRTP(ChemicalVaporDeposition, PlotSection, Schema):
             filesystem path), and ref is the corresponding reference/path.
             """
             # Tier 1: try every candidate variant of the path against
-            # NOMAD's own raw-file storage - the expected/normal case.
+            # NOMAD's own raw-file storage - the expected/normal case. The
+            # upload index answers the same exact-path lookups as raw_file()
+            # without opening files; on a miss raw_file() is still asked, so
+            # its error is reported if nothing else is found.
             last_exc: Exception | None = None
+            if upload_index is not None:
+                hit = upload_index.find(
+                    _candidate_raw_paths(path_value), match_basename=False
+                )
+                if hit is not None:
+                    return ('raw', hit)
             for candidate in _candidate_raw_paths(path_value):
                 try:
                     with archive.m_context.raw_file(candidate, 'r'):
@@ -2248,18 +2485,6 @@ class DtuRTP(ChemicalVaporDeposition, PlotSection, Schema):
             fs_candidates = _candidate_raw_paths(path_value)
             fs_candidates.insert(0, _sanitize_path_value(path_value))
 
-            # Plausible repo/processing root directories to resolve relative
-            # paths against, ordered from most to least specific. The
-            # parents[N] indices depend on this file's location within the
-            # plugin's package structure.
-            base_dirs = [
-                Path.cwd(),
-                Path(__file__).resolve().parents[5],
-                Path(__file__).resolve().parents[4],
-                Path(__file__).resolve().parents[3],
-                Path(__file__).resolve().parents[4] / 'nomad-FAIR',
-            ]
-
             # Tier 2: try each candidate path directly on disk (absolute),
             # or resolved relative to each base directory.
             for candidate in fs_candidates:
@@ -2280,87 +2505,39 @@ class DtuRTP(ChemicalVaporDeposition, PlotSection, Schema):
 
             # Final fallback: find staged file by basename under .volumes staging.
             filename = _sanitize_path_value(path_value).rsplit('/', 1)[-1]
+            fs_indexes = _fs_indexes()
             if filename:
                 # Tier 3: search NOMAD's staging area specifically (files
                 # not yet promoted to a final "raw" location), restricted
                 # to paths that contain a 'raw' directory component to avoid
                 # matching unrelated staged files with the same basename.
-                for base in base_dirs:
-                    try:
-                        staging_root = (base / '.volumes' / 'fs' / 'staging').resolve()
-                        if not staging_root.exists():
-                            continue
-                        for hit in staging_root.rglob(filename):
-                            if hit.is_file() and 'raw' in hit.parts:
-                                return ('fs', str(hit))
-                    except Exception:
-                        continue
-
-                # Broader fallback inspired by sputter parser pragmatism:
-                # search all known .volumes/fs trees regardless of subfolder.
-                for base in base_dirs:
-                    try:
-                        fs_root = (base / '.volumes' / 'fs').resolve()
-                        if not fs_root.exists():
-                            continue
-                        for hit in fs_root.rglob(filename):
-                            if hit.is_file():
-                                return ('fs', str(hit))
-                    except Exception:
-                        continue
+                # Then, as a broader fallback inspired by sputter parser
+                # pragmatism, search all known .volumes/fs trees regardless
+                # of subfolder.
+                for predicate in (_in_staging_raw_folder, None):
+                    for fs_index in fs_indexes:
+                        hit = fs_index.find([filename], predicate=predicate)
+                        if hit is not None:
+                            return ('fs', str(fs_index.root / hit))
 
             # Tier 4 (last resort): the exact filename couldn't be found
             # anywhere, so search by file extension and typical RTP naming
             # patterns instead, and use the most recently modified match.
-            # Format-driven fallback for variable file names:
-            # search latest matching file by expected extension and typical RTP naming.
+            # CSV files are expected to be Eklipse gas/pressure logs;
+            # anything else (txt) is expected to be a CX-Thermo diagnostics
+            # log. Files matching the naming convention for that kind of log
+            # are preferred over an arbitrary match.
             suffix = expected_suffix.lower().lstrip('.')
-            for base in base_dirs:
-                try:
-                    fs_root = (base / '.volumes' / 'fs').resolve()
-                    if not fs_root.exists():
-                        continue
-
-                    pattern = f'*.{suffix}'
-                    candidates = [
-                        hit
-                        for hit in fs_root.rglob(pattern)
-                        if hit.is_file() and 'raw' in hit.parts
-                    ]
-
-                    if not candidates:
-                        continue
-
-                    # CSV files are expected to be Eklipse gas/pressure
-                    # logs; anything else (txt) is expected to be a
-                    # CX-Thermo diagnostics log. Prefer files whose name
-                    # matches the typical naming convention for that kind
-                    # of log over an arbitrary match.
-                    if suffix == 'csv':
-                        preferred = [
-                            p
-                            for p in candidates
-                            if 'recording set' in p.name.lower()
-                            or '_rtp_' in p.name.lower()
-                        ]
-                    else:
-                        preferred = [
-                            p
-                            for p in candidates
-                            if 'logfile' in p.name.lower() or '_rtp_' in p.name.lower()
-                        ]
-
-                    # Use the naming-convention-preferred matches if any
-                    # were found, otherwise fall back to any file with the
-                    # right extension. Among the remaining candidates, pick
-                    # the most recently modified one, since that's most
-                    # likely to be the relevant/current log file when the
-                    # exact path couldn't be matched.
-                    pool = preferred if preferred else candidates
-                    newest = max(pool, key=lambda p: p.stat().st_mtime)
-                    return ('fs', str(newest))
-                except Exception:
-                    continue
+            if suffix == 'csv':
+                name_markers = ('recording set', '_rtp_')
+            else:
+                name_markers = ('logfile', '_rtp_')
+            for fs_index in fs_indexes:
+                hit = fs_index.find_by_suffix(
+                    suffix, name_markers, predicate=_in_raw_folder
+                )
+                if hit is not None:
+                    return ('fs', str(fs_index.root / hit))
 
             # Re-raise the most relevant raw-file error if available,
             # otherwise report the unresolved path directly.
@@ -0,0 +1,258 @@
+"""Synthetic autosampler data for benchmarking the autosampler reader.
+
+Writes a data file and a config (grid) file in the format exported by the
+Agilent Cary 7000 UMS autosampler and read by `autosampler_reader.parse_file`.
+Every position of every library is measured with the same UMA sequence: one
+collect per polarization and angle setting. The spectra of a thin film whose
+band gap varies across the libraries are used, so that the bandgap estimation
+finds an absorption edge at every position.
+
+Typical use:
+
+    # One run of 8 libraries with 5 x 5 positions, s and p polarized T and R
+    python tests/benchmarks/autosampler_synthetic.py out/ \
+        --libraries 8 --grid 5 5
+
+    # A single dense library with 1000 wavelengths and two reflection angles
+    python tests/benchmarks/autosampler_synthetic.py out/ \
+        --libraries 1 --grid 20 20 --wavelengths 1000 \
+        --angles 0,180,T 6,12,R 30,60,R
+"""
+
+import argparse
+import io
+import math
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+# Default UMA sequence: (sample angle, detector angle, measurement type)
+DEFAULT_ANGLES = ((0.0, 180.0, 'T'), (6.0, 12.0, 'R'))
+# Default polarizer angles, 0 and 90 degrees are s and p polarization.
+# Use ('None',) for unpolarized measurements.
+DEFAULT_POLARIZATIONS = ('0', '90')
+# Wavelength range of the exported spectra in nm (from long to short)
+WAVELENGTH_RANGE = (2500.0, 250.0)
+# Distance between two positions of a library grid in mm
+GRID_PITCH_MM = 4.0
+# Radius of the circle the library centers are placed on in mm
+LIBRARY_CIRCLE_MM = 70.0
+# Time between two collects
+COLLECT_DURATION = timedelta(seconds=45)
+# Band gaps (eV) of the first and the last position of all libraries
+BANDGAP_RANGE_EV = (1.4, 2.6)
+# Standard deviation of the noise added to %T and %R
+NOISE_PERCENT = 0.05
+
+
+def uma_sequence(
+    angles=DEFAULT_ANGLES, polarizations=DEFAULT_POLARIZATIONS
+) -> list[dict]:
+    """
+    The collects measured at every position: one per polarization and angle
+    setting, with the measurement label used in the header of the data file.
+    """
+    return [
+        {
+            'label': f'{meas_type}_{sample_angle:g}_{detector_angle:g}_{polarization}',
+            'type': meas_type,
+            'sample_angle': sample_angle,
+            'detector_angle': detector_angle,
+            'polarization': polarization,
+        }
+        for polarization in polarizations
+        for sample_angle, detector_angle, meas_type in angles
+    ]
+
+
+def film_spectra(
+    wavelength: np.ndarray,
+    bandgap: float,
+    sequence: list[dict],
+    *,
+    thickness_nm: float = 300.0,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """
+    %T and %R of a film with a direct band gap on a transparent substrate for
+    each collect of the sequence (rows), with thin film interference fringes
+    and measurement noise. s polarized reflection is slightly higher than p
+    polarized reflection and increases with the angle of incidence.
+    """
+    energy = 1239.84 / wavelength
+    # absorption edge with an Urbach tail below the gap
+    alpha = np.where(
+        energy > bandgap,
+        8.0 * np.sqrt(np.clip(energy - bandgap, 0.0, None)),
+        0.0,
+    ) + 0.05 * np.exp(np.clip((energy - bandgap) / 0.05, None, 0.0))
+    fringes = 0.04 * np.cos(4 * np.pi * 2.5 * thickness_nm / wavelength)
+    rows = []
+    for collect in sequence:
+        reflection = 0.18 + fringes
+        if collect['polarization'] == '0':
+            reflection = reflection * (1 + 0.004 * collect['sample_angle'])
+        elif collect['polarization'] == '90':
+            reflection = reflection * (1 - 0.004 * collect['sample_angle'])
+        if collect['type'] == 'T':
+            values = (1 - reflection) * np.exp(-alpha)
+        else:
+            values = reflection
+        rows.append(100 * values + rng.normal(0.0, NOISE_PERCENT, len(wavelength)))
+    return np.vstack(rows)
+
+
+def _metadata_block(collect: dict, collection_time: datetime) -> list[str]:
+    time_label = collection_time.strftime('%d-%b-%y %I:%M:%S %p')
+    return [
+        f'{collect["label"]},',
+        collect['label'],
+        f'Collection Time: {time_label}',
+        'Operator Name  :',
+        'Scan Version 6.5.0.1628',
+        'Parameter List :',
+        'Instrument  Cary 7000',
+        'Instrument Version  3.07',
+        'Method Log     :',
+        'Method Name    : synthetic_uma_map.MSW',
+        f'Date/Time stamp: {time_label}',
+        'Method Modifications:',
+        'End Method Modifications',
+        f'[SampleAngle] , {collect["sample_angle"]:.2f}',
+        f'[DetectorAngle] , {collect["detector_angle"]:.2f}',
+        f'[PolarizationAngle] , {collect["polarization"]}',
+        '',
+    ]
+
+
+def write_uma_map(  # noqa: PLR0913
+    data_path: str | Path,
+    config_path: str | Path,
+    *,
+    libraries: int = 1,
+    grid: tuple[int, int] = (5, 5),
+    angles=DEFAULT_ANGLES,
+    polarizations=DEFAULT_POLARIZATIONS,
+    n_wavelengths: int = 564,
+    start_time: datetime = datetime(2025, 11, 6, 9, 0, 0),
+    seed: int = 0,
+) -> int:
+    """
+    Write the data file and the config file of an autosampler run over
+    `libraries` libraries with `grid` (nx, ny) positions each and return the
+    number of collects.
+
+    The libraries are named `synthetic_<n>` and measured one after the other,
+    position by position, with the UMA sequence of `angles` and
+    `polarizations` (see `uma_sequence`).
+    """
+    rng = np.random.default_rng(seed)
+    sequence = uma_sequence(angles, polarizations)
+    wavelength = np.linspace(*WAVELENGTH_RANGE, n_wavelengths)
+    nx, ny = grid
+    n_positions = libraries * nx * ny
+
+    config_rows = []
+    spectra = []
+    for library in range(libraries):
+        angle = 2 * math.pi * library / libraries
+        center_x = LIBRARY_CIRCLE_MM * math.cos(angle)
+        center_y = LIBRARY_CIRCLE_MM * math.sin(angle)
+        for iy in range(ny):
+            for ix in range(nx):
+                x_sample = (ix - (nx - 1) / 2) * GRID_PITCH_MM
+                y_sample = (iy - (ny - 1) / 2) * GRID_PITCH_MM
+                config_rows.append(
+                    f'{library + 1},synthetic_{library},'
+                    f'{center_x + x_sample:.4f},{center_y + y_sample:.4f},'
+                    f'{x_sample},{y_sample}'
+                )
+                fraction = len(spectra) / max(n_positions - 1, 1)
+                bandgap = BANDGAP_RANGE_EV[0] + fraction * (
+                    BANDGAP_RANGE_EV[1] - BANDGAP_RANGE_EV[0]
+                )
+                spectra.append(film_spectra(wavelength, bandgap, sequence, rng=rng))
+
+    # (wavelength, value) column pairs of all collects in measurement order
+    intensity = np.vstack(spectra)
+    n_collects = len(intensity)
+    columns = np.empty((len(wavelength), 2 * n_collects))
+    columns[:, 0::2] = wavelength[:, None]
+    columns[:, 1::2] = intensity.T
+    numeric = io.StringIO()
+    np.savetxt(numeric, columns, fmt='%.8g', delimiter=',', newline=',\n')
+
+    labels = [collect['label'] for collect in sequence] * n_positions
+    types = [collect['type'] for collect in sequence] * n_positions
+    lines = [
+        ''.join(f'{label},,' for label in labels),
+        ''.join(f'Wavelength (nm),%{meas_type},' for meas_type in types),
+        numeric.getvalue().rstrip('\n'),
+        '',
+    ]
+    for index in range(n_collects):
+        collect = sequence[index % len(sequence)]
+        lines.extend(_metadata_block(collect, start_time + index * COLLECT_DURATION))
+    Path(data_path).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+    Path(config_path).write_text(
+        'Sample Number,Sample Name,X,Y,Xsample,Ysample\n'
+        + '\n'.join(config_rows)
+        + '\n',
+        encoding='utf-8',
+    )
+    return n_collects
+
+
+def _angle_setting(value: str) -> tuple[float, float, str]:
+    sample_angle, detector_angle, meas_type = value.split(',')
+    return float(sample_angle), float(detector_angle), meas_type
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Write a synthetic autosampler data and config file.'
+    )
+    parser.add_argument('folder', help='Folder the files are written to.')
+    parser.add_argument('--name', default='synthetic_uma', help='File name stem.')
+    parser.add_argument('--libraries', type=int, default=1)
+    parser.add_argument('--grid', type=int, nargs=2, default=(5, 5), metavar='N')
+    parser.add_argument(
+        '--angles',
+        type=_angle_setting,
+        nargs='+',
+        default=DEFAULT_ANGLES,
+        metavar='SAMPLE,DETECTOR,TYPE',
+        help='Angle settings of the UMA sequence, e.g. 0,180,T 6,12,R',
+    )
+    parser.add_argument(
+        '--polarizations',
+        nargs='+',
+        default=DEFAULT_POLARIZATIONS,
+        help='Polarizer angles (0 = s, 90 = p) or None for unpolarized light.',
+    )
+    parser.add_argument('--wavelengths', type=int, default=564)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    folder = Path(args.folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    data_path = folder / f'{args.name}.csv'
+    config_path = folder / f'{args.name}_grid.csv'
+    n_collects = write_uma_map(
+        data_path,
+        config_path,
+        libraries=args.libraries,
+        grid=tuple(args.grid),
+        angles=args.angles,
+        polarizations=args.polarizations,
+        n_wavelengths=args.wavelengths,
+        seed=args.seed,
+    )
+    print(f'Wrote {n_collects} collects to {data_path} and {config_path}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
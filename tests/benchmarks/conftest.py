@@ -0,0 +1,84 @@
+"""
+Shared setup of the benchmarks on synthetic files.
+
+The timings are collected by pytest-benchmark, the peak memory allocated
+during one extra run of each stage is added to the `extra_info` of the
+benchmark with the `peak_memory` fixture. A benchmark module defines the
+files it runs on:
+
+- MAPS: keyword arguments of `write_map` by map name.
+- MAPS_VARIABLE, DEFAULT_MAPS: the environment variable with the comma
+  separated names of the benchmarked maps and its default.
+- write_map(folder, **kwargs): writes the files of one map into folder.
+- ARCHIVE_YAML: the mainfile parsed by the `new_archive` fixture.
+
+Tests using the `synthetic_map` fixture run once per selected map.
+"""
+
+import os
+import shutil
+import tracemalloc
+
+import pytest
+from nomad.client import parse
+
+
+def pytest_generate_tests(metafunc):
+    if 'synthetic_map' in metafunc.fixturenames:
+        module = metafunc.module
+        names = os.environ.get(module.MAPS_VARIABLE, module.DEFAULT_MAPS)
+        metafunc.parametrize(
+            'synthetic_map', names.split(','), indirect=True, scope='module'
+        )
+
+
+@pytest.fixture(scope='module')
+def synthetic_map(request, tmp_path_factory):
+    """Folder with the files of the map named by the parameter."""
+    folder = tmp_path_factory.mktemp(request.param)
+    request.module.write_map(folder, **request.module.MAPS[request.param])
+    return folder
+
+
+@pytest.fixture
+def peak_memory(benchmark):
+    """
+    Run a function once while tracing the allocations and add the peak to the
+    extra info of the benchmark.
+    """
+
+    def record(function, *args):
+        tracemalloc.start()
+        try:
+            function(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info['peak_memory_mib'] = peak / 2**20
+
+    return record
+
+
+@pytest.fixture
+def uploads():
+    """Archives parsed by `new_archive` in the test."""
+    return []
+
+
+@pytest.fixture
+def new_archive(request, synthetic_map, tmp_path, uploads):
+    """
+    Setup of `benchmark.pedantic` that parses the ARCHIVE_YAML of the module
+    in a fresh local upload folder with a copy of the map files.
+    """
+
+    def setup():
+        folder = tmp_path / f'upload_{len(uploads)}'
+        shutil.copytree(synthetic_map, folder)
+        mainfile = folder / 'benchmark.archive.yaml'
+        mainfile.write_text(request.module.ARCHIVE_YAML, encoding='utf-8')
+        archive = parse(str(mainfile))[0]
+        uploads.append(archive)
+        return (archive,), {}
+
+    return setup
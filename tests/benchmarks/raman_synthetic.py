@@ -0,0 +1,248 @@
+"""Synthetic Renishaw WDF mapping files for benchmarking the Raman parser.
+
+Writes a WDF file with the blocks read by `raman_map_parser.read_wdf_mapping`:
+the WDF1 header, the spectra (DATA), the Raman shift axis (XLST, YLST), the
+stage positions (ORGN), the map shape (WMAP) and one JPEG optical image per
+point (WXDB). Every spectrum has the Si substrate peak and a film peak whose
+position and intensity vary across the map on a fluorescence background. The
+optical images are a few distinct JPEGs cycled over the points, so writing
+large maps stays fast while every point has its own payload in the file.
+
+Typical use:
+
+    # A 20 x 20 map with 1015 wavenumbers and 752 x 480 optical images
+    python tests/benchmarks/raman_synthetic.py out/ --grid 20 20
+"""
+
+import argparse
+import io
+import struct
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from nomad_dtu_nanolab_plugin.raman_fitting import peak_profiles
+
+# Raman shift range of the spectra in cm⁻¹ (stored from high to low shift)
+RAMAN_SHIFT_RANGE = (1500.0, 100.0)
+# Distance between two points of the map in μm
+GRID_PITCH_UM = 500.0
+# Size of the optical images in pixels
+IMAGE_SIZE = (752, 480)
+# Number of distinct optical images cycled over the points
+N_DISTINCT_IMAGES = 8
+# Film peak position (cm⁻¹) at the first and the last point of the map
+FILM_PEAK_RANGE = (370.0, 390.0)
+# Standard deviation of the noise added to the counts
+NOISE_COUNTS = 5.0
+
+# DataType and UnitType values of renishawWiRE.types
+_FREQUENCY, _SPATIAL_X, _SPATIAL_Y = 1, 3, 4
+_RAMAN_SHIFT, _MICRON, _COUNTS, _PIXELS = 1, 5, 6, 16
+_STATIC, _MAPPING = 1, 3
+_HEADER_SIZE = 0x200
+
+
+def map_spectra(
+    wavenumber: np.ndarray, n_points: int, *, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    float32 spectra (rows) of a film on Si: the Si peak at 520 cm⁻¹, a film
+    peak that shifts across FILM_PEAK_RANGE from the first to the last point
+    and grows and shrinks in intensity, a fluorescence background and noise.
+    """
+    fraction = np.linspace(0.0, 1.0, n_points)
+    film_center = FILM_PEAK_RANGE[0] + fraction * (
+        FILM_PEAK_RANGE[1] - FILM_PEAK_RANGE[0]
+    )
+    film_area = 2e4 * (0.5 + np.sin(np.pi * fraction))
+    silicon = 3e4 * peak_profiles(wavenumber, np.array([520.0]), np.array([4.0]))[0]
+    background = 200.0 + 0.05 * (wavenumber - wavenumber.min())
+    spectra = np.empty((n_points, len(wavenumber)), dtype=np.float32)
+    for i in range(n_points):
+        film = film_area[i] * peak_profiles(
+            wavenumber, film_center[i : i + 1], np.array([12.0])
+        )
+        spectra[i] = (
+            silicon + film[0] + background + rng.normal(0.0, NOISE_COUNTS, len(film[0]))
+        )
+    return spectra
+
+
+def optical_images(
+    n_images: int, size=IMAGE_SIZE, *, rng: np.random.Generator
+) -> list[bytes]:
+    """
+    JPEG encoded microscope-like images: a smooth illumination gradient with
+    grains and the laser spot in the center.
+    """
+    width, height = size
+    yy, xx = np.mgrid[0:height, 0:width]
+    spot = np.exp(-((xx - width / 2) ** 2 + (yy - height / 2) ** 2) / 200.0)
+    images = []
+    for _ in range(n_images):
+        gradient = 90 + 60 * xx / width + 30 * yy / height
+        grains = (
+            rng.normal(0.0, 12.0, (height // 8, width // 8)).repeat(8, 0).repeat(8, 1)
+        )
+        gray = np.clip(gradient + grains + 120 * spot, 0, 255)
+        rgb = np.stack([gray, 0.9 * gray, 0.7 * gray], axis=-1).astype(np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(rgb).save(buffer, format='JPEG', quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+
+def _block(name: str, payload: bytes, uid: int = 0) -> bytes:
+    return struct.pack('<4sIQ', name.encode('ascii'), uid, 16 + len(payload)) + payload
+
+
+def _header(
+    n_points: int, n_wavenumbers: int, laser_wavelength: float, title: str
+) -> bytes:
+    header = bytearray(_HEADER_SIZE)
+    struct.pack_into('<4sIQ', header, 0, b'WDF1', 1, _HEADER_SIZE)
+    struct.pack_into(
+        '<IQQIIII24s4HII',
+        header,
+        0x3C,
+        n_wavenumbers,
+        n_points,  # capacity
+        n_points,  # count
+        1,  # accumulation count
+        1,  # ylist length
+        n_wavenumbers,  # xlist length
+        2,  # origin lists (X, Y)
+        b'WiRE',
+        4,
+        4,
+        0,
+        0,
+        _STATIC,
+        _MAPPING,
+    )
+    struct.pack_into('<If', header, 0x98, _COUNTS, 1e7 / laser_wavelength)
+    struct.pack_into('<32s', header, 0xD0, b'synthetic')  # user name
+    struct.pack_into(f'<{_HEADER_SIZE - 0xF0}s', header, 0xF0, title.encode('utf8'))
+    return bytes(header)
+
+
+def _origin_list(data_type: int, unit: int, name: str, values: np.ndarray) -> bytes:
+    return (
+        struct.pack('<II16s', data_type | 1 << 31, unit, name.encode('ascii'))
+        + np.asarray(values, dtype='<f8').tobytes()
+    )
+
+
+def write_wdf_map(  # noqa: PLR0913
+    path: str | Path,
+    *,
+    grid: tuple[int, int] = (5, 5),
+    n_wavenumbers: int = 1015,
+    image_size: tuple[int, int] = IMAGE_SIZE,
+    n_distinct_images: int = N_DISTINCT_IMAGES,
+    laser_wavelength: float = 532.0,
+    seed: int = 0,
+) -> int:
+    """
+    Write a WDF mapping file of `grid` (nx, ny) points measured row by row
+    and return the number of points.
+
+    Like the Renishaw stage, the x positions are stored with the opposite
+    sign of the sample coordinates, which the parser swaps back.
+    """
+    rng = np.random.default_rng(seed)
+    nx, ny = grid
+    n_points = nx * ny
+    wavenumber = np.linspace(*RAMAN_SHIFT_RANGE, n_wavenumbers)
+    x_pos = -np.tile(np.arange(nx) * GRID_PITCH_UM, ny)
+    y_pos = np.repeat(np.arange(ny) * GRID_PITCH_UM, nx)
+    images = optical_images(min(n_distinct_images, n_points), image_size, rng=rng)
+
+    wmap = struct.pack(
+        '<II6fIIII',
+        0,
+        0,
+        x_pos[0],
+        y_pos[0],
+        0.0,
+        -GRID_PITCH_UM,
+        GRID_PITCH_UM if ny > 1 else 0.0,
+        1.0,
+        nx,
+        ny,
+        1,
+        0,
+    )
+    # WXDB: the offsets of the images in the block, followed by the images
+    payloads = [images[i % len(images)] for i in range(n_points)]
+    table_size = 8 * (n_points + 1)
+    offsets = 16 + table_size + np.cumsum([0] + [len(p) for p in payloads[:-1]])
+    wxdb = struct.pack('<Q', n_points) + np.asarray(offsets, dtype='<u8').tobytes()
+
+    with open(path, 'wb') as file:
+        file.write(
+            _header(n_points, n_wavenumbers, laser_wavelength, 'Synthetic mapping')
+        )
+        file.write(_block('DATA', map_spectra(wavenumber, n_points, rng=rng).tobytes()))
+        file.write(
+            _block('YLST', struct.pack('<II', _SPATIAL_Y, _PIXELS) + b'\x00' * 4)
+        )
+        file.write(
+            _block(
+                'XLST',
+                struct.pack('<II', _FREQUENCY, _RAMAN_SHIFT)
+                + wavenumber.astype('<f4').tobytes(),
+            )
+        )
+        file.write(
+            _block(
+                'ORGN',
+                struct.pack('<I', 2)
+                + _origin_list(_SPATIAL_X, _MICRON, 'X', x_pos)
+                + _origin_list(_SPATIAL_Y, _MICRON, 'Y', y_pos),
+            )
+        )
+        file.write(_block('WMAP', wmap))
+        file.write(
+            struct.pack(
+                '<4sIQ', b'WXDB', 0, 16 + len(wxdb) + sum(len(p) for p in payloads)
+            )
+        )
+        file.write(wxdb)
+        for payload in payloads:
+            file.write(payload)
+    return n_points
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Write a synthetic Renishaw WDF mapping file.'
+    )
+    parser.add_argument('folder', help='Folder the file is written to.')
+    parser.add_argument('--name', default='synthetic_map', help='File name stem.')
+    parser.add_argument('--grid', type=int, nargs=2, default=(5, 5), metavar='N')
+    parser.add_argument('--wavenumbers', type=int, default=1015)
+    parser.add_argument(
+        '--image-size', type=int, nargs=2, default=IMAGE_SIZE, metavar='PX'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    folder = Path(args.folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / f'{args.name}.wdf'
+    n_points = write_wdf_map(
+        path,
+        grid=tuple(args.grid),
+        n_wavenumbers=args.wavenumbers,
+        image_size=tuple(args.image_size),
+        seed=args.seed,
+    )
+    print(f'Wrote {n_points} points to {path}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
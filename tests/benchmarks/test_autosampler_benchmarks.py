@@ -0,0 +1,150 @@
+"""
+Benchmarks of the autosampler reader stages and of the normalization of an
+autosampler measurement on synthetic UMA maps (see `autosampler_synthetic`).
+
+The maps are selected with the AUTOSAMPLER_BENCHMARK_MAPS environment
+variable (comma separated names of MAPS, 'library' by default):
+
+    AUTOSAMPLER_BENCHMARK_MAPS=library,run pytest tests/benchmarks --benchmark-only
+"""
+
+import pandas as pd
+import pytest
+from autosampler_synthetic import write_uma_map
+from nomad.client import normalize_all
+
+from nomad_dtu_nanolab_plugin import autosampler_reader
+
+pytest.importorskip('pytest_benchmark')
+
+MAPS = {
+    # one library as measured in a single sequence
+    'library': dict(libraries=1, grid=(5, 5)),
+    # a full autosampler run
+    'run': dict(libraries=8, grid=(5, 5)),
+    # a dense map with an additional reflection angle
+    'dense': dict(
+        libraries=1,
+        grid=(20, 20),
+        angles=((0.0, 180.0, 'T'), (6.0, 12.0, 'R'), (30.0, 60.0, 'R')),
+    ),
+}
+MAPS_VARIABLE = 'AUTOSAMPLER_BENCHMARK_MAPS'
+DEFAULT_MAPS = 'library'
+
+ARCHIVE_YAML = """data:
+  m_def: nomad_dtu_nanolab_plugin.schema_packages.rt.DtuAutosamplerMeasurement
+  data_file: data.csv
+  config_file: grid.csv
+"""
+
+
+def write_map(folder, **kwargs):
+    write_uma_map(folder / 'data.csv', folder / 'grid.csv', **kwargs)
+
+
+@pytest.fixture(scope='module')
+def collects(synthetic_map):
+    return autosampler_reader.parse_file(
+        synthetic_map / 'data.csv', synthetic_map / 'grid.csv'
+    )
+
+
+@pytest.fixture(scope='module')
+def positions(collects):
+    library_data = autosampler_reader.group_measurements_position(
+        autosampler_reader.group_samples(collects)
+    )
+    return [
+        multi_measurement
+        for position_data in library_data.values()
+        for multi_measurement in position_data.values()
+    ]
+
+
+def avg_sp_pol(positions):
+    for multi_measurement in positions:
+        multi_measurement.avg_sp_pol()
+
+
+def calc_alpha(positions):
+    for multi_measurement in positions:
+        multi_measurement.calc_alpha(
+            wv_start=autosampler_reader.WV_START, wv_end=autosampler_reader.WV_END
+        )
+
+
+def standard_treatment(positions):
+    for multi_measurement in positions:
+        multi_measurement.standard_treatment()
+
+
+def standard_treatment_map(positions):
+    library_data = {}
+    for multi_measurement in positions:
+        library_data.setdefault(multi_measurement.sample_name, []).append(
+            multi_measurement
+        )
+    for library in library_data.values():
+        autosampler_reader.standard_treatment_map(dict(enumerate(library)))
+
+
+def test_parse_file(benchmark, peak_memory, synthetic_map):
+    args = (synthetic_map / 'data.csv', synthetic_map / 'grid.csv')
+    peak_memory(autosampler_reader.parse_file, *args)
+    collects = benchmark(autosampler_reader.parse_file, *args)
+    assert collects
+
+
+def test_group_measurements_position(benchmark, peak_memory, collects):
+    def group():
+        return autosampler_reader.group_measurements_position(
+            autosampler_reader.group_samples(collects)
+        )
+
+    peak_memory(group)
+    assert benchmark(group)
+
+
+def test_avg_sp_pol(benchmark, peak_memory, positions):
+    peak_memory(avg_sp_pol, positions)
+    benchmark(avg_sp_pol, positions)
+    assert all(position.avg_sp_measurements for position in positions)
+
+
+def test_calc_alpha(benchmark, peak_memory, positions):
+    avg_sp_pol(positions)
+    peak_memory(calc_alpha, positions)
+    benchmark(calc_alpha, positions)
+    assert all('alpha' in position.derived_data for position in positions)
+
+
+def test_standard_treatment(benchmark, peak_memory, positions):
+    peak_memory(standard_treatment, positions)
+    benchmark(standard_treatment, positions)
+    assert all(
+        'bandgap_intercept_energy' in position.derived_data for position in positions
+    )
+
+
+def test_standard_treatment_map(benchmark, peak_memory, positions):
+    peak_memory(standard_treatment_map, positions)
+    benchmark(standard_treatment_map, positions)
+    assert all(
+        'bandgap_intercept_energy' in position.derived_data for position in positions
+    )
+
+
+def test_autosampler_normalize(
+    benchmark, peak_memory, synthetic_map, new_archive, uploads
+):
+    """
+    Normalization of an autosampler measurement, including the creation of
+    all RT measurement archives, in a fresh local upload folder per round.
+    """
+    (archive,), _ = new_archive()
+    peak_memory(normalize_all, archive)
+    benchmark.pedantic(normalize_all, setup=new_archive, rounds=3)
+
+    n_libraries = pd.read_csv(synthetic_map / 'grid.csv')['Sample Name'].nunique()
+    assert all(len(archive.data.steps) == n_libraries for archive in uploads)
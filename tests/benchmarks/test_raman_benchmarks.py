@@ -0,0 +1,142 @@
+"""
+Benchmarks of the Raman parser stages and of the normalization of a Raman
+measurement on synthetic WDF mapping files (see `raman_synthetic`).
+
+Stages that decode the optical images start from a freshly read mapping in
+every round, as the decoded images are cached. The maps are selected with
+the RAMAN_BENCHMARK_MAPS environment variable (comma separated names of
+MAPS, 'small' by default):
+
+    RAMAN_BENCHMARK_MAPS=small,medium pytest tests/benchmarks --benchmark-only
+"""
+
+import pytest
+import structlog
+from nomad.client import normalize_all
+from raman_synthetic import write_wdf_map
+
+from nomad_dtu_nanolab_plugin.raman_map_parser import MappingRamanMeas
+from nomad_dtu_nanolab_plugin.schema_packages.raman import RamanMeasurement
+
+pytest.importorskip('pytest_benchmark')
+
+MAPS = {
+    'small': dict(grid=(5, 5)),
+    'medium': dict(grid=(20, 20)),
+    'large': dict(grid=(50, 50)),
+}
+MAPS_VARIABLE = 'RAMAN_BENCHMARK_MAPS'
+DEFAULT_MAPS = 'small'
+# The matplotlib image grid takes minutes for larger maps, normalization
+# writes the image pyramid instead
+IMAGE_GRID_MAX_POINTS = 400
+
+ARCHIVE_YAML = """data:
+  m_def: nomad_dtu_nanolab_plugin.schema_packages.raman.RamanMeasurement
+  raman_data_file: map.wdf
+"""
+
+
+def write_map(folder, **kwargs):
+    write_wdf_map(folder / 'map.wdf', **kwargs)
+
+
+def read_mapping(synthetic_map):
+    mapping = MappingRamanMeas()
+    mapping.read_wdf_mapping(str(synthetic_map), ['map.wdf'])
+    return mapping
+
+
+def fresh_mapping(synthetic_map):
+    def setup():
+        return (read_mapping(synthetic_map),), {}
+
+    return setup
+
+
+@pytest.fixture(scope='module')
+def mapping(synthetic_map):
+    return read_mapping(synthetic_map)
+
+
+def write_raman_data(mapping):
+    measurement = RamanMeasurement()
+    img_list = [None] * len(mapping.raman_meas_list)
+    measurement.write_raman_data(
+        mapping.iter_batches(), img_list, None, structlog.get_logger()
+    )
+    return measurement
+
+
+@pytest.fixture(scope='module')
+def measurement(mapping):
+    return write_raman_data(mapping)
+
+
+def test_read_wdf_mapping(benchmark, peak_memory, synthetic_map):
+    peak_memory(read_mapping, synthetic_map)
+    mapping = benchmark(read_mapping, synthetic_map)
+    assert len(mapping.raman_meas_list) == mapping.spectra.shape[0]
+
+
+def test_index_optical_images(benchmark, peak_memory, mapping):
+    args = (mapping.wdf_reader,)
+    peak_memory(mapping._index_optical_images, *args)
+    images = benchmark(mapping._index_optical_images, *args)
+    assert len(images) == len(mapping.raman_meas_list)
+
+
+def test_save_optical_images(benchmark, peak_memory, mapping, tmp_path):
+    def save():
+        return mapping.save_optical_images(tmp_path, 'map', image_format='jpeg')
+
+    peak_memory(save)
+    count, _ = benchmark(save)
+    assert count == len(mapping.raman_meas_list)
+
+
+def test_create_image_grid(benchmark, peak_memory, synthetic_map, tmp_path):
+    mapping = read_mapping(synthetic_map)
+    if len(mapping.raman_meas_list) > IMAGE_GRID_MAX_POINTS:
+        pytest.skip('The image grid is only drawn for small maps.')
+
+    def create_image_grid(mapping):
+        return mapping.create_image_grid(str(tmp_path / 'grid.png'))
+
+    peak_memory(create_image_grid, mapping)
+    benchmark.pedantic(create_image_grid, setup=fresh_mapping(synthetic_map), rounds=1)
+    assert (tmp_path / 'grid.png').exists()
+
+
+def test_save_image_pyramid(benchmark, peak_memory, synthetic_map, tmp_path):
+    def save_image_pyramid(mapping):
+        return mapping.save_image_pyramid(str(tmp_path / 'grid.png'))
+
+    peak_memory(save_image_pyramid, read_mapping(synthetic_map))
+    benchmark.pedantic(save_image_pyramid, setup=fresh_mapping(synthetic_map), rounds=3)
+    assert (tmp_path / 'grid.png').exists()
+
+
+def test_write_raman_data(benchmark, peak_memory, mapping):
+    peak_memory(write_raman_data, mapping)
+    measurement = benchmark(write_raman_data, mapping)
+    assert len(measurement.results) == len(mapping.raman_meas_list)
+
+
+def test_plot(benchmark, peak_memory, measurement):
+    peak_memory(measurement.plot)
+    benchmark(measurement.plot)
+    assert measurement.figures
+
+
+def test_raman_normalize(benchmark, peak_memory, synthetic_map, new_archive, uploads):
+    """
+    Normalization of a Raman measurement, including the optical images and
+    the plots, in a fresh local upload folder per round.
+    """
+    (archive,), _ = new_archive()
+    peak_memory(normalize_all, archive)
+    benchmark.pedantic(normalize_all, setup=new_archive, rounds=3)
+
+    n_points = len(read_mapping(synthetic_map).raman_meas_list)
+    assert all(len(archive.data.results) == n_points for archive in uploads)
@@ -1,7 +1,65 @@
+import copy
+import importlib
+import logging
 import os.path
+import shutil
 
+import numpy as np
 import pytest
 from nomad.client import normalize_all, parse
+from nomad.datamodel import EntryArchive
+from nomad.datamodel.context import ClientContext
+
+from nomad_dtu_nanolab_plugin import autosampler_reader
+from nomad_dtu_nanolab_plugin.raman_fitting import peak_profiles
+from nomad_dtu_nanolab_plugin.raman_map_parser import (
+    CHUNKS_PER_WORKER,
+    MappingRamanMeas,
+    band_intensities,
+    decimate_spectra,
+    map_chunks,
+    representative_spectra,
+)
+from nomad_dtu_nanolab_plugin.raman_preprocessing import PreprocessingPipeline
+from nomad_dtu_nanolab_plugin.schema_packages.raman import (
+    RamanMeasurement,
+    RamanResult,
+)
+from nomad_dtu_nanolab_plugin.schema_packages.rt import (
+    DtuAutosamplerMeasurement,
+    RTMeasurement,
+    RTResult,
+    RTSpectrum,
+    write_spectra_file,
+)
+
+# Spectra (T and R) in the single-point UMA test file
+SLOW_SCAN_SPECTRA = 2
+# Absorption onsets in eV of the linear and the curved synthetic Tauc plot
+LINEAR_ONSET_EV = 2.4
+CURVED_ONSET_EV = 2.0
+# Collects per position in the labels of the grouping test
+UMA_SEQUENCE_LENGTH = 3
+# Raman shift range in cm⁻¹ of the normalization and band of the intensity map
+NORMALIZATION_RANGE = (100, 600)
+BAND_CENTER = 380
+BAND_TOLERANCE = 5
+# Figures of a Raman measurement: overlaid and stacked spectra
+SPECTRA_FIGURES = 2
+# Spectra drawn, spectra with a peak and points per spectrum in the
+# decimation test
+MAX_SPECTRA = 10
+PEAK_SPECTRA = 60
+MAX_TRACE_POINTS = 100
+# Synthetic spectra of the preprocessing test: a cosmic ray spike, the Si
+# peak height and the least of it left after smoothing, the Raman shift in
+# cm⁻¹ above which there is only baseline and the largest residual left there
+COSMIC_RAY_COUNTS = 5000
+SI_PEAK_COUNTS = 300
+MIN_SMOOTHED_SI_PEAK_COUNTS = 250
+BASELINE_ONLY_SHIFT = 1000
+MAX_BASELINE_RESIDUAL = 10
+OUT_OF_RANGE_SHIFT = 3000
 
 """
 Names can be generated from the test file by running the following command:
@@ -142,3 +200,586 @@ def test_rt_autosampler_schema():
         assert expected_name in step_library_names, (
             f'Expected library {expected_name} not found in steps'
         )
+
+
+def test_rt_spectral_cube():
+    """
+    The single-point UMA file is read into one spectral cube and the parsed
+    measurements are views on its rows.
+    """
+    data_file = os.path.join('tests', 'data', 'eugbe_0008_RTP_hd_X2_Y0_slow.csv')
+    collects = autosampler_reader.parse_file(data_file, parse_sequence=False)
+
+    cube = collects[0].cube
+    assert len(cube) == len(collects) == SLOW_SCAN_SPECTRA
+    assert cube.shared_axis
+    assert cube.intensity.shape == (SLOW_SCAN_SPECTRA, len(cube.wavelength))
+    assert cube.intensity.dtype == np.float32
+    assert list(cube.metadata['measurement_type']) == ['T', 'R']
+    assert list(cube.metadata['sample_angle']) == [0.0, 6.0]
+    assert list(cube.metadata['detector_angle']) == [180.0, 12.0]
+    assert not np.isnat(cube.metadata['collection_time']).any()
+
+    transmission = collects[0]
+    assert transmission.wavelength is cube.wavelength
+    assert np.shares_memory(transmission.intensity, cube.intensity)
+    assert transmission.data['Intensity'].iloc[0] == pytest.approx(74.55186462)
+
+
+def test_rt_tauc_window_fits():
+    """
+    The windowed tauc fits of all rows agree with a direct linear fit of the
+    best window.
+    """
+    energy = np.linspace(1.5, 3.5, 60)
+    tauc = np.vstack(
+        [
+            np.where(energy > LINEAR_ONSET_EV, 40 * (energy - LINEAR_ONSET_EV), 0.0),
+            np.where(
+                energy > CURVED_ONSET_EV,
+                25 * (energy - CURVED_ONSET_EV) ** 1.5,
+                0.0,
+            ),
+        ]
+    )
+    fits = autosampler_reader.tauc_window_fits(energy, tauc, window_size=10)
+
+    assert fits['found'].all()
+    for row, start in enumerate(fits['start']):
+        window = slice(start, start + 10)
+        slope, intercept = np.polyfit(energy[window], tauc[row, window], 1)
+        assert fits['slope'][row] == pytest.approx(slope)
+        assert fits['intercept'][row] == pytest.approx(intercept)
+    assert -fits['intercept'][0] / fits['slope'][0] == pytest.approx(LINEAR_ONSET_EV)
+
+
+def _treatment_map(n_positions):
+    """
+    Positions with s and p polarized T and R spectra made from the single-point
+    test file, scaled differently at every position.
+    """
+    data_file = os.path.join('tests', 'data', 'eugbe_0008_RTP_hd_X2_Y0_slow.csv')
+    collects = autosampler_reader.parse_file(data_file, parse_sequence=False)
+    map_meas = {}
+    for position, scale in enumerate(np.linspace(0.8, 1.0, n_positions)):
+        multi_measurement = autosampler_reader.MultiMeasurement('eugbe_0008')
+        for collect in collects:
+            for angle, polarization_scale in (('0', 1.0), ('90', 0.9)):
+                measurement = copy.copy(collect)
+                measurement.metadata = {
+                    **collect.metadata,
+                    'PolarizationAngle': angle,
+                    'Polarization': autosampler_reader.POLARISATION_DICT[angle],
+                }
+                measurement.add_data(
+                    collect.wavelength,
+                    collect.intensity * scale * polarization_scale,
+                    collect.column_name,
+                )
+                multi_measurement.add_measurement(measurement)
+        map_meas[f'{position}.0_0.0'] = multi_measurement
+    return map_meas
+
+
+@pytest.mark.parametrize(
+    'n_positions',
+    [
+        pytest.param(3, id='serial'),
+        pytest.param(autosampler_reader.MAP_PARALLEL_MIN_POSITIONS + 1, id='threads'),
+    ],
+)
+def test_rt_standard_treatment_map(n_positions):
+    """
+    The treatment of a whole map gives the results of the treatment of every
+    position on its own, also when the map is treated in chunks in threads.
+    """
+    expected = _treatment_map(n_positions)
+    for multi_measurement in expected.values():
+        multi_measurement.standard_treatment()
+
+    map_meas = _treatment_map(n_positions)
+    bandgaps = autosampler_reader.standard_treatment_map(map_meas)
+
+    assert bandgaps['position'] == list(expected)
+    for quantity in (
+        'bandgap_inflection_energy',
+        'bandgap_intercept_energy',
+        'bandgap_threshold_energy',
+    ):
+        values = [expected[key].derived_data[quantity] for key in expected]
+        assert np.isfinite(values).any()
+        assert np.allclose(bandgaps[quantity], values, equal_nan=True)
+        assert np.allclose(
+            [map_meas[key].derived_data[quantity] for key in map_meas],
+            values,
+            equal_nan=True,
+        )
+    for key in expected:
+        assert np.allclose(
+            map_meas[key].derived_data['alpha']['alpha'],
+            expected[key].derived_data['alpha']['alpha'],
+            equal_nan=True,
+        )
+
+
+def test_rt_autosampler_archive_data(tmp_path):
+    """
+    The archive data of a library reads back into an RTMeasurement whose
+    spectra are resolved from the spectra file.
+    """
+    data_file = os.path.join('tests', 'data', 'eugbe_0008_RTP_hd_X2_Y0_slow.csv')
+    collects = autosampler_reader.parse_file(data_file, parse_sequence=False)
+    multi_measurement = autosampler_reader.MultiMeasurement('eugbe_0008_RTP_hd')
+    multi_measurement.position_x = 18.0
+    multi_measurement.position_y = 0.0
+    for collect in collects:
+        multi_measurement.add_measurement(collect)
+
+    data, spectra = DtuAutosamplerMeasurement()._library_archive_data(
+        'eugbe_0008_RTP_hd',
+        {'18.0_0.0': multi_measurement},
+        '20251105_190408',
+        logging.getLogger(__name__),
+    )
+    archive = EntryArchive(m_context=ClientContext(local_dir=str(tmp_path)))
+    write_spectra_file(archive, data['spectra_file'], **spectra)
+    measurement = RTMeasurement.m_from_dict(data)
+
+    assert measurement.name == 'eugbe_0008_RTP_hd_RT_20251105_190408'
+    assert measurement.source_fingerprint == autosampler_reader.library_fingerprint(
+        {'18.0_0.0': multi_measurement}
+    )
+    assert measurement.samples[0].lab_id == 'eugbe_0008_RTP_hd'
+    result = measurement.results[0]
+    assert result.x_absolute.to('mm').magnitude == pytest.approx(18.0)
+    assert [spectrum.spectrum_type for spectrum in result.spectra] == [
+        'Transmission',
+        'Reflection',
+    ]
+    assert result.spectra[1].detector_angle.magnitude == pytest.approx(12.0)
+    assert result.spectra[1].intensity is None
+    assert list(spectra['position_offsets']) == [0, 2]
+
+    arrays = measurement.read_spectra(result.spectra, archive)
+    for (wavelength, intensity), collect in zip(arrays, collects):
+        assert np.array_equal(wavelength, collect.wavelength)
+        assert np.allclose(intensity, collect.intensity / 100.0)
+
+    measurement.set_average_intensities(archive)
+    for spectrum, (wavelength, intensity) in zip(result.spectra, arrays):
+        mask = (wavelength >= RTMeasurement.WAVELENGTH_MIN) & (
+            wavelength <= RTMeasurement.WAVELENGTH_MAX
+        )
+        assert spectrum.average_intensity == pytest.approx(np.mean(intensity[mask]))
+
+
+def test_autosampler_grouping():
+    """
+    Collects are grouped by sample and position in order of appearance and the
+    uma sequence length is found from the repeated labels.
+    """
+    labels = ['a__0', 'a__90', 'b__0', 'a__0', 'a__90', 'b__0']
+    assert autosampler_reader.get_uma_sequence_length(labels) == UMA_SEQUENCE_LENGTH
+    with pytest.raises(ValueError):
+        autosampler_reader.get_uma_sequence_length(['a', 'b', 'a', 'c', 'b', 'a'])
+
+    collects = []
+    for sample_name, x in [('B', 1.0), ('A', 0.0), ('B', 1.0), ('B', 2.0)]:
+        collect = autosampler_reader.SingleMeasurement(f'{sample_name}_{x}')
+        collect.add_config({'Sample Name': sample_name, 'Xsample': x, 'Ysample': 0.0})
+        collects.append(collect)
+    samples = autosampler_reader.group_samples(collects)
+    assert list(samples) == ['B', 'A']
+    positions = autosampler_reader.group_measurements_position(samples)
+    assert list(positions['B']) == ['1.0_0.0', '2.0_0.0']
+    assert positions['B']['1.0_0.0'].measurements == [collects[0], collects[2]]
+    assert positions['A']['0.0_0.0'].position_x == 0.0
+
+
+def test_autosampler_library_fingerprint():
+    """
+    The fingerprint of a library only changes when its collects change.
+    """
+    data_file = os.path.join('tests', 'data', 'eugbe_0008_RTP_hd_X2_Y0_slow.csv')
+
+    def fingerprint(collects):
+        multi_measurement = autosampler_reader.MultiMeasurement('eugbe_0008_RTP_hd')
+        for collect in collects:
+            multi_measurement.add_measurement(collect)
+        return autosampler_reader.library_fingerprint({'18.0_0.0': multi_measurement})
+
+    collects = autosampler_reader.parse_file(data_file, parse_sequence=False)
+    reparsed = autosampler_reader.parse_file(data_file, parse_sequence=False)
+    assert fingerprint(collects) == fingerprint(reparsed)
+    assert fingerprint(collects) != fingerprint(collects[:1])
+
+
+def test_rt_average_intensities():
+    """
+    The window averages of spectra on the shared grid and on their own grid
+    agree with a plain masked mean.
+    """
+    wavelength = np.arange(1000.0, 250.0, -2.0)
+    rng = np.random.default_rng(0)
+    spectra = [
+        RTSpectrum(
+            spectrum_type='Transmission',
+            wavelength=wavelength,
+            intensity=rng.random(len(wavelength)),
+        )
+        for _ in range(3)
+    ]
+    # ascending grid of another spectrometer setting
+    spectra.append(
+        RTSpectrum(
+            spectrum_type='Reflection',
+            wavelength=wavelength[::-1] + 1,
+            intensity=rng.random(len(wavelength)),
+        )
+    )
+    measurement = RTMeasurement(results=[RTResult(spectra=spectra)])
+    measurement.set_average_intensities()
+
+    for spectrum in spectra:
+        values = spectrum.wavelength.magnitude
+        mask = (values >= RTMeasurement.WAVELENGTH_MIN) & (
+            values <= RTMeasurement.WAVELENGTH_MAX
+        )
+        assert spectrum.average_intensity == pytest.approx(
+            np.mean(spectrum.intensity[mask])
+        )
+
+
+def test_rt_single_point_files(tmp_path):
+    """
+    Several single-point csv files are merged in upload order, a malformed
+    file is skipped.
+    """
+    data_file = os.path.join('tests', 'data', 'eugbe_0008_RTP_hd_X2_Y0_slow.csv')
+    file_names = ['point_a.csv', 'broken.csv', 'point_b.csv']
+    shutil.copy(data_file, tmp_path / file_names[0])
+    (tmp_path / file_names[1]).write_text('not,an,export\n1,2\n')
+    shutil.copy(data_file, tmp_path / file_names[2])
+    archive_file = tmp_path / 'rt.archive.yaml'
+    archive_file.write_text(
+        'data:\n'
+        '  m_def: nomad_dtu_nanolab_plugin.schema_packages.rt.RTMeasurement\n'
+        f'  data_file: {file_names}\n'
+    )
+
+    entry_archive = parse(str(archive_file))[0]
+    normalize_all(entry_archive)
+
+    result = entry_archive.data.results[0]
+    assert result.name == 'point_a'
+    assert [spectrum.spectrum_type for spectrum in result.spectra] == [
+        'Transmission',
+        'Reflection',
+        'Transmission',
+        'Reflection',
+    ]
+    assert entry_archive.data.accessory == 'UMA'
+
+
+def test_raman_mapping_cube():
+    """
+    The spectra of a WDF mapping are one memory-mapped array, the points are
+    views on its rows and normalization and intensity maps agree with a
+    spectrum by spectrum computation.
+    """
+    mapping = MappingRamanMeas()
+    mapping.read_wdf_mapping(
+        os.path.join('tests', 'data'), ['indiogo_0019_RTP_hc_1x10s_P1_x20_map_0.wdf']
+    )
+    assert isinstance(mapping.spectra, np.memmap)
+    assert mapping.spectra.shape == (9, len(mapping.wavenumber))
+    point = mapping.raman_meas_list[4]
+    assert np.shares_memory(point.intensity, mapping.spectra)
+    assert (point.x_pos, point.y_pos) == (-mapping.wdf_reader.xpos[4], 5000.0)
+
+    mapping.normalize_intensity(x_range=NORMALIZATION_RANGE)
+    low, high = NORMALIZATION_RANGE
+    mask = (point.wavenumber >= low) & (point.wavenumber <= high)
+    assert np.allclose(
+        point.data['norm_intensity'], point.intensity / point.intensity[mask].max()
+    )
+
+    intensity_map = mapping.create_intensity_map(
+        BAND_CENTER, wavenumber_tolerance=BAND_TOLERANCE
+    )
+    mask = np.abs(point.wavenumber - BAND_CENTER) <= BAND_TOLERANCE
+    assert intensity_map['intensity'][4] == pytest.approx(point.intensity[mask].mean())
+
+
+def test_raman_optical_images(tmp_path):
+    """
+    The optical images of a WDF mapping are indexed, decoded on first use and
+    exported as the original JPEG bytes.
+    """
+    mapping = MappingRamanMeas()
+    mapping.read_wdf_mapping(
+        os.path.join('tests', 'data'), ['indiogo_0019_RTP_hc_1x10s_P1_x20_map_0.wdf']
+    )
+    point = mapping.raman_meas_list[0]
+    assert point.has_image
+    assert point._image is None
+    assert point.image.size == (752, 480)
+
+    count, filenames = mapping.save_optical_images(
+        tmp_path, 'sample', image_format='jpeg'
+    )
+    assert count == len(mapping.raman_meas_list)
+    assert filenames[0] == 'sample_point0_x2000_y5000.jpg'
+    assert (tmp_path / filenames[0]).read_bytes() == point.image_ref.read_bytes()
+    assert point.image_ref.read_bytes()[:3] == b'\xff\xd8\xff'
+
+
+def test_raman_image_mosaic(tmp_path):
+    """
+    The optical images are composited into a mosaic of thumbnails by stage
+    position and written at decreasing resolutions.
+    """
+    mapping = MappingRamanMeas()
+    mapping.read_wdf_mapping(
+        os.path.join('tests', 'data'), ['indiogo_0019_RTP_hc_1x10s_P1_x20_map_0.wdf']
+    )
+    mosaic = mapping.create_image_mosaic(tile_size=128)
+    # the 9 points lie on one row, 752 x 480 images fit in 128 x 82 tiles
+    assert mosaic.shape == (82, 9 * 128, 3)
+    assert mapping.raman_meas_list[0]._image is None
+
+    paths = mapping.save_image_pyramid(str(tmp_path / 'grid.png'), tile_size=128)
+    assert paths[0] == str(tmp_path / 'grid.png')
+    assert paths[1] == str(tmp_path / 'grid_1.png')
+    assert all(os.path.exists(path) for path in paths)
+
+
+def test_raman_band_intensities():
+    """
+    Band averages of many bands agree with masking each spectrum, on a
+    descending axis, and bands outside the axis are 0.
+    """
+    mapping = MappingRamanMeas()
+    mapping.read_wdf_mapping(
+        os.path.join('tests', 'data'), ['indiogo_0019_RTP_hc_1x10s_P1_x20_map_0.wdf']
+    )
+    targets = [150, 380, 520, 10_000]
+    maps = mapping.create_intensity_maps(targets, wavenumber_tolerance=[2, 5, 5, 5])
+    assert list(maps.columns) == ['x_pos', 'y_pos', *targets]
+    for target, tolerance in zip(targets[:3], [2, 5, 5]):
+        mask = np.abs(mapping.wavenumber - target) <= tolerance
+        expected = mapping.spectra[:, mask].mean(axis=1, dtype=np.float64)
+        assert np.allclose(maps[target], expected)
+    assert (maps[10_000] == 0).all()
+
+    intensities = band_intensities(mapping.wavenumber, mapping.spectra[0], [380])
+    assert intensities.shape == (1, 1)
+    assert intensities[0, 0] == pytest.approx(maps[380][0])
+
+
+def test_raman_shared_axis():
+    """
+    The Raman shift axis is stored once for all results with float32
+    intensities, and entries with one axis per result still plot.
+    """
+    entry_archive = parse(os.path.join('tests', 'data', 'test_raman.archive.yaml'))[0]
+    normalize_all(entry_archive)
+    measurement = entry_archive.data
+    result = measurement.results[0]
+    assert result.raman_shift is None
+    assert result.intensity.dtype == np.float32
+    assert measurement.raman_shift.shape == result.intensity.shape
+
+    legacy = RamanMeasurement(
+        results=[
+            RamanResult(
+                name=result.name,
+                intensity=np.asarray(result.intensity, dtype=np.float64),
+                raman_shift=measurement.raman_shift,
+                x_absolute=result.x_absolute,
+                y_absolute=result.y_absolute,
+            )
+        ]
+    )
+    shifts = legacy._result_raman_shifts()
+    assert np.array_equal(shifts[0], measurement.raman_shift.magnitude)
+    legacy.plot()
+    assert len(legacy.figures) == SPECTRA_FIGURES
+    assert legacy.plot_intensity_map_from_results() is not None
+
+
+def test_raman_spectra_decimation():
+    """
+    Large maps are drawn with a representative subset of spectra, each
+    downsampled with its peaks kept.
+    """
+    rng = np.random.default_rng(0)
+    wavenumber = np.linspace(1500, 100, 1015)
+    spectra = rng.random((120, 1015))
+    spectra[:PEAK_SPECTRA, 300] = 50  # two groups, with and without a peak
+
+    selected = representative_spectra(spectra, max_spectra=MAX_SPECTRA)
+    assert len(selected) == MAX_SPECTRA
+    assert (selected[:-1] < selected[1:]).all()
+    assert (selected < PEAK_SPECTRA).any() and (selected >= PEAK_SPECTRA).any()
+
+    x_data, y_data = decimate_spectra(wavenumber, spectra, max_points=MAX_TRACE_POINTS)
+    assert x_data.shape == y_data.shape
+    assert x_data.shape[1] <= MAX_TRACE_POINTS
+    assert np.array_equal(y_data.max(axis=1), spectra.max(axis=1))
+    assert np.array_equal(y_data.min(axis=1), spectra.min(axis=1))
+    assert (np.diff(x_data, axis=1) <= 0).all()
+
+
+def test_raman_iter_batches():
+    """
+    The WDF spectra are memory-mapped by the reader and read into memory in
+    batches of points.
+    """
+    mapping = MappingRamanMeas()
+    mapping.read_wdf_mapping(
+        os.path.join('tests', 'data'), ['indiogo_0019_RTP_hc_1x10s_P1_x20_map_0.wdf']
+    )
+    assert isinstance(mapping.wdf_reader.spectra, np.memmap)
+
+    batches = list(mapping.iter_batches(batch_size=4))
+    assert [len(points) for points, _ in batches] == [4, 4, 1]
+    points, spectra = batches[1]
+    assert points[0] is mapping.raman_meas_list[4]
+    assert not isinstance(spectra, np.memmap)
+    assert np.array_equal(spectra, mapping.spectra[4:8])
+
+
+def test_map_chunks():
+    """
+    Chunks are processed in order and taken from the iterable only as far
+    ahead of the results as the workers need.
+    """
+    taken = []
+
+    def chunks():
+        for i in range(20):
+            taken.append(i)
+            yield -i
+
+    assert list(map_chunks(abs, chunks())) == list(range(20))
+    taken.clear()
+    results = map_chunks(abs, chunks(), max_workers=2)
+    assert next(results) == 0
+    assert len(taken) == 2 * CHUNKS_PER_WORKER
+    assert list(results) == list(range(1, 20))
+
+
+def test_raman_preprocessing(monkeypatch):
+    """
+    The preprocessing pipeline removes spikes and baselines of all spectra,
+    in chunks across worker processes, and is picked by the configuration.
+    Normalizing again after changing the configuration replaces the stored
+    intensities together with the recorded preprocessing.
+    """
+    rng = np.random.default_rng(0)
+    wavenumber = np.linspace(1500, 100, 1015)
+    peak = SI_PEAK_COUNTS * np.exp(-(((wavenumber - 520) / 6) ** 2))
+    baseline = 200 + 0.1 * wavenumber
+    spectra = (peak + baseline + rng.normal(0, 1, (9, 1015))).astype(np.float32)
+    spectra[3, 100] += COSMIC_RAY_COUNTS
+    mapping = MappingRamanMeas()
+    mapping._add_points(
+        wavenumber,
+        spectra,
+        np.arange(9.0),
+        np.zeros(9),
+        images=[],
+        laser_wavelength=532,
+    )
+
+    pipeline = PreprocessingPipeline.from_config(
+        ['cosmic_rays', {'baseline': {'lam': 1e6}}, 'smooth']
+    )
+    assert str(pipeline) == 'cosmic_rays > baseline(lam=1000000.0) > smooth'
+    mapping.preprocess(pipeline, batch_size=4, max_workers=2)
+    assert mapping.raw_spectra is not None
+    assert mapping.raw_spectra[3, 100] > COSMIC_RAY_COUNTS
+    baseline_only = mapping.spectra[:, wavenumber > BASELINE_ONLY_SHIFT]
+    assert np.abs(baseline_only).max() < MAX_BASELINE_RESIDUAL
+    si_peak = mapping.spectra[:, np.argmin(np.abs(wavenumber - 520))]
+    assert si_peak.min() > MIN_SMOOTHED_SI_PEAK_COUNTS
+    assert np.allclose(mapping.spectra[:4], pipeline(spectra[:4]))
+
+    raman_schema = importlib.import_module(RamanMeasurement.__module__)
+    assert raman_schema.configuration.max_workers == 1
+    monkeypatch.setattr(raman_schema.configuration, 'preprocessing', ['smooth'])
+    entry_archive = parse(os.path.join('tests', 'data', 'test_raman.archive.yaml'))[0]
+    normalize_all(entry_archive)
+    assert entry_archive.data.preprocessing == 'smooth'
+    smoothed = entry_archive.data.results[0].intensity.copy()
+
+    monkeypatch.setattr(raman_schema.configuration, 'preprocessing', [])
+    normalize_all(entry_archive)
+    assert entry_archive.data.preprocessing is None
+    raw = entry_archive.data.results[0].intensity
+    assert not np.allclose(raw, smoothed)
+    assert np.std(np.diff(raw)) > np.std(np.diff(smoothed))
+
+
+def test_raman_peak_fitting():
+    """
+    The peaks of all points of a map are fitted in chunks across worker
+    processes and stored per result, peaks outside the measured range are
+    not fitted. Normalizing again after changing the fitted positions
+    replaces or removes the stored peaks.
+    """
+    rng = np.random.default_rng(0)
+    wavenumber = np.linspace(1500, 100, 1015)
+    centers = 380 + np.arange(9.0)
+    spectra = np.array(
+        [
+            1000 * peak_profiles(wavenumber, np.array([center]), np.array([8.0]))[0]
+            + 20
+            + rng.normal(0, 0.5, 1015)
+            for center in centers
+        ],
+        dtype=np.float32,
+    )
+    mapping = MappingRamanMeas()
+    mapping._add_points(
+        wavenumber,
+        spectra,
+        np.tile(np.arange(3.0), 3),
+        np.repeat(np.arange(3.0), 3),
+        images=[],
+        laser_wavelength=532,
+    )
+
+    fits = mapping.fit_peaks([384], shape='voigt', batch_size=4, max_workers=2)
+    assert fits['success'].all()
+    assert np.allclose(fits['center'][:, 0], centers, atol=0.1)
+    assert np.allclose(fits['fwhm'][:, 0], 8, atol=0.2)
+    assert np.allclose(fits['area'][:, 0], 1000, rtol=0.02)
+
+    fits = mapping.fit_peaks([384, OUT_OF_RANGE_SHIFT], shape='voigt')
+    assert fits['success'].all()
+    assert np.allclose(fits['center'][:, 0], centers, atol=0.1)
+    assert np.isnan(fits['center'][:, 1]).all()
+    fits = mapping.fit_peaks([OUT_OF_RANGE_SHIFT])
+    assert not fits['success'].any()
+
+    entry_archive = parse(os.path.join('tests', 'data', 'test_raman.archive.yaml'))[0]
+    entry_archive.data.peak_fit_positions = [520]
+    normalize_all(entry_archive)
+    result = entry_archive.data.results[0]
+    assert result.peak_positions.to('1/cm').magnitude[0] == pytest.approx(520, abs=10)
+    assert result.peak_fwhm.shape == result.peak_areas.shape == (1,)
+
+    entry_archive.data.peak_fit_positions = [380, 520]
+    normalize_all(entry_archive)
+    result = entry_archive.data.results[0]
+    assert result.peak_positions.shape == result.peak_areas.shape == (2,)
+    assert result.peak_positions.to('1/cm').magnitude[1] == pytest.approx(520, abs=10)
+
+    entry_archive.data.peak_fit_positions = []
+    normalize_all(entry_archive)
+    result = entry_archive.data.results[0]
+    assert result.peak_positions is None
+    assert result.peak_fwhm is None
+    assert result.peak_areas is None
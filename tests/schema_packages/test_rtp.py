@@ -1,9 +1,24 @@
+import io
+import logging
 import os.path
+from datetime import datetime
 
 import pytest
 from nomad.client import normalize_all, parse
 
+from nomad_dtu_nanolab_plugin import rtp_log_reader
+from nomad_dtu_nanolab_plugin.rtp_live_monitor import RTPLiveMonitor
+from nomad_dtu_nanolab_plugin.rtp_log_reader import parse_rtp_logfiles
+from nomad_dtu_nanolab_plugin.rtp_regression import (
+    _run_recording,
+    find_recordings,
+    run,
+)
+from nomad_dtu_nanolab_plugin.schema_packages.rtp import _get_directory_index
+
 MIN_POSITIVE_TEMPERATURE_K = 273.15
+# A recording missing in the baseline plus a baseline entry without recording
+NEW_AND_MISSING = 2
 
 
 @pytest.mark.usefixtures('caplog')
@@ -25,3 +40,145 @@ def test_schema():
 
         for gas in data.used_gases:
             assert gas in gas_sources
+
+
+def test_raw_file_index(tmp_path):
+    (tmp_path / 'logs').mkdir()
+    (tmp_path / 'logs' / 'run_RTP_LOGFILE.txt').write_text('log')
+    (tmp_path / 'notes.csv').write_text('notes')
+    (tmp_path / 'Recording Set 2025.CSV').write_text('eklipse')
+
+    index = _get_directory_index(tmp_path)
+
+    # Stale or foreign folders in the stored value still resolve by basename.
+    assert index.find(['C:/old/run_RTP_LOGFILE.txt', 'run_RTP_LOGFILE.txt']) == (
+        'logs/run_RTP_LOGFILE.txt'
+    )
+    assert index.find(['missing.txt']) is None
+    assert index.find_by_suffix('csv', ('recording set',)) == 'Recording Set 2025.CSV'
+
+    # The upload lookups follow raw_file(): exact paths only.
+    assert index.find(['run_RTP_LOGFILE.txt'], match_basename=False) is None
+
+    # The index is reused until the file listing changes.
+    assert _get_directory_index(tmp_path) is index
+    (tmp_path / 'logs' / 'second_LOGFILE.txt').write_text('log')
+    assert index.is_stale()
+    rebuilt = _get_directory_index(tmp_path)
+    assert rebuilt is not index
+    assert 'logs/second_LOGFILE.txt' in rebuilt.files
+
+
+def test_rtp_regression_harness(tmp_path):
+    data_dir = os.path.join('tests', 'data')
+    recordings = find_recordings(data_dir)
+    assert 'indiogo_0019' in recordings
+
+    golden = tmp_path / 'golden.json'
+    assert run(data_dir, golden_path=golden, update_golden=True, workers=1) == 0
+    report = io.StringIO()
+    assert run(data_dir, golden_path=golden, workers=1, memory=True, out=report) == 0
+    assert 'MiB' in report.getvalue()
+
+    # A different dwell threshold changes the step boundaries.
+    changed = run(
+        data_dir,
+        golden_path=golden,
+        overrides={'DWELL_SLOPE_THRESHOLD_K_S': 0.5},
+        workers=1,
+    )
+    assert changed == 1
+
+    # A baseline entry without a recording is flagged.
+    other = tmp_path / 'other'
+    other.mkdir()
+    (other / 'other_RTP_Recording Set.csv').write_text('not an Eklipse log')
+    (other / 'other_RTP_LOGFILE.txt').write_text('not a CX-Thermo log')
+    report = io.StringIO()
+    assert run(other, golden_path=golden, workers=1, out=report) == NEW_AND_MISSING
+    assert 'indiogo_0019  MISSING' in report.getvalue()
+
+    # Updating rebuilds the baseline from the recordings in the folder.
+    assert run(other, golden_path=golden, update_golden=True, workers=1) == 0
+    assert run(other, golden_path=golden, workers=1) == 0
+
+
+def test_rtp_regression_failed_recording(monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('broken log')
+
+    # An exception is returned with the recording instead of being raised,
+    # so it does not abort the other recordings of the batch.
+    monkeypatch.setattr(rtp_log_reader, 'parse_rtp_logfiles', fail)
+    name, summary, _, peak, error = _run_recording(
+        ('broken', 'broken.csv', ['broken.txt'], True)
+    )
+    assert (name, summary) == ('broken', None)
+    assert peak is not None
+    assert error == 'RuntimeError: broken log'
+
+
+def _line_times(lines, fmt, sep):
+    times = []
+    for line in lines:
+        try:
+            times.append(datetime.strptime(line.split(sep)[0], fmt))
+        except ValueError:
+            times.append(None)
+    return times
+
+
+def test_rtp_live_monitor(tmp_path):
+    data_dir = os.path.join('tests', 'data')
+    eklipse_path, (diagnostics_path,) = find_recordings(data_dir)['indiogo_0019']
+    logger = logging.getLogger('test_rtp_live_monitor')
+
+    # Replay both logs into growing files in chronological order.
+    logs = []
+    for src, fmt, sep in [
+        (eklipse_path, '%b-%d-%Y %I:%M:%S.%f %p', ','),
+        (diagnostics_path, '%Y/%m/%d_%H:%M:%S', '\t'),
+    ]:
+        with open(src, encoding='utf-8', errors='ignore') as handle:
+            lines = handle.readlines()
+        target = tmp_path / os.path.basename(src)
+        target.write_text('')
+        logs.append([lines, _line_times(lines, fmt, sep), target, 0, set()])
+
+    monitor = RTPLiveMonitor(str(logs[0][2]), [str(logs[1][2])], logger=logger)
+    times = sorted(t for log in logs for t in log[1] if t is not None)
+    elapsed = []
+    for step in range(1, 13):
+        cutoff = times[len(times) * step // 13]
+        for log in logs:
+            lines, line_times, target, pos, split = log
+            end = pos
+            while end < len(lines) and (
+                line_times[end] is None or line_times[end] <= cutoff
+            ):
+                end += 1
+            # Leave the next line half-written to check partial-line handling.
+            partial = ''
+            if end < len(lines) and end not in split:
+                split.add(end)
+                partial, lines[end] = lines[end][:10], lines[end][10:]
+            with open(target, 'a', encoding='utf-8') as handle:
+                handle.write(''.join(lines[pos:end]) + partial)
+            log[3] = end
+        status = monitor.update()
+        elapsed.append(status.elapsed_time_s or 0.0)
+
+    assert elapsed == sorted(elapsed) and elapsed[-1] > 0
+    assert status.peak_temperature_k > MIN_POSITIVE_TEMPERATURE_K
+    assert [seg.name for seg in status.segments][1:3] == ['Heating', 'Cooling']
+
+    for lines, _, target, pos, _ in logs:
+        with open(target, 'a', encoding='utf-8') as handle:
+            handle.write(''.join(lines[pos:]))
+    live = monitor.finish()
+
+    offline = parse_rtp_logfiles(eklipse_path, [diagnostics_path], logger=logger)
+    assert [step.name for step in live.steps] == [step.name for step in offline.steps]
+    assert live.steps == offline.steps
+    assert live.overview == offline.overview
+    assert len(live.timeseries['time_s']) == len(offline.timeseries['time_s'])